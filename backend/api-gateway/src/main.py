@@ -1,26 +1,86 @@
 """API网关 - 专业选择指导应用"""
 import os
 import time
+import asyncio
 import json
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Tuple
 from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 import httpx
-import redis
+import redis.asyncio as aioredis
 import jwt
 from pydantic import BaseModel
 import uvicorn
 
+from rate_limiter import RateLimiter, RateLimitRule, parse_rules, retry_after_header
+from upstream import UpstreamClients, UpstreamConfig
+from response_cache import ResponseCache, etag_matches, is_shareable, parse_ttls
+from token_cache import VerifiedTokenCache
+from resilience import CircuitBreaker, hedged_send
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "100"))
+# 连接池耗尽时等待空闲连接的时间（秒）
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "2"))
+JWT_SECRET = os.getenv("JWT_SECRET_KEY", "your-secret-key")
+# 吊销检查：定期从Redis集合同步已吊销令牌的 jti
+JWT_REVOCATION_CHECK = os.getenv("JWT_REVOCATION_CHECK", "false").lower() == "true"
+JWT_REVOKED_KEY = os.getenv("JWT_REVOKED_KEY", "jwt:revoked")
+JWT_REVOCATION_REFRESH = float(os.getenv("JWT_REVOCATION_REFRESH", "10"))
+
+# 已验证令牌缓存，同一令牌过期前不再重复验签
+token_cache = VerifiedTokenCache(max_entries=int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000")))
+
+# 异步Redis客户端，所有请求共享一个连接池（在 lifespan 中创建）
+redis_client: Optional[aioredis.Redis] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global redis_client
+    pool = aioredis.BlockingConnectionPool.from_url(
+        REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        decode_responses=True
+    )
+    client = aioredis.Redis(connection_pool=pool)
+    try:
+        await client.ping()
+        redis_client = client
+    except Exception as e:
+        logger.warning(f"Redis连接失败: {e}")
+        await client.aclose()
+        await pool.disconnect()
+    upstreams.start()
+    revocation_task = None
+    if JWT_REVOCATION_CHECK and redis_client is not None:
+        revocation_task = asyncio.create_task(sync_revoked_tokens())
+    
+    yield
+    
+    if revocation_task is not None:
+        revocation_task.cancel()
+    await upstreams.aclose()
+    if redis_client is not None:
+        await redis_client.aclose()
+        await pool.disconnect()
+        redis_client = None
+
+
 app = FastAPI(
     title="专业选择指导应用 API网关",
     description="智能专业选择指导应用 - API网关服务",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -31,18 +91,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
-JWT_SECRET = os.getenv("JWT_SECRET_KEY", "your-secret-key")
-
-try:
-    redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-    redis_client.ping()
-except Exception as e:
-    logger.warning(f"Redis连接失败: {e}")
-    redis_client = None
+RATE_LIMIT = int(os.getenv("RATE_LIMIT", "100"))
+RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))
 
-RATE_LIMIT = 100
-RATE_LIMIT_WINDOW = 60
+# 按路由前缀/用户覆盖默认限流，JSON格式，如 {"/api/v1/chat/message": [20, 60]}、{"user:42": [1000, 60]}
+rate_limiter = RateLimiter(
+    RateLimitRule(RATE_LIMIT, RATE_LIMIT_WINDOW),
+    route_rules=parse_rules(os.getenv("RATE_LIMIT_ROUTES")),
+    user_rules=parse_rules(os.getenv("RATE_LIMIT_USERS")),
+)
 
 SERVICE_URLS = {
     "user-service": "http://localhost:8001",
@@ -53,18 +110,79 @@ SERVICE_URLS = {
     "crawler-service": "http://localhost:8004",
 }
 
-class RateLimitExceeded(HTTPException):
-    def __init__(self):
-        super().__init__(status_code=429, detail="请求过于频繁，请稍后再试")
+# 各上游服务的超时与连接池配置（未列出的服务使用默认配置）
+UPSTREAM_CONFIGS = {
+    # 对话、语音服务调用大模型/语音识别，响应较慢
+    "chat-service": UpstreamConfig(read_timeout=60.0, slow_call_seconds=30.0),
+    "voice-service": UpstreamConfig(read_timeout=60.0, slow_call_seconds=30.0),
+    # 读多写少的数据服务：幂等GET超过1秒未返回时对冲
+    "crawler-service": UpstreamConfig(read_timeout=30.0, hedge_after=1.0, latency_budget=10.0),
+    "recommendation-service": UpstreamConfig(hedge_after=1.0, latency_budget=8.0),
+    "analytics-service": UpstreamConfig(hedge_after=1.0, latency_budget=8.0),
+}
+# 关闭后所有服务都不发对冲请求
+UPSTREAM_HEDGING = os.getenv("UPSTREAM_HEDGING", "true").lower() == "true"
+
+# 网关响应缓存TTL（秒），只缓存这些路由的GET请求；RESPONSE_CACHE_TTLS（JSON）可覆盖或新增
+RESPONSE_CACHE_TTLS = {
+    "/api/v1/major/categories": 300,
+    "/api/v1/major/market-data/stats": 60,
+    "/api/v1/major/market-data": 60,
+    "/api/v1/major/*": 300,
+    "/api/v1/universities/recommend": 60,
+    "/api/v1/hot-news": 30,
+    "/api/v1/analytics/trends": 300,
+}
+
+response_cache = ResponseCache(
+    {**RESPONSE_CACHE_TTLS, **parse_ttls(os.getenv("RESPONSE_CACHE_TTLS"))},
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000")),
+)
+
+upstreams = UpstreamClients(
+    SERVICE_URLS,
+    UPSTREAM_CONFIGS,
+    default_config=UpstreamConfig(
+        max_connections=int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100")),
+        max_keepalive=int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20")),
+    ),
+    http2=os.getenv("UPSTREAM_HTTP2", "false").lower() == "true",
+)
+
+# 每个上游服务一个熔断器
+breakers = {
+    name: CircuitBreaker(
+        name,
+        failure_rate_threshold=float(os.getenv("BREAKER_FAILURE_RATE", "0.5")),
+        slow_call_seconds=upstreams.config_for(name).slow_call_seconds,
+        open_seconds=float(os.getenv("BREAKER_OPEN_SECONDS", "15")),
+    )
+    for name in SERVICE_URLS
+}
 
 def verify_token(token: str) -> Dict[str, Any]:
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token已过期")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="无效的Token")
+    if token_cache.is_revoked(payload):
+        raise HTTPException(status_code=401, detail="Token已吊销")
+    token_cache.set(token, payload)
+    return payload
+
+async def sync_revoked_tokens():
+    """定期同步吊销列表（吊销的令牌在下一次同步后失效）"""
+    while True:
+        try:
+            token_cache.set_revoked(await redis_client.smembers(JWT_REVOKED_KEY))
+        except aioredis.RedisError as e:
+            logger.warning(f"同步令牌吊销列表失败: {e}")
+        await asyncio.sleep(JWT_REVOCATION_REFRESH)
 
 def get_current_user(token: str = None) -> Optional[Dict]:
     if token is None:
@@ -74,14 +192,46 @@ def get_current_user(token: str = None) -> Optional[Dict]:
     except HTTPException:
         return None
 
-def check_rate_limit(user_id: str = "anonymous") -> bool:
-    if redis_client is None:
-        return True
-    key = f"rate_limit:{user_id}"
-    current = redis_client.incr(key)
-    if current == 1:
-        redis_client.expire(key, RATE_LIMIT_WINDOW)
-    return current <= RATE_LIMIT
+async def check_rate_limit(user_id: str = "anonymous", path: str = "/"):
+    return await rate_limiter.check(redis_client, user_id, path)
+
+async def send_upstream(
+    service_name: str,
+    build_request: Callable[[], httpx.Request],
+    idempotent: bool = False
+) -> httpx.Response:
+    """经熔断器发送上游请求，返回流式响应（调用方负责关闭）
+    
+    熔断时直接返回503；幂等请求按服务配置发送对冲请求。
+    """
+    try:
+        client = upstreams.get(service_name)
+    except KeyError:
+        raise HTTPException(status_code=502, detail=f"未知服务: {service_name}")
+    breaker = breakers[service_name]
+    if not breaker.allow():
+        raise HTTPException(
+            status_code=503,
+            detail=f"服务暂时不可用: {service_name}",
+            headers={"Retry-After": str(max(1, int(breaker.retry_after())))}
+        )
+    
+    config = upstreams.config_for(service_name)
+    started = time.monotonic()
+    try:
+        if idempotent and UPSTREAM_HEDGING and config.hedge_after is not None:
+            response = await hedged_send(client, build_request, config.hedge_after, config.latency_budget)
+        else:
+            response = await client.send(build_request(), stream=True)
+    except httpx.HTTPError as e:
+        breaker.record(False, time.monotonic() - started)
+        logger.error(f"服务调用失败 {service_name}: {e}")
+        raise HTTPException(status_code=502, detail=f"服务不可用: {service_name}")
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record(response.status_code < 500, time.monotonic() - started)
+    return response
 
 async def proxy_request(
     service_name: str,
@@ -90,23 +240,117 @@ async def proxy_request(
     data: Dict = None,
     headers: Dict = None
 ) -> Dict:
-    base_url = SERVICE_URLS.get(service_name)
-    if not base_url:
+    method = method.upper()
+    if method == "GET":
+        build = lambda: upstreams.get(service_name).build_request(method, path, headers=headers, params=data)
+    else:
+        build = lambda: upstreams.get(service_name).build_request(method, path, json=data, headers=headers)
+    
+    response = await send_upstream(service_name, build, idempotent=method == "GET")
+    try:
+        await response.aread()
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        logger.error(f"服务调用失败 {service_name}: {e}")
+        raise HTTPException(status_code=502, detail=f"服务不可用: {service_name}")
+    finally:
+        await response.aclose()
+
+# 逐跳头部，不在代理的请求/响应之间转发
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "host",
+}
+
+async def proxy_stream(request: Request, service_name: str, path: Optional[str] = None) -> StreamingResponse:
+    """透传代理：原样转发方法、查询字符串、请求头和请求体，
+    并原样流式返回上游的状态码、响应头和响应体字节（不做JSON解析与重新序列化）"""
+    try:
+        client = upstreams.get(service_name)
+    except KeyError:
         raise HTTPException(status_code=502, detail=f"未知服务: {service_name}")
     
-    url = f"{base_url}{path}"
-    async with httpx.AsyncClient() as client:
+    url = path or request.url.path
+    if request.method == "GET":
+        ttl = response_cache.ttl_for(url)
+        if ttl is not None:
+            if not has_credentials(request):
+                return await cached_proxy(request, service_name, client, url, ttl)
+            response_cache.stats["bypassed"] += 1
+    if request.url.query:
+        url = f"{url}?{request.url.query}"
+    headers = [(k, v) for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS]
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+    response = await send_upstream(
+        service_name,
+        lambda: client.build_request(
+            request.method, url, headers=headers, content=request.stream() if has_body else None
+        ),
+        # 请求体只能读取一次，只有无请求体的GET/HEAD可以对冲
+        idempotent=request.method in ("GET", "HEAD") and not has_body
+    )
+    
+    # aiter_raw 不解压，Content-Encoding / Content-Length 与转发的字节保持一致
+    streaming = StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        background=BackgroundTask(response.aclose)
+    )
+    # 使用原始头部列表，保留重复的头部（如多个 Set-Cookie）
+    streaming.raw_headers = [
+        (k, v) for k, v in response.headers.raw if k.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS
+    ]
+    return streaming
+
+# 缓存的响应体已解压，这些头部由网关重新生成
+# （带 Set-Cookie 的响应不能共享，不进入缓存，只原样返回给发起请求的客户端）
+CACHE_EXCLUDED_HEADERS = HOP_BY_HOP_HEADERS | {"content-length", "content-encoding", "etag"}
+# 向上游请求完整的未压缩响应体
+CACHE_EXCLUDED_REQUEST_HEADERS = HOP_BY_HOP_HEADERS | {"accept-encoding", "if-none-match", "if-modified-since"}
+
+def has_credentials(request: Request) -> bool:
+    """携带身份凭据的请求（响应可能因用户而异）不使用共享的响应缓存"""
+    return "authorization" in request.headers or "cookie" in request.headers
+
+async def cached_proxy(request: Request, service_name: str, client: httpx.AsyncClient, path: str, ttl: int) -> Response:
+    """带网关响应缓存的GET代理（路径+规范化查询参数为键，支持ETag协商缓存）"""
+    key = response_cache.make_key(path, request.url.query)
+    headers = [(k, v) for k, v in request.headers.items() if k.lower() not in CACHE_EXCLUDED_REQUEST_HEADERS]
+    
+    async def fetch():
+        response = await send_upstream(
+            service_name, lambda: client.build_request("GET", key, headers=headers), idempotent=True
+        )
         try:
-            if method.upper() == "GET":
-                response = await client.get(url, headers=headers, params=data)
-            else:
-                response = await client.post(url, json=data, headers=headers)
-            
-            response.raise_for_status()
-            return response.json()
+            body = await response.aread()
         except httpx.HTTPError as e:
             logger.error(f"服务调用失败 {service_name}: {e}")
             raise HTTPException(status_code=502, detail=f"服务不可用: {service_name}")
+        finally:
+            await response.aclose()
+        all_headers = response.headers.multi_items()
+        kept = [(k, v) for k, v in all_headers if k.lower() not in CACHE_EXCLUDED_HEADERS]
+        return response.status_code, kept, body, is_shareable(all_headers)
+    
+    entry, hit = await response_cache.get_or_fetch(key, ttl, fetch)
+    response = Response(entry.body, status_code=entry.status_code)
+    for k, v in entry.headers:
+        response.headers.append(k, v)
+    if entry.status_code != 200 or not entry.shareable:
+        return response
+    
+    max_age = max(0, int(entry.expires_at - time.monotonic()))
+    cache_headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"public, max-age={max_age}",
+        "X-Cache": "HIT" if hit else "MISS",
+    }
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.stats["not_modified"] += 1
+        return Response(status_code=304, headers=cache_headers)
+    response.headers.update(cache_headers)
+    return response
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -124,33 +368,85 @@ async def log_requests(request: Request, call_next):
 async def rate_limit_middleware(request: Request, call_next):
     auth_header = request.headers.get("Authorization")
     user_id = "anonymous"
+    user = None
     if auth_header and auth_header.startswith("Bearer "):
         token = auth_header[7:]
         user = get_current_user(token)
         if user:
             user_id = f"user:{user.get('user_id', 'unknown')}"
+    # 供后续处理函数使用，无需再次解析令牌
+    request.state.user = user
+    request.state.user_id = user.get("user_id") if user else None
     
-    if not check_rate_limit(user_id):
-        raise RateLimitExceeded()
+    result = await check_rate_limit(user_id, request.url.path)
+    if not result.allowed:
+        # 中间件中抛出HTTPException不会被异常处理器转换，直接返回429响应
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "请求过于频繁，请稍后再试"},
+            headers={
+                "Retry-After": retry_after_header(result),
+                "X-RateLimit-Limit": str(result.limit),
+                "X-RateLimit-Remaining": "0",
+            }
+        )
     
-    return await call_next(request)
+    response = await call_next(request)
+    response.headers["X-RateLimit-Limit"] = str(result.limit)
+    response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+    return response
+
+# 健康检查：并发探测所有上游服务，结果缓存数秒，供负载均衡器高频探测
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "1.0"))
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "3"))
+_health_cache: Dict[str, Any] = {"result": None, "checked_at": 0.0, "task": None}
+
+async def probe_service(name: str) -> Dict[str, Any]:
+    """探测单个上游服务的 /health（不经过熔断器，熔断期间也能观察到恢复）"""
+    started = time.monotonic()
+    try:
+        response = await asyncio.wait_for(
+            upstreams.get(name).get("/health", timeout=HEALTH_CHECK_TIMEOUT), HEALTH_CHECK_TIMEOUT
+        )
+        status = "healthy" if response.status_code == 200 else "unhealthy"
+    except asyncio.TimeoutError:
+        status = "timeout"
+    except Exception:
+        status = "unreachable"
+    return {"status": status, "latency_ms": round((time.monotonic() - started) * 1000, 1)}
+
+async def collect_services_health() -> Dict[str, Dict[str, Any]]:
+    results = await asyncio.gather(*(probe_service(name) for name in SERVICE_URLS))
+    return dict(zip(SERVICE_URLS, results))
+
+async def get_services_health() -> Tuple[Dict[str, Dict[str, Any]], float]:
+    """返回 (各服务探测结果, 探测时间)，缓存期内直接返回，并发请求共享一次探测"""
+    if _health_cache["result"] is not None and time.monotonic() - _health_cache["checked_at"] < HEALTH_CACHE_SECONDS:
+        return _health_cache["result"], _health_cache["checked_at"]
+    task = _health_cache["task"]
+    if task is None:
+        task = _health_cache["task"] = asyncio.ensure_future(collect_services_health())
+        try:
+            _health_cache["result"] = await asyncio.shield(task)
+            _health_cache["checked_at"] = time.monotonic()
+        finally:
+            _health_cache["task"] = None
+        return _health_cache["result"], _health_cache["checked_at"]
+    return await asyncio.shield(task), time.monotonic()
 
 @app.get("/health")
 async def health_check():
-    services_status = {}
-    for name, url in SERVICE_URLS.items():
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{url}/health", timeout=2.0)
-                services_status[name] = "healthy" if response.status_code == 200 else "unhealthy"
-        except Exception:
-            services_status[name] = "unreachable"
+    results, checked_at = await get_services_health()
+    services_status = {name: result["status"] for name, result in results.items()}
     
     return {
-        "status": "healthy",
+        "status": "healthy" if all(s == "healthy" for s in services_status.values()) else "degraded",
         "service": "api-gateway",
         "timestamp": datetime.utcnow().isoformat(),
-        "services": services_status
+        "services": services_status,
+        "latency_ms": {name: result["latency_ms"] for name, result in results.items()},
+        "cache_age_seconds": round(time.monotonic() - checked_at, 1),
+        "circuit_breakers": {name: breaker.snapshot() for name, breaker in breakers.items()}
     }
 
 @app.get("/")
@@ -167,74 +463,71 @@ async def api_health():
 
 @app.post("/api/v1/auth/register")
 async def auth_register(request: Request):
-    return await proxy_request("user-service", "POST", "/api/v1/auth/register", await request.json())
+    return await proxy_stream(request, "user-service")
 
 @app.post("/api/v1/auth/login")
 async def auth_login(request: Request):
-    return await proxy_request("user-service", "POST", "/api/v1/auth/login", await request.json())
+    return await proxy_stream(request, "user-service")
 
 @app.post("/api/v1/auth/logout")
-async def auth_logout():
-    return await proxy_request("user-service", "POST", "/api/v1/auth/logout")
+async def auth_logout(request: Request):
+    return await proxy_stream(request, "user-service")
 
 @app.get("/api/v1/users/profile")
-async def get_user_profile():
-    return await proxy_request("user-service", "GET", "/api/v1/users/profile")
+async def get_user_profile(request: Request):
+    return await proxy_stream(request, "user-service")
 
 @app.put("/api/v1/users/profile")
 async def update_user_profile(request: Request):
-    return await proxy_request("user-service", "PUT", "/api/v1/users/profile", await request.json())
+    return await proxy_stream(request, "user-service")
 
 @app.post("/api/v1/chat/conversation")
 async def create_conversation(request: Request):
-    return await proxy_request("chat-service", "POST", "/api/v1/chat/conversation", await request.json())
+    return await proxy_stream(request, "chat-service")
 
 @app.get("/api/v1/chat/conversation/{conversation_id}")
-async def get_conversation(conversation_id: str):
-    return await proxy_request("chat-service", "GET", f"/api/v1/chat/conversation/{conversation_id}")
+async def get_conversation(request: Request, conversation_id: str):
+    return await proxy_stream(request, "chat-service")
 
 @app.post("/api/v1/chat/message")
 async def send_message(request: Request):
-    return await proxy_request("chat-service", "POST", "/api/v1/chat/message", await request.json())
+    return await proxy_stream(request, "chat-service")
 
 @app.get("/api/v1/major/categories")
-async def get_major_categories():
-    return await proxy_request("crawler-service", "GET", "/api/v1/major/categories")
+async def get_major_categories(request: Request):
+    return await proxy_stream(request, "crawler-service")
 
 @app.get("/api/v1/major/market-data")
 async def get_major_market_data(request: Request):
-    params = dict(request.query_params)
-    return await proxy_request("crawler-service", "GET", "/api/v1/major/market-data", params)
+    return await proxy_stream(request, "crawler-service")
 
 @app.get("/api/v1/major/market-data/stats")
-async def get_major_market_stats():
-    return await proxy_request("crawler-service", "GET", "/api/v1/major/market-data/stats")
+async def get_major_market_stats(request: Request):
+    return await proxy_stream(request, "crawler-service")
 
 @app.get("/api/v1/major/{major_id}/detail")
-async def get_major_detail(major_id: str):
-    return await proxy_request("crawler-service", "GET", f"/api/v1/major/{major_id}/detail")
+async def get_major_detail(request: Request, major_id: str):
+    return await proxy_stream(request, "crawler-service")
 
 @app.get("/api/v1/universities/recommend")
 async def get_recommended_universities(request: Request):
-    params = dict(request.query_params)
-    return await proxy_request("crawler-service", "GET", "/api/v1/universities/recommend", params)
+    return await proxy_stream(request, "crawler-service")
 
 @app.get("/api/v1/hot-news")
 async def get_hot_news(request: Request):
-    params = dict(request.query_params)
-    return await proxy_request("crawler-service", "GET", "/api/v1/hot-news", params)
+    return await proxy_stream(request, "crawler-service")
 
 @app.post("/api/v1/crawler/crawl")
 async def trigger_crawl(request: Request):
-    return await proxy_request("crawler-service", "POST", "/api/v1/crawler/crawl", await request.json())
+    return await proxy_stream(request, "crawler-service")
 
 @app.post("/api/v1/crawler/reset-and-seed")
-async def reset_and_seed():
-    return await proxy_request("crawler-service", "POST", "/api/v1/crawler/reset-and-seed")
+async def reset_and_seed(request: Request):
+    return await proxy_stream(request, "crawler-service")
 
 @app.post("/api/v1/auth/login")
 async def auth_login(request: Request):
-    return await proxy_request("user-service", "POST", "/api/v1/auth/login", await request.json())
+    return await proxy_stream(request, "user-service")
 
 @app.get("/api/v1/users/me")
 async def get_current_user_info(request: Request):
@@ -258,16 +551,15 @@ async def create_conversation(request: Request):
 
 @app.get("/api/v1/chat/conversations")
 async def get_conversations(request: Request):
-    params = dict(request.query_params)
-    return await proxy_request("chat-service", "GET", "/api/v1/chat/conversations", params)
+    return await proxy_stream(request, "chat-service")
 
 @app.get("/api/v1/chat/conversations/{conversation_id}/messages")
-async def get_messages(conversation_id: str):
-    return await proxy_request("chat-service", "GET", f"/api/v1/chat/conversations/{conversation_id}/messages")
+async def get_messages(request: Request, conversation_id: str):
+    return await proxy_stream(request, "chat-service")
 
 @app.post("/api/v1/chat/message")
 async def send_message(request: Request):
-    return await proxy_request("chat-service", "POST", "/api/v1/chat/message", await request.json())
+    return await proxy_stream(request, "chat-service")
 
 @app.post("/api/v1/voice/stt")
 async def speech_to_text(request: Request):
@@ -276,31 +568,27 @@ async def speech_to_text(request: Request):
 
 @app.post("/api/v1/voice/tts")
 async def text_to_speech(request: Request):
-    return await proxy_request("voice-service", "POST", "/api/v1/voice/tts", await request.json())
+    return await proxy_stream(request, "voice-service")
 
 @app.get("/api/v1/recommendations")
 async def get_recommendations(request: Request):
-    params = dict(request.query_params)
-    print("获取专业列表....001",params)
-    return await proxy_request("recommendation-service", "GET", "/api/v1/recommendations", params)
+    return await proxy_stream(request, "recommendation-service")
 
 @app.get("/api/v1/analytics/trends")
 async def get_trends(request: Request):
-    params = dict(request.query_params)
-    return await proxy_request("analytics-service", "GET", "/api/v1/analytics/trends", params)
+    return await proxy_stream(request, "analytics-service")
 
 @app.post("/api/v1/crawler/crawl")
 async def trigger_crawl(request: Request):
-    return await proxy_request("crawler-service", "POST", "/api/v1/crawler/crawl", await request.json())
+    return await proxy_stream(request, "crawler-service")
 
 @app.post("/api/v1/crawler/reset-and-seed")
-async def reset_and_seed():
-    return await proxy_request("crawler-service", "POST", "/api/v1/crawler/reset-and-seed")
+async def reset_and_seed(request: Request):
+    return await proxy_stream(request, "crawler-service")
 
 @app.get("/api/v1/universities/recommend")
 async def get_recommended_universities(request: Request):
-    params = dict(request.query_params)
-    return await proxy_request("crawler-service", "GET", "/api/v1/universities/recommend", params)
+    return await proxy_stream(request, "crawler-service")
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
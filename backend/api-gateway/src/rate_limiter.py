@@ -0,0 +1,174 @@
+"""
+网关限流
+令牌桶算法，由Lua脚本在Redis中原子执行，每个请求一次往返；
+被拒绝的客户端在本地记录可重试时间，到期前直接拒绝，不再访问Redis。
+"""
+
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitRule(NamedTuple):
+    """window 秒内最多 limit 次请求，令牌按 limit/window 每秒匀速补充"""
+    limit: int
+    window: int
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    # 被拒绝时距离下一个令牌可用的秒数
+    retry_after: float
+
+
+# KEYS[1] 令牌桶键；ARGV: 容量, 每毫秒补充的令牌数, 当前时间(毫秒)
+# 返回 {是否放行, 剩余令牌数, 需等待的毫秒数}
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = math.ceil((1 - tokens) / rate)
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / rate))
+return {allowed, math.floor(tokens), wait}
+"""
+
+
+def parse_rules(raw: Optional[str]) -> Dict[str, RateLimitRule]:
+    """解析 {"键": [limit, window]} 格式的JSON配置"""
+    if not raw:
+        return {}
+    try:
+        return {key: RateLimitRule(int(value[0]), int(value[1])) for key, value in json.loads(raw).items()}
+    except (ValueError, TypeError, IndexError, AttributeError) as e:
+        logger.warning(f"限流规则配置无效，已忽略: {e}")
+        return {}
+
+
+class RateLimiter:
+    """按用户和路由限流
+
+    规则优先级：用户规则 > 最长匹配的路由前缀规则 > 默认规则。
+    每个 (用户, 路由前缀) 使用独立的令牌桶。
+
+    Args:
+        default_rule: 默认规则
+        route_rules: {路由前缀: 规则}
+        user_rules: {用户标识（如 user:42、anonymous）: 规则}
+        max_local_entries: 本地拒绝记录的最大数量
+    """
+
+    KEY_PREFIX = "rate_limit:"
+
+    def __init__(
+        self,
+        default_rule: RateLimitRule,
+        route_rules: Optional[Dict[str, RateLimitRule]] = None,
+        user_rules: Optional[Dict[str, RateLimitRule]] = None,
+        max_local_entries: int = 10000
+    ):
+        self.default_rule = default_rule
+        self.route_rules = dict(route_rules or {})
+        self.user_rules = dict(user_rules or {})
+        self._route_prefixes = sorted(self.route_rules, key=len, reverse=True)
+        self.max_local_entries = max_local_entries
+        # 限流键 → 可以再次尝试的时间（monotonic）
+        self._blocked_until: Dict[str, float] = {}
+        self._script_client: Optional[aioredis.Redis] = None
+        self._script: Any = None
+        self.stats = {"allowed": 0, "rejected": 0, "rejected_local": 0, "errors": 0}
+
+    def resolve(self, user_id: str, path: str) -> Tuple[str, RateLimitRule]:
+        """返回 (限流键, 规则)"""
+        scope = "*"
+        rule = self.default_rule
+        for prefix in self._route_prefixes:
+            if path.startswith(prefix):
+                scope, rule = prefix, self.route_rules[prefix]
+                break
+        rule = self.user_rules.get(user_id, rule)
+        return f"{self.KEY_PREFIX}{user_id}:{scope}", rule
+
+    def _get_script(self, client: aioredis.Redis):
+        # 注册后的脚本使用EVALSHA，Redis中未加载时自动回退到EVAL
+        if self._script_client is not client:
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+            self._script_client = client
+        return self._script
+
+    def _check_local(self, key: str, rule: RateLimitRule) -> Optional[RateLimitResult]:
+        deadline = self._blocked_until.get(key)
+        if deadline is None:
+            return None
+        wait = deadline - time.monotonic()
+        if wait <= 0:
+            del self._blocked_until[key]
+            return None
+        return RateLimitResult(False, rule.limit, 0, wait)
+
+    def _block_locally(self, key: str, wait: float):
+        now = time.monotonic()
+        if len(self._blocked_until) >= self.max_local_entries:
+            self._blocked_until = {k: v for k, v in self._blocked_until.items() if v > now}
+            if len(self._blocked_until) >= self.max_local_entries:
+                return
+        self._blocked_until[key] = now + wait
+
+    async def check(self, client: Optional[aioredis.Redis], user_id: str, path: str) -> RateLimitResult:
+        """检查并消耗一个令牌；Redis不可用时放行"""
+        key, rule = self.resolve(user_id, path)
+        if rule.limit <= 0:
+            return RateLimitResult(True, rule.limit, 0, 0)
+
+        result = self._check_local(key, rule)
+        if result is not None:
+            self.stats["rejected_local"] += 1
+            return result
+        if client is None:
+            return RateLimitResult(True, rule.limit, rule.limit, 0)
+
+        rate = rule.limit / (rule.window * 1000)
+        try:
+            allowed, remaining, wait_ms = await self._get_script(client)(
+                keys=[key], args=[rule.limit, repr(rate), int(time.time() * 1000)]
+            )
+        except aioredis.RedisError as e:
+            # Redis不可用时放行，避免限流故障导致网关整体不可用
+            self.stats["errors"] += 1
+            logger.warning(f"限流检查失败: {e}")
+            return RateLimitResult(True, rule.limit, rule.limit, 0)
+
+        if allowed:
+            self.stats["allowed"] += 1
+            return RateLimitResult(True, rule.limit, int(remaining), 0)
+        wait = max(int(wait_ms), 1) / 1000
+        self._block_locally(key, wait)
+        self.stats["rejected"] += 1
+        return RateLimitResult(False, rule.limit, 0, wait)
+
+
+def retry_after_header(result: RateLimitResult) -> str:
+    return str(max(1, math.ceil(result.retry_after)))
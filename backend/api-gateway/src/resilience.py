@@ -0,0 +1,210 @@
+"""
+上游调用的熔断与对冲请求
+- CircuitBreaker：按滑动时间窗口统计错误率和慢调用率，超过阈值时熔断（快速失败），
+  熔断一段时间后进入半开状态放行少量探测请求，探测成功则恢复
+- hedged_send：幂等请求超过对冲延迟仍未返回时再发一个相同请求，取先成功返回的结果
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """单个上游服务的熔断器
+
+    Args:
+        name: 服务名
+        failure_rate_threshold: 窗口内失败（异常或5xx）比例达到该值时熔断
+        slow_call_seconds: 超过该耗时的调用计为慢调用
+        slow_rate_threshold: 窗口内慢调用比例达到该值时熔断
+        window_seconds: 统计窗口
+        min_calls: 窗口内调用数达到该值才计算比例
+        open_seconds: 熔断持续时间，之后进入半开状态
+        half_open_probes: 半开状态同时放行的探测请求数
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        slow_rate_threshold: float = 0.8,
+        window_seconds: float = 30.0,
+        min_calls: int = 10,
+        open_seconds: float = 15.0,
+        half_open_probes: int = 1
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate_threshold = slow_rate_threshold
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        # (时间, 是否失败, 是否慢调用)
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+
+    def _trim(self, now: float):
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+
+    def allow(self) -> bool:
+        """是否放行本次调用；放行后必须调用 record() 或 release()"""
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._probes = 0
+            logger.info(f"熔断器半开，开始探测: {self.name}")
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                self.rejected += 1
+                return False
+            self._probes += 1
+        return True
+
+    def retry_after(self) -> float:
+        """熔断状态下距离半开探测的秒数"""
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def record(self, success: bool, latency: float):
+        """记录一次调用结果"""
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+            if success and not slow:
+                self.state = CLOSED
+                self._calls.clear()
+                logger.info(f"熔断器恢复: {self.name}")
+            else:
+                self._open(now)
+            return
+
+        self._calls.append((now, not success, slow))
+        self._trim(now)
+        total = len(self._calls)
+        if self.state != CLOSED or total < self.min_calls:
+            return
+        failures = sum(1 for _, failed, _ in self._calls if failed)
+        slows = sum(1 for _, _, is_slow in self._calls if is_slow)
+        if failures / total >= self.failure_rate_threshold or slows / total >= self.slow_rate_threshold:
+            self._open(now)
+
+    def release(self):
+        """放行的调用被取消、没有结果时释放半开探测名额"""
+        if self.state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+        logger.warning(f"上游服务熔断: {self.name}，{self.open_seconds:.0f}秒后探测")
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._trim(now)
+        total = len(self._calls)
+        snapshot = {
+            "state": self.state,
+            "calls": total,
+            "failure_rate": round(sum(1 for c in self._calls if c[1]) / total, 4) if total else 0.0,
+            "slow_rate": round(sum(1 for c in self._calls if c[2]) / total, 4) if total else 0.0,
+            "rejected": self.rejected,
+        }
+        if self.state == OPEN:
+            snapshot["retry_after"] = round(self.retry_after(), 1)
+        return snapshot
+
+
+async def hedged_send(
+    client: httpx.AsyncClient,
+    build_request: Callable[[], httpx.Request],
+    hedge_after: float,
+    budget: Optional[float] = None,
+    max_attempts: int = 2
+) -> httpx.Response:
+    """发送幂等请求，hedge_after 秒内未返回时再发一个（第一个请求快速失败时立即重试）
+
+    返回最先得到的非5xx响应（流式，调用方负责关闭），其余请求取消、响应关闭。
+    全部失败时返回最后一个5xx响应或抛出最后的异常；超过 budget 秒抛出 httpx.TimeoutException。
+    """
+    deadline = time.monotonic() + budget if budget else None
+    tasks: List[asyncio.Task] = []
+    pending = set()
+    winner: Optional[httpx.Response] = None
+    fallback: Optional[httpx.Response] = None
+    error: Optional[BaseException] = None
+
+    def launch():
+        task = asyncio.ensure_future(client.send(build_request(), stream=True))
+        tasks.append(task)
+        pending.add(task)
+
+    try:
+        launch()
+        while pending:
+            timeout = hedge_after if len(tasks) < max_attempts else None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise httpx.TimeoutException(f"超过延迟预算 {budget}秒")
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+            if not done:
+                if len(tasks) < max_attempts:
+                    launch()
+                continue
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                response = task.result()
+                if response.status_code < 500:
+                    winner = response
+                    return winner
+                if fallback is not None:
+                    await fallback.aclose()
+                fallback = response
+            if not pending and len(tasks) < max_attempts:
+                launch()
+        if fallback is not None:
+            winner = fallback
+            return winner
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        for task in tasks:
+            if task.done() and not task.cancelled() and task.exception() is None:
+                response = task.result()
+                if response is not winner:
+                    await response.aclose()
+            elif not task.done():
+                # 被取消的请求在后台结束，结束后关闭可能已获得的响应
+                task.add_done_callback(_close_late_response)
+
+
+def _close_late_response(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is None:
+        asyncio.ensure_future(task.result().aclose())
@@ -0,0 +1,179 @@
+"""
+网关响应缓存
+在网关进程内缓存读多写少接口的上游响应，按路径+规范化查询参数区分，
+支持按路由配置TTL、ETag/If-None-Match 协商缓存（304），相同请求并发未命中只请求一次上游。
+上游设置Cookie或声明 Cache-Control: private / no-store 的响应不缓存，也不共享给并发请求。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    etag: str
+    expires_at: float
+    shareable: bool = True
+
+
+def is_shareable(headers: List[Tuple[str, str]]) -> bool:
+    """上游响应能否在客户端之间共享（设置Cookie、Cache-Control: private / no-store 的响应不能）"""
+    for name, value in headers:
+        name = name.lower()
+        if name == "set-cookie":
+            return False
+        if name == "cache-control":
+            directives = {directive.strip().split("=", 1)[0].lower() for directive in value.split(",")}
+            if directives & {"private", "no-store"}:
+                return False
+    return True
+
+
+def parse_ttls(raw: Optional[str]) -> Dict[str, int]:
+    """解析 {"路由": TTL秒数} 格式的JSON配置"""
+    if not raw:
+        return {}
+    try:
+        return {path: int(ttl) for path, ttl in json.loads(raw).items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.warning(f"响应缓存TTL配置无效，已忽略: {e}")
+        return {}
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较，支持多个ETag和 *）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    strip = lambda tag: tag.strip().removeprefix("W/")
+    return strip(etag) in {strip(tag) for tag in if_none_match.split(",")}
+
+
+class ResponseCache:
+    """有界LRU响应缓存
+
+    路由规则格式与 RedisCacheService.TTL_CONFIG 一致：精确路径优先，
+    "/api/v1/major/*" 形式按最长前缀匹配，未匹配的路由不缓存。
+
+    Args:
+        route_ttls: {路由: TTL秒数}
+        max_entries: 最多缓存的响应数
+        max_body_bytes: 超过该大小的响应不缓存
+    """
+
+    def __init__(self, route_ttls: Dict[str, int], max_entries: int = 1000, max_body_bytes: int = 1024 * 1024):
+        self._exact: Dict[str, int] = {}
+        self._prefixes: List[Tuple[str, int]] = []
+        for route, ttl in route_ttls.items():
+            if route.endswith("*"):
+                self._prefixes.append((route[:-1], ttl))
+            else:
+                self._exact[route] = ttl
+        self._prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "not_modified": 0, "bypassed": 0, "uncacheable": 0}
+
+    def ttl_for(self, path: str) -> Optional[int]:
+        """路由的缓存TTL，不缓存时返回None"""
+        ttl = self._exact.get(path)
+        if ttl is not None:
+            return ttl
+        for prefix, ttl in self._prefixes:
+            if path.startswith(prefix):
+                return ttl
+        return None
+
+    @staticmethod
+    def make_key(path: str, query: str) -> str:
+        """缓存键：路径 + 按参数名排序的查询字符串（同名参数保持原有顺序）"""
+        params = parse_qsl(query, keep_blank_values=True)
+        params.sort(key=lambda item: item[0])
+        return f"{path}?{urlencode(params)}" if params else path
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse):
+        if len(entry.body) > self.max_body_bytes:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        ttl: int,
+        fetch: Callable[[], Awaitable[Tuple[int, List[Tuple[str, str]], bytes, bool]]]
+    ) -> Tuple[CachedResponse, bool]:
+        """读取缓存，未命中时调用 fetch 请求上游（相同键的并发请求共享一次 fetch）
+
+        fetch 返回 (状态码, 响应头, 响应体, 能否共享)，只缓存能共享的200响应；
+        不能共享的响应只返回给发起请求的客户端，并发等待者各自重新请求上游。
+
+        Returns:
+            (响应, 是否命中缓存)
+        """
+        entry = self.get(key)
+        if entry is not None:
+            self.stats["hits"] += 1
+            return entry, True
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            # 上游请求作为独立任务执行，发起请求的客户端断开时不影响其他等待者
+            task = asyncio.ensure_future(self._fetch(key, ttl, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._fetch_done(key, done))
+            return await asyncio.shield(task), False
+
+        self.stats["coalesced"] += 1
+        entry = await asyncio.shield(task)
+        if not entry.shareable:
+            entry = await self._fetch(None, ttl, fetch)
+        return entry, False
+
+    async def _fetch(self, key: Optional[str], ttl: int, fetch) -> CachedResponse:
+        status_code, headers, body, shareable = await fetch()
+        entry = CachedResponse(status_code, headers, body, make_etag(body), time.monotonic() + ttl, shareable)
+        if not shareable:
+            self.stats["uncacheable"] += 1
+        elif status_code == 200 and key is not None:
+            self.set(key, entry)
+        return entry
+
+    def _fetch_done(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # 等待者都已断开时避免 "exception was never retrieved" 警告
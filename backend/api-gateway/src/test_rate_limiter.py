@@ -0,0 +1,142 @@
+"""
+网关限流测试
+令牌桶Lua脚本在 fakeredis 中执行（需要 fakeredis 和 lupa），验证：
+1. 令牌消耗、按时间补充、拒绝时的等待时间和键过期时间
+2. 规则优先级（用户 > 路由前缀 > 默认）和独立的令牌桶
+3. 被拒绝后本地拒绝、Redis不可用时放行
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import redis.asyncio as aioredis
+
+from rate_limiter import TOKEN_BUCKET_SCRIPT, RateLimiter, RateLimitRule, parse_rules, retry_after_header
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestTokenBucketScript:
+    """令牌桶Lua脚本（时间由参数传入，结果可精确断言）"""
+
+    KEY = "rate_limit:test"
+
+    async def _call(self, client, capacity, rate, now):
+        script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        return await script(keys=[self.KEY], args=[capacity, repr(rate), now])
+
+    def test_consumes_until_empty(self):
+        async def scenario():
+            client = fakeredis.FakeAsyncRedis()
+            # 容量3，每秒补充3个
+            results = [await self._call(client, 3, 0.003, 1000) for _ in range(4)]
+            ttl = await client.pttl(self.KEY)
+            return results, ttl
+
+        results, ttl = run(scenario())
+        assert results[:3] == [[1, 2, 0], [1, 1, 0], [1, 0, 0]]
+        # 桶空时需等待 1/rate 毫秒（向上取整）
+        assert results[3] == [0, 0, 334]
+        # 键在桶补满所需时间后过期
+        assert 0 < ttl <= 1000
+
+    def test_refills_over_time(self):
+        async def scenario():
+            client = fakeredis.FakeAsyncRedis()
+            for _ in range(3):
+                await self._call(client, 3, 0.003, 1000)
+            early = await self._call(client, 3, 0.003, 1333)
+            on_time = await self._call(client, 3, 0.003, 1334)
+            full = [await self._call(client, 3, 0.003, 100000) for _ in range(4)]
+            return early, on_time, full
+
+        early, on_time, full = run(scenario())
+        assert early[0] == 0
+        assert on_time[0] == 1
+        # 补充不超过容量
+        assert [r[0] for r in full] == [1, 1, 1, 0]
+
+    def test_clock_skew_does_not_add_tokens(self):
+        """其他网关实例时钟落后时不会凭空补充令牌"""
+        async def scenario():
+            client = fakeredis.FakeAsyncRedis()
+            await self._call(client, 1, 0.001, 5000)
+            return await self._call(client, 1, 0.001, 4000)
+
+        assert run(scenario())[0] == 0
+
+
+class TestRateLimiter:
+    """限流器"""
+
+    def test_rejects_after_limit_and_blocks_locally(self):
+        async def scenario():
+            client = fakeredis.FakeAsyncRedis()
+            limiter = RateLimiter(RateLimitRule(2, 60))
+            results = [await limiter.check(client, "anonymous", "/api/v1/majors") for _ in range(5)]
+            return limiter, results
+
+        limiter, results = run(scenario())
+        assert [r.allowed for r in results] == [True, True, False, False, False]
+        assert [r.remaining for r in results[:2]] == [1, 0]
+        assert 29 < results[2].retry_after <= 30
+        assert retry_after_header(results[2]) == "30"
+        # 被拒绝后在本地拒绝，不再访问Redis
+        assert limiter.stats == {"allowed": 2, "rejected": 1, "rejected_local": 2, "errors": 0}
+
+    def test_rule_priority_and_separate_buckets(self):
+        limiter = RateLimiter(
+            RateLimitRule(100, 60),
+            route_rules=parse_rules('{"/api/v1/": [50, 60], "/api/v1/chat/": [2, 60]}'),
+            user_rules=parse_rules('{"user:vip": [10, 1]}'),
+        )
+        assert limiter.resolve("user:1", "/api/v1/chat/send") == ("rate_limit:user:1:/api/v1/chat/", RateLimitRule(2, 60))
+        assert limiter.resolve("user:1", "/api/v1/majors") == ("rate_limit:user:1:/api/v1/", RateLimitRule(50, 60))
+        assert limiter.resolve("user:1", "/health") == ("rate_limit:user:1:*", RateLimitRule(100, 60))
+        assert limiter.resolve("user:vip", "/api/v1/chat/send") == ("rate_limit:user:vip:/api/v1/chat/", RateLimitRule(10, 1))
+
+        async def scenario():
+            client = fakeredis.FakeAsyncRedis()
+            chat = [(await limiter.check(client, "user:1", "/api/v1/chat/send")).allowed for _ in range(3)]
+            other_user = (await limiter.check(client, "user:2", "/api/v1/chat/send")).allowed
+            other_route = (await limiter.check(client, "user:1", "/api/v1/majors")).allowed
+            return chat, other_user, other_route
+
+        assert run(scenario()) == ([True, True, False], True, True)
+
+    def test_allows_when_redis_unavailable(self):
+        class BrokenRedis:
+            def register_script(self, script):
+                async def call(keys, args):
+                    raise aioredis.ConnectionError("connection refused")
+                return call
+
+        async def scenario():
+            limiter = RateLimiter(RateLimitRule(1, 60))
+            results = [await limiter.check(BrokenRedis(), "anonymous", "/x") for _ in range(3)]
+            no_client = await limiter.check(None, "anonymous", "/x")
+            return limiter, results, no_client
+
+        limiter, results, no_client = run(scenario())
+        assert all(r.allowed for r in results) and no_client.allowed
+        assert limiter.stats["errors"] == 3
+
+    def test_zero_limit_disables_rule(self):
+        limiter = RateLimiter(RateLimitRule(0, 60))
+        assert run(limiter.check(None, "anonymous", "/x")).allowed
+
+    def test_invalid_rules_ignored(self):
+        assert parse_rules("not json") == {}
+        assert parse_rules('{"/api/": [5]}') == {}
+        assert parse_rules(None) == {}
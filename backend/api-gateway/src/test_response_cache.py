@@ -0,0 +1,235 @@
+"""
+网关响应缓存测试
+1. ResponseCache：路由TTL匹配、缓存键规范化、LRU与过期、并发未命中合并
+2. ETag/If-None-Match 协商缓存（304）
+3. 设置Cookie、Cache-Control: private / no-store 的响应和携带凭据的请求不走共享缓存
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main
+from response_cache import CachedResponse, ResponseCache, etag_matches, is_shareable, make_etag, parse_ttls
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def entry(body: bytes = b"{}", ttl: float = 60, shareable: bool = True) -> CachedResponse:
+    return CachedResponse(200, [("content-type", "application/json")], body, make_etag(body), time.monotonic() + ttl, shareable)
+
+
+class BodyStream(httpx.AsyncByteStream):
+    """上游响应体（透传路由按原始字节流转发，MockTransport 需提供可异步读取的流）"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    async def __aiter__(self):
+        yield self.body
+
+
+class TestResponseCache:
+    """缓存本身"""
+
+    def test_route_ttl_exact_then_longest_prefix(self):
+        cache = ResponseCache({"/api/v1/major/categories": 300, "/api/v1/major/*": 120, "/api/v1/major/market-data/*": 60})
+        assert cache.ttl_for("/api/v1/major/categories") == 300
+        assert cache.ttl_for("/api/v1/major/market-data/stats") == 60
+        assert cache.ttl_for("/api/v1/major/list") == 120
+        assert cache.ttl_for("/api/v1/user/profile") is None
+
+    def test_key_sorts_params_and_keeps_repeated_order(self):
+        assert ResponseCache.make_key("/a", "b=2&a=1&b=1") == "/a?a=1&b=2&b=1"
+        assert ResponseCache.make_key("/a", "a=1&b=2") == ResponseCache.make_key("/a", "b=2&a=1")
+        assert ResponseCache.make_key("/a", "") == "/a"
+
+    def test_lru_eviction_expiry_and_size_limit(self):
+        cache = ResponseCache({}, max_entries=2, max_body_bytes=10)
+        cache.set("a", entry(b"1"))
+        cache.set("b", entry(b"2"))
+        cache.get("a")
+        cache.set("c", entry(b"3"))
+        assert cache.get("b") is None and cache.get("a") is not None
+
+        cache.set("old", entry(b"4", ttl=-1))
+        assert cache.get("old") is None
+
+        cache.set("big", entry(b"x" * 11))
+        assert cache.get("big") is None
+
+    def test_concurrent_misses_share_one_fetch(self):
+        cache = ResponseCache({})
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 200, [], b'{"n": 1}', True
+
+        async def scenario():
+            results = await asyncio.gather(*[cache.get_or_fetch("k", 60, fetch) for _ in range(5)])
+            again = await cache.get_or_fetch("k", 60, fetch)
+            return results, again
+
+        results, again = run(scenario())
+        assert len(calls) == 1
+        assert [hit for _, hit in results] == [False] * 5
+        assert again[1] is True
+        assert cache.stats["misses"] == 1 and cache.stats["coalesced"] == 4 and cache.stats["hits"] == 1
+
+    def test_unshareable_response_not_cached_or_shared(self):
+        """不能共享的响应不缓存，并发等待者各自请求上游"""
+        cache = ResponseCache({})
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            body = str(len(calls)).encode()
+            await asyncio.sleep(0.01)
+            return 200, [], body, False
+
+        async def scenario():
+            results = await asyncio.gather(*[cache.get_or_fetch("k", 60, fetch) for _ in range(3)])
+            return sorted(e.body for e, _ in results)
+
+        assert run(scenario()) == [b"1", b"2", b"3"]
+        assert cache.get("k") is None
+        assert cache.stats["uncacheable"] == 3
+
+    def test_error_responses_not_cached(self):
+        cache = ResponseCache({})
+
+        async def fetch():
+            return 503, [], b"unavailable", True
+
+        run(cache.get_or_fetch("k", 60, fetch))
+        assert cache.get("k") is None
+
+    def test_failed_fetch_not_cached(self):
+        cache = ResponseCache({})
+
+        async def failing():
+            raise RuntimeError("upstream down")
+
+        async def ok():
+            return 200, [], b"ok", True
+
+        with pytest.raises(RuntimeError):
+            run(cache.get_or_fetch("k", 60, failing))
+        entry_, hit = run(cache.get_or_fetch("k", 60, ok))
+        assert entry_.body == b"ok" and not hit
+
+
+class TestETag:
+    """ETag 生成与 If-None-Match 比较"""
+
+    def test_etag_depends_on_body(self):
+        assert make_etag(b"a") == make_etag(b"a")
+        assert make_etag(b"a") != make_etag(b"b")
+        assert make_etag(b"a").startswith('"') and make_etag(b"a").endswith('"')
+
+    def test_if_none_match(self):
+        etag = make_etag(b"body")
+        assert etag_matches(etag, etag)
+        assert etag_matches(f"W/{etag}", etag)
+        assert etag_matches(f'"other", {etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
+        assert not etag_matches("", etag)
+
+
+class TestShareable:
+    def test_is_shareable(self):
+        assert is_shareable([("content-type", "application/json"), ("cache-control", "public, max-age=60")])
+        assert not is_shareable([("Set-Cookie", "session=1")])
+        assert not is_shareable([("Cache-Control", "private, max-age=60")])
+        assert not is_shareable([("cache-control", "No-Store")])
+        # no-cache 只要求重新验证，不影响共享
+        assert is_shareable([("cache-control", "no-cache")])
+
+    def test_parse_ttls(self):
+        assert parse_ttls('{"/api/v1/x": "30"}') == {"/api/v1/x": 30}
+        assert parse_ttls("[1, 2]") == {}
+        assert parse_ttls(None) == {}
+
+
+class TestCachedProxy:
+    """经网关代理的缓存路由（上游由 httpx.MockTransport 模拟）"""
+
+    PATH = "/api/v1/hot-news"
+
+    @pytest.fixture
+    def gateway(self, monkeypatch):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            kind = request.url.params.get("kind")
+            headers = {"content-type": "application/json"}
+            if kind == "cookie":
+                headers["set-cookie"] = "session=abc"
+            elif kind == "private":
+                headers["cache-control"] = "private, max-age=60"
+            return httpx.Response(200, headers=headers, stream=BodyStream(json.dumps({"n": len(calls)}).encode()))
+
+        upstream = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://upstream")
+        monkeypatch.setattr(main.upstreams, "get", lambda name: upstream)
+        main.response_cache.clear()
+        monkeypatch.setattr(main.response_cache, "stats", dict.fromkeys(main.response_cache.stats, 0))
+        return calls
+
+    def request(self, *requests):
+        async def scenario():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+                return [await client.get(url, headers=headers or {}) for url, headers in requests]
+        return run(scenario())
+
+    def test_etag_and_not_modified(self, gateway):
+        first, second = self.request((self.PATH, None), (f"{self.PATH}", None))
+        assert first.status_code == 200 and first.headers["x-cache"] == "MISS"
+        assert second.headers["x-cache"] == "HIT"
+        etag = first.headers["etag"]
+        assert etag == second.headers["etag"] == make_etag(first.content)
+        assert first.headers["cache-control"].startswith("public, max-age=")
+
+        (revalidated,) = self.request((self.PATH, {"If-None-Match": etag}))
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+
+        (changed,) = self.request((self.PATH, {"If-None-Match": '"stale"'}))
+        assert changed.status_code == 200 and changed.content == first.content
+        assert len(gateway) == 1
+        assert main.response_cache.stats["not_modified"] == 1
+        # 网关使用完整响应体计算ETag，不把客户端的条件请求头转发给上游
+        assert "if-none-match" not in gateway[0].headers
+
+    @pytest.mark.parametrize("kind", ["cookie", "private"])
+    def test_private_responses_not_cached(self, gateway, kind):
+        url = f"{self.PATH}?kind={kind}"
+        first, second = self.request((url, None), (url, None))
+        assert len(gateway) == 2
+        assert "etag" not in second.headers and "x-cache" not in second.headers
+        if kind == "cookie":
+            assert first.headers["set-cookie"] == "session=abc"
+
+    @pytest.mark.parametrize("headers", [{"Authorization": "Bearer token"}, {"Cookie": "session=abc"}])
+    def test_requests_with_credentials_bypass_cache(self, gateway, headers):
+        self.request((self.PATH, None))
+        (response,) = self.request((self.PATH, headers))
+        assert len(gateway) == 2
+        assert "x-cache" not in response.headers
+        assert main.response_cache.stats["bypassed"] == 1
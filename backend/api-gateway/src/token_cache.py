@@ -0,0 +1,76 @@
+"""
+已验证JWT缓存
+缓存验证通过的令牌及其声明，同一令牌在过期前不再重复验签；
+可选的吊销检查使用本地吊销列表（按 jti），由网关定期从Redis同步。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+
+class VerifiedTokenCache:
+    """有界LRU：令牌 → 声明，条目在令牌的 exp 时间过期
+
+    Args:
+        max_entries: 最多缓存的令牌数
+        default_ttl: 令牌没有 exp 声明时的缓存时间（秒）
+    """
+
+    def __init__(self, max_entries: int = 10000, default_ttl: int = 300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._revoked: Set[str] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """返回已验证令牌的声明，未缓存、已过期或已吊销时返回None"""
+        with self._lock:
+            entry = self._data.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time() or claims.get("jti") in self._revoked:
+                del self._data[token]
+                self.misses += 1
+                return None
+            self._data.move_to_end(token)
+            self.hits += 1
+            return claims
+
+    def set(self, token: str, claims: Dict[str, Any]):
+        """缓存验证通过的令牌（调用方保证已验签）"""
+        exp = claims.get("exp")
+        expires_at = float(exp) if isinstance(exp, (int, float)) else time.time() + self.default_ttl
+        with self._lock:
+            self._data[token] = (claims, expires_at)
+            self._data.move_to_end(token)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        return claims.get("jti") in self._revoked
+
+    def set_revoked(self, jtis: Iterable[str]):
+        """替换本地吊销列表（已缓存的吊销令牌在下次读取时移除）"""
+        self._revoked = set(jtis)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "revoked": len(self._revoked),
+        }
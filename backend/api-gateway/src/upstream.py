@@ -0,0 +1,100 @@
+"""
+上游服务HTTP客户端池
+每个上游服务一个长连接 httpx.AsyncClient，在应用生命周期内复用连接（keep-alive），
+并按服务配置超时与连接数上限，可选启用HTTP/2。
+"""
+
+import logging
+from typing import Dict, NamedTuple, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  httpx 的HTTP/2支持依赖 h2
+except ImportError:  # pragma: no cover - 可选依赖
+    h2 = None
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamConfig(NamedTuple):
+    """上游服务的连接配置（超时单位：秒）"""
+    connect_timeout: float = 2.0
+    read_timeout: float = 10.0
+    max_connections: int = 100
+    max_keepalive: int = 20
+    keepalive_expiry: float = 30.0
+    # 超过该耗时计为慢调用（熔断器统计）
+    slow_call_seconds: float = 5.0
+    # 幂等请求超过该时间未返回时发出对冲请求，None表示不对冲
+    hedge_after: Optional[float] = None
+    # 对冲请求的总延迟预算（到收到响应头为止），None表示只受超时限制
+    latency_budget: Optional[float] = None
+
+
+class UpstreamClients:
+    """按服务名管理的上游客户端
+
+    Args:
+        service_urls: {服务名: 基础URL}
+        configs: {服务名: UpstreamConfig}，未配置的服务使用 default_config
+        http2: 是否启用HTTP/2（需要安装 h2，未安装时回退到HTTP/1.1）
+    """
+
+    def __init__(
+        self,
+        service_urls: Dict[str, str],
+        configs: Optional[Dict[str, UpstreamConfig]] = None,
+        default_config: UpstreamConfig = UpstreamConfig(),
+        http2: bool = False
+    ):
+        self.service_urls = dict(service_urls)
+        self.configs = dict(configs or {})
+        self.default_config = default_config
+        if http2 and h2 is None:
+            logger.warning("未安装 h2，上游连接使用HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def config_for(self, service_name: str) -> UpstreamConfig:
+        return self.configs.get(service_name, self.default_config)
+
+    def _create_client(self, service_name: str) -> httpx.AsyncClient:
+        config = self.config_for(service_name)
+        return httpx.AsyncClient(
+            base_url=self.service_urls[service_name],
+            http2=self.http2,
+            timeout=httpx.Timeout(
+                config.read_timeout,
+                connect=config.connect_timeout,
+                pool=config.connect_timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive,
+                keepalive_expiry=config.keepalive_expiry
+            ),
+        )
+
+    def start(self):
+        """为所有服务创建客户端（在应用启动时调用）"""
+        for service_name in self.service_urls:
+            if service_name not in self._clients:
+                self._clients[service_name] = self._create_client(service_name)
+
+    def get(self, service_name: str) -> httpx.AsyncClient:
+        """获取服务的客户端，未知服务抛出 KeyError"""
+        client = self._clients.get(service_name)
+        if client is None:
+            if service_name not in self.service_urls:
+                raise KeyError(service_name)
+            # 未经 start() 创建（如测试中未触发生命周期）时按需创建
+            client = self._clients[service_name] = self._create_client(service_name)
+        return client
+
+    async def aclose(self):
+        """关闭所有客户端（在应用关闭时调用）"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+缓存编解码基准测试
+使用真实数据（market_data.db 行情数据、major_concept_data.json 专业概念数据）
+比较各序列化/压缩组合的体积与编解码耗时
+
+用法: python benchmark_cache_codec.py [--repeat 200]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from services.cache_codec import CacheCodec, SERIALIZERS, COMPRESSIONS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_payloads() -> Dict[str, Any]:
+    """加载真实缓存载荷（与 data_router 缓存的列表响应结构一致）"""
+    payloads = {}
+
+    db_path = os.path.join(BASE_DIR, "market_data.db")
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        rows = [dict(r) for r in conn.execute(
+            "SELECT * FROM major_market_data ORDER BY heat_index DESC, id DESC"
+        ).fetchall()]
+        conn.close()
+        for size in (20, 100):
+            payloads[f"market-data 列表({size}条)"] = {
+                "data": rows[:size], "total": len(rows), "page": 1, "page_size": size
+            }
+        payloads[f"market-data 全量({len(rows)}条)"] = {"data": rows, "total": len(rows)}
+
+    concept_path = os.path.join(BASE_DIR, "major_concept_data.json")
+    if os.path.exists(concept_path):
+        with open(concept_path, encoding="utf-8") as f:
+            payloads["专业概念数据"] = json.load(f)
+
+    return payloads
+
+
+def bench(codec: CacheCodec, payload: Any, repeat: int) -> Tuple[int, float, float]:
+    """返回 (字节数, 平均编码耗时us, 平均解码耗时us)"""
+    encoded = codec.encode(payload)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        codec.encode(payload)
+    encode_us = (time.perf_counter() - started) / repeat * 1e6
+    started = time.perf_counter()
+    for _ in range(repeat):
+        codec.decode(encoded)
+    decode_us = (time.perf_counter() - started) / repeat * 1e6
+    return len(encoded), encode_us, decode_us
+
+
+def legacy_bench(payload: Any, repeat: int) -> Tuple[int, float, float]:
+    """旧实现：json文本（decode_responses=True 时的字符串往返）"""
+    text = json.dumps(payload, ensure_ascii=False, default=str)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    encode_us = (time.perf_counter() - started) / repeat * 1e6
+    raw = text.encode("utf-8")
+    started = time.perf_counter()
+    for _ in range(repeat):
+        json.loads(raw.decode("utf-8"))
+    decode_us = (time.perf_counter() - started) / repeat * 1e6
+    return len(raw), encode_us, decode_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="缓存编解码基准测试")
+    parser.add_argument("--repeat", type=int, default=200, help="每个组合的重复次数")
+    args = parser.parse_args()
+
+    payloads = load_payloads()
+    if not payloads:
+        print("未找到测试数据（market_data.db / major_concept_data.json）")
+        return
+
+    codecs: List[Tuple[str, CacheCodec]] = []
+    for serializer in SERIALIZERS:
+        for compression in COMPRESSIONS:
+            codec = CacheCodec(serializer, compression)
+            name = f"{codec.serializer}+{codec.compression}"
+            if name not in [n for n, _ in codecs]:
+                codecs.append((name, codec))
+
+    for title, payload in payloads.items():
+        base_size, base_enc, base_dec = legacy_bench(payload, args.repeat)
+        print(f"\n== {title} ==")
+        print(f"{'编解码':<16}{'字节数':>10}{'体积比':>8}{'编码us':>10}{'解码us':>10}")
+        print(f"{'旧版json文本':<14}{base_size:>10}{1:>8.2f}{base_enc:>10.1f}{base_dec:>10.1f}")
+        for name, codec in codecs:
+            size, enc, dec = bench(codec, payload, args.repeat)
+            print(f"{name:<16}{size:>10}{size / base_size:>8.2f}{enc:>10.1f}{dec:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
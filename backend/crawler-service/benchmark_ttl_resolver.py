@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+缓存TTL解析微基准
+比较逐条遍历 TTL_CONFIG 的旧实现与编译后的最长前缀解析器
+
+用法: python benchmark_ttl_resolver.py [--rounds 200000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from services.ttl_resolver import TTLResolver
+from services.config_loader import CrawlerConfig
+
+# 与 RedisCacheService.TTL_CONFIG 保持一致（避免导入redis依赖）
+TTL_CONFIG = {
+    "categories:all": 86400,
+    "categories:*": 86400,
+    "majors:list:*": 43200,
+    "majors:*": 21600,
+    "universities:list:*": 43200,
+    "universities:*": 21600,
+    "admission:*": 86400,
+    "market-data:*": 43200,
+    "trends:*": 43200,
+    "videos:*": 86400,
+    "crawl-history:*": 3600,
+    "quota:*": 3600,
+    "crawl-task:*": 86400,
+}
+
+DATA_SOURCE_CACHE_PREFIXES = {
+    "major_categories": "categories:",
+    "majors": "majors:",
+    "major_market_data": "market-data:",
+    "universities": "universities:",
+    "university_admission_scores": "admission:",
+    "industry_trends": "trends:",
+    "hot_news": "hot-news:",
+    "video_content": "videos:",
+    "crawl_history": "crawl-history:",
+    "crawl_quota": "quota:",
+}
+
+# data_router 实际使用的缓存键
+SAMPLE_KEYS = [
+    "categories:all", "majors:list:all:1", "majors:list:12:3", "majors:42",
+    "market-data:all:1:20", "market-data:工学:2:20", "universities:all:all:1:20",
+    "universities:北京:985:1:20", "universities:17", "quota:status",
+    "admission:5:2024", "crawl-task:abc", "unknown:key",
+]
+
+
+def legacy_get_ttl(key: str) -> int:
+    """旧实现：按字典顺序逐条比较"""
+    if key in TTL_CONFIG:
+        return TTL_CONFIG[key]
+    for pattern, ttl in TTL_CONFIG.items():
+        if pattern.endswith('*'):
+            prefix = pattern[:-1]
+            if key.startswith(prefix):
+                return ttl
+    return 3600
+
+
+def timed(fn, rounds: int) -> float:
+    """返回每次调用的平均耗时（纳秒）"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for key in SAMPLE_KEYS:
+            fn(key)
+    return (time.perf_counter() - started) / (rounds * len(SAMPLE_KEYS)) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="缓存TTL解析微基准")
+    parser.add_argument("--rounds", type=int, default=200000, help="遍历样本键的轮数")
+    args = parser.parse_args()
+
+    compiled = TTLResolver(TTL_CONFIG)
+    uncached = TTLResolver(TTL_CONFIG, memo_size=0)
+    mismatched = [k for k in SAMPLE_KEYS if compiled.resolve(k) != legacy_get_ttl(k)]
+    print(f"与旧实现结果一致: {not mismatched} {mismatched or ''}")
+
+    print(f"旧实现(遍历)        {timed(legacy_get_ttl, args.rounds):8.1f} ns/次")
+    print(f"编译前缀表(无缓存)  {timed(uncached.resolve, args.rounds):8.1f} ns/次")
+    print(f"编译前缀表(缓存)    {timed(compiled.resolve, args.rounds):8.1f} ns/次")
+
+    with_config = TTLResolver.from_config(TTL_CONFIG, DATA_SOURCE_CACHE_PREFIXES, CrawlerConfig())
+    print("\n合并 crawler_config.json 后的TTL:")
+    for key in SAMPLE_KEYS:
+        print(f"  {key:<28}{with_config.resolve(key):>8}")
+
+
+if __name__ == "__main__":
+    main()
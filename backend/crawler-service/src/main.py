@@ -11,30 +11,37 @@ import os
 import sys
 import logging
 import asyncio
-import sqlite3
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 from datetime import datetime
-import uuid
 
 # 添加当前目录到Python路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
 from services.data_manager import MajorDataManager
-from services.crawler import MajorDataCrawler
 from services.config_loader import get_crawler_config, CrawlerConfig
-from routers.data_router import router as data_router
+from services.crawl_queue import CrawlQueue
+from services.crawl_worker import CrawlJobRunner, CrawlWorkerPool, enqueue_crawl, ALL_SOURCES, MANUAL_PRIORITY
+from services.crawl_planner import plan_crawl, enqueue_plan
+from services.fetch_scheduler import get_fetch_scheduler
+from services.university_index import UniversityIndex, ANY_PROVINCE
+from shared.utils.major_graph import get_major_graph
+from services.university_scoring import UniversityScoringEngine
+from services.db_pool import get_db_pool
+from routers.data_router import router as data_router, cache_service as data_cache_service
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 data_manager = MajorDataManager()
-crawler = MajorDataCrawler()
-crawl_tasks = {}
+# 爬取任务队列（SQLite持久化），由工作池在独立线程或独立进程（CRAWL_WORKER_MODE=external）中执行
+crawl_queue = CrawlQueue()
+crawl_worker_pool: Optional[CrawlWorkerPool] = None
 
 # 加载配置
 crawler_config: Optional[CrawlerConfig] = None
@@ -46,12 +53,17 @@ CORS_HEADERS = {
 }
 
 
-async def run_startup_crawl_tasks(force_re_crawl: bool = False):
+async def run_startup_crawl_tasks(force_re_crawl: bool = False) -> List[str]:
     """
-    执行启动时的爬虫任务
+    将启动时的爬虫任务按依赖图加入队列（由工作池按优先级并行执行，不阻塞服务启动）
+    
+    使用相同抓取器的数据源合并为一个任务，depends_on 配置转换为任务依赖。
     
     Args:
         force_re_crawl: 是否强制重爬所有数据
+    
+    Returns:
+        入队的任务ID列表（同一抓取器已在排队或执行时返回已有任务ID）
     """
     global crawler_config
     
@@ -64,56 +76,26 @@ async def run_startup_crawl_tasks(force_re_crawl: bool = False):
     
     logger.info(f"服务启动: force_re_crawl={should_force_crawl}, config_force_re_crawl={config_force_re_crawl}")
     
-    if should_force_crawl:
-        logger.info("执行启动时强制全量爬取...")
-        
-        # 获取所有启用的数据源
-        schedule_tasks = crawler_config.get_schedule_tasks()
-        
-        for task in schedule_tasks:
-            task_key = task["task_key"]
-            logger.info(f"正在爬取: {task_key} - {task.get('description', '')}")
-            
-            try:
-                # 创建爬取任务
-                task_id = str(uuid.uuid4())
-                crawl_tasks[task_id] = {
-                    "status": "running",
-                    "task_type": task_key,
-                    "started_at": datetime.utcnow().isoformat(),
-                    "crawl_mode": "full" if should_force_crawl else "incremental",
-                    "records_crawled": 0,
-                    "records_saved": 0,
-                    "error_message": None
-                }
-                
-                # 执行爬取（这里是模拟，实际应该调用真正的爬虫）
-                new_data = await crawler.crawl_all_sources()
-                
-                if new_data:
-                    crawl_tasks[task_id]["records_crawled"] = len(new_data)
-                    saved_count = data_manager.save_crawled_data(new_data)
-                    crawl_tasks[task_id]["records_saved"] = saved_count
-                
-                crawl_tasks[task_id]["status"] = "completed"
-                crawl_tasks[task_id]["completed_at"] = datetime.utcnow().isoformat()
-                
-                logger.info(f"完成爬取 {task_key}: 获取{len(new_data) if new_data else 0}条数据")
-                
-            except Exception as e:
-                logger.error(f"爬取 {task_key} 失败: {e}")
-                if task_id in crawl_tasks:
-                    crawl_tasks[task_id]["status"] = "failed"
-                    crawl_tasks[task_id]["error_message"] = str(e)
-        
-        logger.info("启动时强制爬取任务完成")
-    else:
+    if not should_force_crawl:
         logger.info("跳过启动时爬取，将按配置周期执行")
+        return []
+    
+    logger.info("执行启动时强制全量爬取...")
+    
+    # 获取所有启用的数据源，按抓取器合并并排序
+    plan = plan_crawl(crawler_config.get_schedule_tasks())
+    job_ids = await run_in_threadpool(enqueue_plan, crawl_queue, crawler_config, plan, True)
+    
+    for planned in plan:
+        depends = f"，依赖 {', '.join(planned.depends_on)}" if planned.depends_on else ""
+        logger.info(f"爬取任务已入队: {planned.fetcher} ({', '.join(planned.data_types)}{depends}) - {job_ids[planned.fetcher]}")
+    
+    return [job_ids[planned.fetcher] for planned in plan]
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global crawler_config
+    global crawler_config, crawl_worker_pool
     
     logger.info("=" * 50)
     logger.info("爬虫服务启动中...")
@@ -137,7 +119,18 @@ async def lifespan(app: FastAPI):
     check_interval = scheduler_config.get("check_interval_seconds", 3600)
     logger.info(f"调度检查间隔: {check_interval}秒")
     
-    # 执行启动时的爬虫任务
+    # 初始化PostgreSQL连接池（失败不阻塞启动，之后的查询按退避间隔重试）
+    try:
+        await get_db_pool().open()
+    except Exception as e:
+        logger.warning(f"PostgreSQL连接池初始化失败: {e}")
+    
+    # 启动爬取工作池（独立线程和事件循环，不占用API请求处理）
+    if os.getenv("CRAWL_WORKER_MODE", "thread") != "external":
+        crawl_worker_pool = CrawlWorkerPool.from_config(crawl_queue, CrawlJobRunner(data_manager), crawler_config)
+        crawl_worker_pool.start()
+    
+    # 启动时的爬虫任务加入队列
     await run_startup_crawl_tasks()
     
     logger.info("爬虫服务启动完成")
@@ -145,6 +138,11 @@ async def lifespan(app: FastAPI):
     
     yield
     
+    if crawl_worker_pool is not None:
+        await run_in_threadpool(crawl_worker_pool.stop)
+    await get_db_pool().close()
+    await data_cache_service.aclose()
+    data_manager.close()
     logger.info("爬虫服务关闭")
 
 
@@ -196,7 +194,8 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "crawler-service",
-        "version": "1.1.0"
+        "version": "1.1.0",
+        "db_pool": get_db_pool().get_stats()
     }
 
 
@@ -257,6 +256,7 @@ async def reload_config():
     
     try:
         crawler_config = CrawlerConfig()
+        data_cache_service.reload_ttl_config(crawler_config)
         return {
             "status": "success",
             "message": "配置已重新加载",
@@ -268,7 +268,7 @@ async def reload_config():
 
 
 @app.post("/api/v1/admin/config/force-re-crawl")
-async def trigger_force_crawl(background_tasks: BackgroundTasks):
+async def trigger_force_crawl():
     """
     触发强制全量爬取（管理员接口）
     
@@ -277,23 +277,16 @@ async def trigger_force_crawl(background_tasks: BackgroundTasks):
     2. 根据source_url覆盖已有记录
     3. 重置所有学科配额使用计数
     4. 记录操作日志，标记为全量爬取
+    
+    每个启用的数据源入队一个任务，按配置优先级执行
     """
-    task_id = str(uuid.uuid4())
-    crawl_tasks[task_id] = {
-        "status": "running",
-        "task_type": "full",
-        "started_at": datetime.utcnow().isoformat(),
-        "crawl_mode": "full",
-        "records_crawled": 0,
-        "records_saved": 0,
-        "error_message": None
-    }
-    background_tasks.add_task(run_startup_crawl_tasks, force_re_crawl=True)
+    task_ids = await run_startup_crawl_tasks(force_re_crawl=True)
     
     return {
-        "task_id": task_id,
-        "status": "started",
-        "message": "全量爬取任务已启动",
+        "task_id": task_ids[0] if task_ids else None,
+        "task_ids": task_ids,
+        "status": "queued",
+        "message": "全量爬取任务已加入队列",
         "crawl_mode": "full"
     }
 
@@ -382,6 +375,7 @@ async def root():
             "触发爬取": "POST /api/v1/crawler/crawl",
             "全量爬取": "POST /api/v1/admin/crawler/full-crawl",
             "爬取状态": "GET /api/v1/crawler/status/{task_id}",
+            "爬取队列": "GET /api/v1/crawler/queue",
             "配置信息": "GET /api/v1/admin/config",
             "行情数据": "GET /api/v1/major/market-data",
             "学科分类": "GET /api/v1/major/categories"
@@ -389,46 +383,41 @@ async def root():
     }
 
 @app.post("/api/v1/crawler/crawl")
-async def trigger_crawl(request: CrawlRequest, background_tasks: BackgroundTasks):
-    task_id = str(uuid.uuid4())
-    crawl_tasks[task_id] = {
-        "status": "running",
-        "started_at": datetime.utcnow().isoformat(),
-        "records_crawled": 0,
-        "records_saved": 0,
-        "error_message": None
-    }
-    background_tasks.add_task(run_crawl_task, task_id, request.force)
+async def trigger_crawl(request: CrawlRequest):
+    global crawler_config
+    
+    if crawler_config is None:
+        crawler_config = get_crawler_config()
+    
+    task_id = await run_in_threadpool(
+        enqueue_crawl, crawl_queue, crawler_config, ALL_SOURCES, force=request.force, priority=MANUAL_PRIORITY
+    )
     return CrawlResponse(
         task_id=task_id,
-        status="started",
-        message="爬虫任务已启动"
+        status="queued",
+        message="爬虫任务已加入队列"
     )
 
-async def run_crawl_task(task_id: str, force: bool = False):
-    try:
-        logger.info(f"开始执行爬虫任务: {task_id}")
-        new_data = await crawler.crawl_all_sources()
-        if not new_data:
-            crawl_tasks[task_id]["status"] = "completed"
-            crawl_tasks[task_id]["message"] = "未获取到新数据"
-            return
-        crawl_tasks[task_id]["records_crawled"] = len(new_data)
-        saved_count = data_manager.save_crawled_data(new_data)
-        crawl_tasks[task_id]["records_saved"] = saved_count
-        crawl_tasks[task_id]["status"] = "completed"
-        crawl_tasks[task_id]["completed_at"] = datetime.utcnow().isoformat()
-        logger.info(f"爬虫任务完成: 获取{len(new_data)}条，保存{saved_count}条")
-    except Exception as e:
-        logger.error(f"爬虫任务失败: {e}")
-        crawl_tasks[task_id]["status"] = "failed"
-        crawl_tasks[task_id]["error_message"] = str(e)
-
 @app.get("/api/v1/crawler/status/{task_id}")
 async def get_crawl_status(task_id: str):
-    if task_id not in crawl_tasks:
+    job = await run_in_threadpool(crawl_queue.get, task_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="任务不存在")
-    return crawl_tasks[task_id]
+    return job
+
+@app.get("/api/v1/crawler/jobs")
+async def list_crawl_jobs(status: Optional[str] = None, task_type: Optional[str] = None, limit: int = 50):
+    """爬取任务列表（按创建时间倒序）"""
+    jobs = await run_in_threadpool(crawl_queue.list_jobs, status, task_type, min(max(limit, 1), 500))
+    return {"jobs": jobs, "total": len(jobs)}
+
+@app.get("/api/v1/crawler/queue")
+async def get_crawl_queue_stats():
+    """爬取队列、工作池与各主机抓取速率状态"""
+    stats = await run_in_threadpool(crawl_queue.get_stats)
+    stats["worker_pool"] = crawl_worker_pool.get_stats() if crawl_worker_pool is not None else None
+    stats["hosts"] = get_fetch_scheduler().get_stats()
+    return stats
 
 @app.get("/api/v1/crawler/quota")
 async def get_quota_status():
@@ -453,19 +442,31 @@ async def get_market_data(
     page_size: int = 20,
     category: Optional[str] = None,
     sort_by: str = "heat_index",
-    order: str = "desc"
+    order: str = "desc",
+    cursor: Optional[str] = None,
+    total_mode: str = "exact"
 ):
+    """获取行情数据
+
+    深分页时使用上一页返回的 next_cursor 代替 page；
+    total_mode 可选 exact / estimate / none，none 时不返回总数。
+    """
     try:
-        data, total = data_manager.get_market_data(
-            page=page, page_size=page_size, category=category, sort_by=sort_by, order=order
+        result = data_manager.get_market_data_page(
+            page=page, page_size=page_size, category=category, sort_by=sort_by, order=order,
+            cursor=cursor, total_mode=total_mode
         )
+        total = result["total"]
         return MarketDataListResponse(
-            data=data,
+            data=result["data"],
             pagination={
-                "page": page, "page_size": page_size, "total": total,
-                "total_pages": (total + page_size - 1) // page_size
+                "page": None if cursor else page, "page_size": page_size, "total": total,
+                "total_pages": (total + page_size - 1) // page_size if total is not None else None,
+                "next_cursor": result["next_cursor"]
             }
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取行情数据失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -475,31 +476,7 @@ async def get_market_stats():
     try:
         from services.quota_manager import quota_manager
         
-        conn = data_manager._get_conn()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        stats = {}
-        
-        cursor.execute("SELECT COUNT(*) as total FROM major_market_data")
-        stats["total"] = cursor.fetchone()["total"]
-        
-        cursor.execute('''
-            SELECT category, COUNT(*) as count
-            FROM major_market_data
-            GROUP BY category
-            ORDER BY count DESC
-        ''')
-        stats["by_category"] = [
-            {"category": row["category"], "count": row["count"]}
-            for row in cursor.fetchall()
-        ]
-        
-        cursor.execute("SELECT MAX(crawled_at) as last_crawl FROM major_market_data")
-        stats["last_crawl"] = cursor.fetchone()["last_crawl"]
-        
-        conn.close()
-        
+        stats = data_manager.get_stats()
         stats["quota_status"] = quota_manager.get_quota_status()
         
         return stats
@@ -544,8 +521,19 @@ class UniversityResponse(BaseModel):
 class UniversityDataService:
     """大学数据服务 - 提供真实大学数据"""
     
+    # 专业关联（王牌专业映射、专业大类）见 config/major_relatedness.json
+    
     def __init__(self):
         self.universities = self._generate_real_university_data()
+        self.major_graph = get_major_graph()
+        self.index = UniversityIndex(self.universities)
+        self.scoring = UniversityScoringEngine(self.index, self.major_graph)
+    
+    def reload(self, universities: Optional[List[dict]] = None):
+        """数据变更后替换大学数据并重建索引"""
+        self.universities = universities if universities is not None else self._generate_real_university_data()
+        self.index = UniversityIndex(self.universities)
+        self.scoring = UniversityScoringEngine(self.index, self.major_graph)
     
     def _generate_real_university_data(self) -> List[dict]:
         """生成真实大学数据（包含历年录取分数线）"""
@@ -1554,38 +1542,27 @@ class UniversityDataService:
     ) -> dict:
         """获取大学列表（支持筛选）"""
         
-        result = self.universities.copy()
-        
-        # 按省份筛选
-        if province:
-            result = [u for u in result if u["province"] == province]
-        
-        # 按层级筛选
-        if level:
-            result = [u for u in result if level in u["level"]]
+        # 按省份、层次、专业（王牌专业）筛选，直接走索引
+        result = self.index.filter_ids(province=province, level=level, major=major)
         
         # 按分数筛选（根据最新年份）
         if min_score is not None or max_score is not None:
+            score_provinces = (province, "山西") if province else ("山西",)
             filtered = []
-            for u in result:
-                scores = [s for s in u["admission_scores"] if s["province"] == province or s["province"] == "山西"]
-                if scores:
-                    latest = scores[0]  # 最新年份
+            for uid in result:
+                latest = self.index.first_score_among(uid, score_provinces)
+                if latest:
                     if min_score is not None and latest["min_score"] < min_score:
                         continue
                     if max_score is not None and latest["min_score"] > max_score:
                         continue
-                filtered.append(u)
+                filtered.append(uid)
             result = filtered
         
-        # 按专业筛选（通过王牌专业）
-        if major:
-            result = [u for u in result if major in u.get("major_strengths", [])]
-        
         total = len(result)
         start = (page - 1) * page_size
         end = start + page_size
-        paginated = result[start:end]
+        paginated = self.index.records(result[start:end])
         
         return {
             "universities": paginated,
@@ -1596,10 +1573,7 @@ class UniversityDataService:
     
     def get_university_by_id(self, university_id: int) -> dict:
         """根据ID获取大学详情"""
-        for u in self.universities:
-            if u["id"] == university_id:
-                return u
-        return None
+        return self.index.get(university_id)
     
     def get_recommended_universities(
         self,
@@ -1618,331 +1592,196 @@ class UniversityDataService:
         4. 都没有：按专业推荐，知名度从高到低
         """
         
-        # 专业与大学王牌专业的映射
-        major_to_strengths = {
-            '计算机科学与技术': ['计算机科学与技术', '软件工程', '人工智能', '电子信息工程', '数据科学与大数据技术'],
-            '人工智能': ['人工智能', '计算机科学与技术', '自动化', '电子信息工程'],
-            '软件工程': ['软件工程', '计算机科学与技术', '电子信息工程'],
-            '电子信息工程': ['电子信息工程', '通信工程', '自动化', '电气工程'],
-            '自动化': ['自动化', '电气工程', '计算机科学与技术', '机械工程'],
-            '机械工程': ['机械工程', '材料科学与工程', '车辆工程', '航空航天工程'],
-            '航空航天工程': ['航空航天工程', '机械工程', '材料科学与工程', '仪器科学与技术'],
-            '数学': ['数学', '统计学', '计算机科学与技术', '物理学'],
-            '物理学': ['物理学', '电子信息工程', '材料科学与工程', '计算机科学与技术'],
-            '化学': ['化学', '材料科学与工程', '药学', '化学工程与技术'],
-            '数据科学与大数据技术': ['数据科学与大数据技术', '计算机科学与技术', '统计学'],
-            '统计学': ['统计学', '数学', '数据科学与大数据技术', '金融学'],
-            '临床医学': ['临床医学', '基础医学', '口腔医学', '公共卫生与预防医学'],
-            '口腔医学': ['口腔医学', '临床医学', '基础医学'],
-            '护理学': ['护理学', '临床医学', '基础医学'],
-            '药学': ['药学', '化学', '临床医学', '生物医学工程'],
-            '法学': ['法学', '知识产权', '社会学', '政治学与行政学'],
-            '社会学': ['社会学', '社会工作', '法学', '政治学与行政学'],
-            '社会工作': ['社会工作', '社会学', '法学'],
-            '金融学': ['金融学', '经济学', '统计学', '工商管理', '会计学'],
-            '经济学': ['经济学', '金融学', '统计学', '国际经济与贸易'],
-            '会计学': ['会计学', '工商管理', '金融学', '财务管理'],
-            '工商管理': ['工商管理', '会计学', '财务管理', '人力资源管理'],
-            '市场营销': ['工商管理', '市场营销', '电子商务', '经济学'],
-            '财务管理': ['财务管理', '会计学', '工商管理', '金融学'],
-            '英语': ['英语', '翻译', '日语', '法语'],
-            '汉语言文学': ['汉语言文学', '新闻学', '广告学', '编辑出版学'],
-            '新闻学': ['新闻学', '广告学', '传播学', '编辑出版学'],
-            '教育学': ['教育学', '学前教育', '小学教育', '体育教育'],
-            '学前教育': ['学前教育', '教育学', '小学教育'],
-            '体育教育': ['体育教育', '运动训练', '社会体育', '教育学'],
-            '设计学': ['设计学', '美术学', '艺术设计', '视觉传达'],
-            '音乐学': ['音乐学', '作曲与作曲技术理论', '舞蹈学', '戏剧与影视学'],
-            '心理学': ['心理学', '应用心理学', '教育学', '社会学'],
-            '建筑学': ['建筑学', '城乡规划', '土木工程', '风景园林'],
-            '土木工程': ['土木工程', '建筑学', '工程管理', '水利工程'],
-        }
+        related_strengths = self.major_graph.related(major)
+        index = self.index
+        engine = self.scoring
         
-        related_strengths = major_to_strengths.get(major, [])
+        def major_score_of(uid: int) -> int:
+            return engine.match_score(major, uid)
         
-        def get_major_match_score(university: dict) -> float:
-            """计算大学与专业的匹配度（0-100分）"""
-            if not major or not related_strengths:
-                return 0
-            
-            university_strengths = university.get('major_strengths', [])
-            matched = set(university_strengths) & set(related_strengths)
-            match_count = len(matched)
-            
-            if match_count >= 2:
-                return 100
-            elif match_count == 1:
-                return 60
-            else:
-                category_mapping = {
-                    '工学': ['机械工程', '材料科学与工程', '电气工程', '计算机科学与技术'],
-                    '理学': ['数学', '物理学', '化学', '统计学'],
-                    '医学': ['临床医学', '口腔医学', '护理学', '药学'],
-                    '法学': ['法学', '社会学', '政治学', '哲学', '社会工作'],
-                    '经济学': ['金融学', '经济学', '工商管理', '会计学'],
-                    '文学': ['英语', '汉语言文学', '新闻学'],
-                    '教育学': ['教育学', '学前教育', '体育教育'],
-                }
-                
-                for category, strengths in category_mapping.items():
-                    if any(s in related_strengths for s in strengths):
-                        if any(s in university_strengths for s in strengths):
-                            return 30
-                
-                return 0
+        def province_min_score(uid: int) -> int:
+            return index.score_for_province(uid, province)["min_score"]
         
         result = []
         shown_ids = set()
         
-        # 获取某大学在指定省份的录取分数
-        def get_score_for_province(university, target_province):
-            if not university.get('admission_scores'):
-                return None
-            for s in university['admission_scores']:
-                if s['province'] == target_province:
-                    return s
-            return None
-        
         # ==================== 场景1: 省份+分数+专业 ====================
         if province and score and score > 0 and major and related_strengths:
             # 1.1 该省符合分数和专业的大学
-            group = []
-            for u in self.universities:
-                if u["id"] in shown_ids:
-                    continue
-                major_score = get_major_match_score(u)
-                if major_score == 0:
-                    continue
-                
-                latest = get_score_for_province(u, province)
-                if not latest:
-                    continue
-                
-                score_val = latest["min_score"]
-                if score - 30 <= score_val <= score + 30:
-                    group.append({
+            candidates = [
+                uid for uid in index.ids_in_score_window(province, score - 30, score + 30)
+                if major_score_of(uid) > 0
+            ]
+            top = engine.top_k(candidates, lambda uid: (major_score_of(uid), province_min_score(uid)), 5)
+            for uid in top:
+                u = index.get(uid)
+                latest = index.score_for_province(uid, province)
+                result.append({
+                    **u,
+                    "match_type": "score",
+                    "match_reason": f"本省{province}高校，录取分{int(latest['min_score'])}分，与您分数({score}分)匹配，{major}专业实力强",
+                    "latest_score": latest,
+                    "major_match_score": major_score_of(uid)
+                })
+            shown_ids.update(top)
+            
+            # 1.2 全国符合分数和专业的大学（排除已显示的）
+            if len(candidates) < 5:
+                candidates2 = [
+                    uid for uid in index.ids_in_score_window(ANY_PROVINCE, score - 30, score + 30)
+                    if major_score_of(uid) > 0
+                ]
+                top2 = engine.top_k(
+                    candidates2,
+                    lambda uid: (major_score_of(uid), engine.latest_min_score(uid)),
+                    5 - len(candidates),
+                    exclude=shown_ids
+                )
+                for uid in top2:
+                    u = index.get(uid)
+                    latest = u["admission_scores"][0]
+                    result.append({
                         **u,
                         "match_type": "score",
-                        "match_reason": f"本省{province}高校，录取分{int(score_val)}分，与您分数({score}分)匹配，{major}专业实力强",
+                        "match_reason": f"录取分{int(latest['min_score'])}分，与您分数({score}分)匹配，{major}专业实力强",
                         "latest_score": latest,
-                        "major_match_score": major_score
+                        "major_match_score": major_score_of(uid)
                     })
-            
-            group.sort(key=lambda x: (x["major_match_score"], x["latest_score"]["min_score"]), reverse=True)
-            result.extend(group[:5])
-            shown_ids.update([u["id"] for u in group[:5]])
-            
-            # 1.2 全国符合分数和专业的大学（排除已显示的）
-            if len(group) < 5:
-                group2 = []
-                for u in self.universities:
-                    if u["id"] in shown_ids:
-                        continue
-                    major_score = get_major_match_score(u)
-                    if major_score == 0:
-                        continue
-                    
-                    # 获取任意省份的分数
-                    latest = u["admission_scores"][0] if u.get("admission_scores") else None
-                    if not latest:
-                        continue
-                    
-                    score_val = latest["min_score"]
-                    if score - 30 <= score_val <= score + 30:
-                        group2.append({
-                            **u,
-                            "match_type": "score",
-                            "match_reason": f"录取分{int(score_val)}分，与您分数({score}分)匹配，{major}专业实力强",
-                            "latest_score": latest,
-                            "major_match_score": major_score
-                        })
-                
-                group2.sort(key=lambda x: (x["major_match_score"], x["latest_score"]["min_score"]), reverse=True)
-                group2 = group2[:(5 - len(group))]
-                result.extend(group2)
-                shown_ids.update([u["id"] for u in group2])
+                shown_ids.update(top2)
         
         # ==================== 场景2: 只有省份 ====================
         elif province and not score and major and related_strengths:
             # 2.1 同省该专业大学（按专业匹配度+就业率排序）
-            group = []
-            for u in self.universities:
-                if u["id"] in shown_ids or u["province"] != province:
-                    continue
-                major_score = get_major_match_score(u)
-                if major_score > 0:
-                    latest = get_score_for_province(u, province)
-                    group.append({
-                        **u,
-                        "match_type": "province",
-                        "match_reason": f"本省{province}高校，{major}专业实力较强",
-                        "latest_score": latest,
-                        "major_match_score": major_score
-                    })
-            
-            # 按专业匹配度和就业率排序
-            group.sort(key=lambda x: (x["major_match_score"], x["employment_rate"]), reverse=True)
-            result.extend(group[:5])
-            shown_ids.update([u["id"] for u in group[:5]])
+            candidates = [uid for uid in index.province_ids.get(province, []) if major_score_of(uid) > 0]
+            top = engine.top_k(candidates, lambda uid: (major_score_of(uid), engine.employment_rate(uid)), 5)
+            for uid in top:
+                result.append({
+                    **index.get(uid),
+                    "match_type": "province",
+                    "match_reason": f"本省{province}高校，{major}专业实力较强",
+                    "latest_score": index.score_for_province(uid, province),
+                    "major_match_score": major_score_of(uid)
+                })
+            shown_ids.update(top)
             
             # 2.2 全国该专业大学（排除已显示的）- 只有当本省没有足够大学时才补充
-            if len(group) < 5:
-                group2 = []
-                for u in self.universities:
-                    if u["id"] in shown_ids:
-                        continue
-                    major_score = get_major_match_score(u)
-                    if major_score > 0:
-                        latest = u["admission_scores"][0] if u.get("admission_scores") else None
-                        group2.append({
-                            **u,
-                            "match_type": "national",
-                            "match_reason": f"{major}专业实力强，全国知名",
-                            "latest_score": latest,
-                            "major_match_score": major_score
-                        })
-                
-                group2.sort(key=lambda x: (x["major_match_score"], x["employment_rate"]), reverse=True)
-                group2 = group2[:(5 - len(group))]
-                result.extend(group2)
-                shown_ids.update([u["id"] for u in group2])
+            if len(candidates) < 5:
+                top2 = engine.top_k(
+                    engine.matched_ids(major),
+                    lambda uid: (major_score_of(uid), engine.employment_rate(uid)),
+                    5 - len(candidates),
+                    exclude=shown_ids
+                )
+                for uid in top2:
+                    result.append({
+                        **index.get(uid),
+                        "match_type": "national",
+                        "match_reason": f"{major}专业实力强，全国知名",
+                        "latest_score": index.score_for_province(uid, ANY_PROVINCE),
+                        "major_match_score": major_score_of(uid)
+                    })
+                shown_ids.update(top2)
         
         # ==================== 场景3: 只有分数 ====================
         elif score and score > 0 and not province and not major:
-            group = []
-            for u in self.universities:
-                if u["id"] in shown_ids:
-                    continue
-                # 获取任意省份的分数
-                latest = u["admission_scores"][0] if u.get("admission_scores") else None
-                if not latest:
-                    continue
-                
-                score_val = latest["min_score"]
-                if score - 30 <= score_val <= score + 30:
-                    group.append({
-                        **u,
-                        "match_type": "score",
-                        "match_reason": f"录取分{int(score_val)}分，与您分数({score}分)接近",
-                        "latest_score": latest,
-                        "major_match_score": 0
-                    })
-            
-            group.sort(key=lambda x: x["latest_score"]["min_score"], reverse=True)
-            result.extend(group[:5])
-            shown_ids.update([u["id"] for u in group[:5]])
+            top = engine.top_k(
+                index.ids_in_score_window(ANY_PROVINCE, score - 30, score + 30),
+                engine.latest_min_score,
+                5
+            )
+            for uid in top:
+                u = index.get(uid)
+                latest = u["admission_scores"][0]
+                result.append({
+                    **u,
+                    "match_type": "score",
+                    "match_reason": f"录取分{int(latest['min_score'])}分，与您分数({score}分)接近",
+                    "latest_score": latest,
+                    "major_match_score": 0
+                })
+            shown_ids.update(top)
         
         # ==================== 场景4: 都没有设置 ====================
         elif not province and not score and major and related_strengths:
-            # 按专业推荐，知名度从高到低（就业率排序）
-            group = []
-            for u in self.universities:
-                if u["id"] in shown_ids:
-                    continue
-                major_score = get_major_match_score(u)
-                if major_score > 0:
-                    latest = u["admission_scores"][0] if u.get("admission_scores") else None
-                    group.append({
-                        **u,
-                        "match_type": "national",
-                        "match_reason": f"{major}专业实力强，{u['level']}高校，就业率{u['employment_rate']}%",
-                        "latest_score": latest,
-                        "major_match_score": major_score
-                    })
-            
-            # 按专业匹配度和就业率排序
-            group.sort(key=lambda x: (x["major_match_score"], x["employment_rate"]), reverse=True)
-            result.extend(group[:5])
-            shown_ids.update([u["id"] for u in group[:5]])
+            # 按专业推荐，知名度从高到低（按专业匹配度和就业率排序）
+            top = engine.top_k(
+                engine.matched_ids(major),
+                lambda uid: (major_score_of(uid), engine.employment_rate(uid)),
+                5
+            )
+            for uid in top:
+                u = index.get(uid)
+                result.append({
+                    **u,
+                    "match_type": "national",
+                    "match_reason": f"{major}专业实力强，{u['level']}高校，就业率{u['employment_rate']}%",
+                    "latest_score": index.score_for_province(uid, ANY_PROVINCE),
+                    "major_match_score": major_score_of(uid)
+                })
+            shown_ids.update(top)
         
         # ==================== 场景5: 只有省份+分数（无专业） ====================
         elif province and score and score > 0 and not major:
             # 5.1 该省符合分数的大学
-            group = []
-            for u in self.universities:
-                if u["id"] in shown_ids:
-                    continue
-                latest = get_score_for_province(u, province)
-                if not latest:
-                    continue
-                
-                score_val = latest["min_score"]
-                if score - 30 <= score_val <= score + 30:
-                    group.append({
+            candidates = index.ids_in_score_window(province, score - 30, score + 30)
+            top = engine.top_k(candidates, province_min_score, 5)
+            for uid in top:
+                latest = index.score_for_province(uid, province)
+                result.append({
+                    **index.get(uid),
+                    "match_type": "score",
+                    "match_reason": f"本省{province}高校，录取分{int(latest['min_score'])}分，与您分数({score}分)匹配",
+                    "latest_score": latest,
+                    "major_match_score": 0
+                })
+            shown_ids.update(top)
+            
+            # 5.2 全国符合分数的大学（排除已显示的）
+            if len(candidates) < 5:
+                top2 = engine.top_k(
+                    index.ids_in_score_window(ANY_PROVINCE, score - 30, score + 30),
+                    engine.latest_min_score,
+                    5 - len(candidates),
+                    exclude=shown_ids
+                )
+                for uid in top2:
+                    u = index.get(uid)
+                    latest = u["admission_scores"][0]
+                    result.append({
                         **u,
-                        "match_type": "score",
-                        "match_reason": f"本省{province}高校，录取分{int(score_val)}分，与您分数({score}分)匹配",
+                        "match_type": "national",
+                        "match_reason": f"录取分{int(latest['min_score'])}分，与您分数({score}分)接近",
                         "latest_score": latest,
                         "major_match_score": 0
                     })
-            
-            group.sort(key=lambda x: x["latest_score"]["min_score"], reverse=True)
-            result.extend(group[:5])
-            shown_ids.update([u["id"] for u in group[:5]])
-            
-            # 5.2 全国符合分数的大学（排除已显示的）
-            if len(group) < 5:
-                group2 = []
-                for u in self.universities:
-                    if u["id"] in shown_ids:
-                        continue
-                    latest = u["admission_scores"][0] if u.get("admission_scores") else None
-                    if not latest:
-                        continue
-                    
-                    score_val = latest["min_score"]
-                    if score - 30 <= score_val <= score + 30:
-                        group2.append({
-                            **u,
-                            "match_type": "national",
-                            "match_reason": f"录取分{int(score_val)}分，与您分数({score}分)接近",
-                            "latest_score": latest,
-                            "major_match_score": 0
-                        })
-                
-                group2.sort(key=lambda x: x["latest_score"]["min_score"], reverse=True)
-                group2 = group2[:(5 - len(group))]
-                result.extend(group2)
-                shown_ids.update([u["id"] for u in group2])
+                shown_ids.update(top2)
         
         # ==================== 场景6: 只有省份（无专业） ====================
         elif province and not score and not major:
             # 本省高校按就业率排序
-            group = []
-            for u in self.universities:
-                if u["id"] in shown_ids or u["province"] != province:
-                    continue
-                latest = get_score_for_province(u, province)
-                group.append({
+            top = engine.top_k(index.province_ids.get(province, []), engine.employment_rate, 5)
+            for uid in top:
+                u = index.get(uid)
+                result.append({
                     **u,
                     "match_type": "province",
                     "match_reason": f"本省{province}高校，就业率{u['employment_rate']}%",
-                    "latest_score": latest,
+                    "latest_score": index.score_for_province(uid, province),
                     "major_match_score": 0
                 })
-            
-            group.sort(key=lambda x: x["employment_rate"], reverse=True)
-            result.extend(group[:5])
-            shown_ids.update([u["id"] for u in group[:5]])
+            shown_ids.update(top)
         
         # ==================== 默认兜底 ====================
         if len(result) == 0:
-            # 返回知名度最高的大学（就业率最高的）
-            group = []
-            for u in self.universities:
-                if u["id"] in shown_ids:
-                    continue
-                latest = u["admission_scores"][0] if u.get("admission_scores") else None
-                group.append({
+            # 返回知名度最高的大学（就业率最高的，索引中已预排序）
+            for u in index.records(index.by_employment_rate[:5]):
+                result.append({
                     **u,
                     "match_type": "national",
                     "match_reason": f"{u['level']}高校，就业率{u['employment_rate']}%",
-                    "latest_score": latest,
+                    "latest_score": index.score_for_province(u["id"], ANY_PROVINCE),
                     "major_match_score": 0
                 })
-            
-            group.sort(key=lambda x: x["employment_rate"], reverse=True)
-            result.extend(group[:5])
         
         return {
             "universities": result[:limit],
@@ -2029,13 +1868,9 @@ class UniversityDataService:
             # 同省分数匹配大学
             group = []
             shown_ids = set()
-            for u in self.universities:
-                if u["province"] != province:
-                    continue
-
+            for u in self.index.records(self.index.province_ids.get(province, [])):
                 # 获取该省分数
-                scores = [s for s in u.get("admission_scores", []) if s["province"] == province]
-                latest = scores[0] if scores else None
+                latest = self.index.score_for_province(u["id"], province)
                 if not latest:
                     continue
 
@@ -2087,14 +1922,10 @@ class UniversityDataService:
         elif province and not score:
             # 同省优质大学
             group = []
-            for u in self.universities:
-                if u["province"] != province:
-                    continue
-
+            for u in self.index.records(self.index.province_ids.get(province, [])):
                 major_score = 100 if major_name in u.get("major_strengths", []) else 60 if any(m in u.get("major_strengths", []) for m in [major_name[:2] + "工程", major_name[:2] + "科学", major_name[:2] + "技术"]) else 0
                 if major_score > 0:
-                    scores = [s for s in u.get("admission_scores", []) if s["province"] == province]
-                    latest = scores[0] if scores else u["admission_scores"][0] if u.get("admission_scores") else None
+                    latest = self.index.score_for_province(u["id"], province) or self.index.score_for_province(u["id"], ANY_PROVINCE)
                     group.append({
                         **u,
                         "match_type": "province",
@@ -2207,482 +2038,459 @@ async def get_recommended_universities(
                 "total": 0
             }
         
-        import psycopg2
-        from psycopg2.extras import RealDictCursor
+        db = get_db_pool()
         
-        conn = psycopg2.connect(
-            host='localhost',
-            port=5432,
-            database='employment',
-            user='postgres',
-            password='postgres'
-        )
-        
-
-    
-        
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            # 确定场景和推荐策略
-            if province and score is not None:
-                # 场景A：省份+分数+专业
-                scenario = "A"
-                
-                # 1. 同省分数匹配大学：省份内录取分在score±30分的计算机相关专业
-                score_min = score - 30
-                score_max = score + 30
-                
-                cursor.execute("""
-                    SELECT DISTINCT
-                        u.id,
-                        u.name,
-                        u.level,
-                        u.province,
-                        u.city,
-                        u.employment_rate,
-                        u.major_strengths,
-                        u.website,
-                        'score' as match_type,
-                        '🏆 分数匹配大学' as match_reason,
-                        CASE 
-                            WHEN uas.avg_score IS NOT NULL THEN 
-                                100 - ABS(uas.avg_score - %s) / 100.0
-                            ELSE 0.5 
-                        END as score_match_score
-                    FROM universities u
-                    LEFT JOIN university_admission_scores uas ON u.id = uas.university_id
-                        AND uas.major_name = %s 
-                        AND uas.province = %s
-                    WHERE u.province = %s 
-                        AND (uas.avg_score BETWEEN %s AND %s OR uas.avg_score IS NULL)
-                    ORDER BY score_match_score DESC, u.employment_rate DESC
-                    LIMIT %s
-                """, (score, major, province, province, score_min, score_max, limit))
-                
-                score_match_universities = cursor.fetchall()
-                
-                # 2. 全国分数和专业匹配大学：全国范围内符合分数和专业的大学
-                cursor.execute("""
-                    SELECT DISTINCT
-                        u.id,
-                        u.name,
-                        u.level,
-                        u.province,
-                        u.city,
-                        u.employment_rate,
-                        u.major_strengths,
-                        u.website,
-                        'score' as match_type,
-                        '🏆 分数匹配大学' as match_reason,
-                        CASE 
-                            WHEN uas.avg_score IS NOT NULL THEN 
-                                100 - ABS(uas.avg_score - %s) / 100.0
-                            ELSE 0.5 
-                        END as score_match_score
-                    FROM universities u
-                    LEFT JOIN university_admission_scores uas ON u.id = uas.university_id
-                        AND uas.major_name = %s
-                    WHERE uas.avg_score BETWEEN %s AND %s
-                    ORDER BY score_match_score DESC, u.employment_rate DESC
-                    LIMIT %s
-                """, (score, major, score_min, score_max, limit))
-                
-                national_score_match_universities = cursor.fetchall()
+        # 确定场景和推荐策略
+        if province and score is not None:
+            # 场景A：省份+分数+专业
+            scenario = "A"
+            
+            # 1. 同省分数匹配大学：省份内录取分在score±30分的计算机相关专业
+            score_min = score - 30
+            score_max = score + 30
+            
+            score_match_universities = await db.fetch("""
+                SELECT DISTINCT
+                    u.id,
+                    u.name,
+                    u.level,
+                    u.province,
+                    u.city,
+                    u.employment_rate,
+                    u.major_strengths,
+                    u.website,
+                    'score' as match_type,
+                    '🏆 分数匹配大学' as match_reason,
+                    CASE 
+                        WHEN c.avg_score IS NOT NULL THEN 
+                            100 - ABS(c.avg_score - $1) / 100.0
+                        ELSE 0.5 
+                    END as score_match_score
+                FROM universities u
+                LEFT JOIN recommendation_candidates c ON u.id = c.university_id
+                    AND c.major_name = $2 
+                    AND c.province = $3
+                WHERE u.province = $3 
+                    AND (c.avg_score BETWEEN $4 AND $5 OR c.avg_score IS NULL)
+                ORDER BY score_match_score DESC, u.employment_rate DESC
+                LIMIT $6
+            """, score, major, province, score_min, score_max, limit)
+            
+            # 2. 全国分数和专业匹配大学：全国范围内符合分数和专业的大学
+            national_score_match_universities = await db.fetch("""
+                SELECT DISTINCT
+                    u.id,
+                    u.name,
+                    u.level,
+                    u.province,
+                    u.city,
+                    u.employment_rate,
+                    u.major_strengths,
+                    u.website,
+                    'score' as match_type,
+                    '🏆 分数匹配大学' as match_reason,
+                    CASE 
+                        WHEN c.avg_score IS NOT NULL THEN 
+                            100 - ABS(c.avg_score - $1) / 100.0
+                        ELSE 0.5 
+                    END as score_match_score
+                FROM recommendation_candidates c
+                JOIN universities u ON u.id = c.university_id
+                WHERE c.major_name = $2
+                    AND c.avg_score BETWEEN $3 AND $4
+                ORDER BY score_match_score DESC, u.employment_rate DESC
+                LIMIT $5
+            """, score, major, score_min, score_max, limit)
+            
+            # 构建响应
+            universities = []
+            universities.extend(score_match_universities)
+            universities.extend(national_score_match_universities)
+            
+            return {
+                "universities": universities,
+                "groups": {
+                    "score_match": {
+                        "name": "🏆 分数匹配大学",
+                        "count": len(score_match_universities),
+                        "description": f"录取分数在{score}±30分范围内的高校"
+                    },
+                    "province_match": None,
+                    "national_match": {
+                        "name": "🌟 全国推荐大学",
+                        "count": len(national_score_match_universities),
+                        "description": "全国范围内符合分数和专业的大学"
+                    }
+                },
+                "scenario": "A",
+                "total": len(universities)
+            }
+            
+        elif province and score is None:
+            # 场景B：只有省份+专业
+            scenario = "B"
+            
+            # 1. Python智能专业匹配：获取省内所有大学，使用智能算法进行匹配和排序
+            all_province_universities = await db.fetch("""
+                SELECT DISTINCT
+                    u.id,
+                    u.name,
+                    u.level,
+                    u.province,
+                    u.city,
+                    u.employment_rate,
+                    u.major_strengths,
+                    u.website,
+                    'province' as match_type,
+                    '📍 同省优质大学' as match_reason
+                FROM universities u
+                WHERE u.province = $1
+                ORDER BY 
+                    CASE 
+                        WHEN u.level LIKE '%985%' THEN 1
+                        WHEN u.level LIKE '%211%' THEN 2
+                        WHEN u.level LIKE '%双一流%' THEN 3
+                        ELSE 4
+                    END,
+                    u.employment_rate DESC
+                LIMIT $2
+            """, province, limit * 2)  # 获取更多数据以便智能筛选
+            
+            # 智能专业匹配算法
+            def intelligent_major_matching(target_major, university_strengths):
+                """
+                智能专业匹配算法
+                支持动态专业类别识别和跨学科匹配
+                """
+                if university_strengths is None:
+                    return 0.95, "无专业限制", "可匹配任何专业"  # 最高优先级：无专业限制
                 
-                # 构建响应
-                universities = []
-                universities.extend(score_match_universities)
-                universities.extend(national_score_match_universities)
+                if target_major in university_strengths:
+                    return 1.0, "直接匹配", f"直接开设{target_major}专业"  # 直接匹配
                 
-                return {
-                    "universities": universities,
-                    "groups": {
-                        "score_match": {
-                            "name": "🏆 分数匹配大学",
-                            "count": len(score_match_universities),
-                            "description": f"录取分数在{score}±30分范围内的高校"
-                        },
-                        "province_match": None,
-                        "national_match": {
-                            "name": "🌟 全国推荐大学",
-                            "count": len(national_score_match_universities),
-                            "description": "全国范围内符合分数和专业的大学"
-                        }
+                # 专业类别映射表
+                category_mappings = {
+                    'engineering_ai': {
+                        'targets': [
+                            '人工智能', '计算机科学与技术', '软件工程', '数据科学', '网络工程', 
+                            '信息安全', '物联网工程', '数字媒体技术', '智能科学与技术',
+                            '区块链工程', '虚拟现实技术', '增强现实技术', '数据科学与大数据技术'
+                        ],
+                        'related': [
+                            '计算机科学与技术', '软件工程', '人工智能', '自动化', 
+                            '电子信息工程', '通信工程', '网络工程', '信息安全', 
+                            '物联网工程', '数字媒体技术', '智能科学与技术',
+                            '数据科学与大数据技术', '电子科学与技术', '微电子学',
+                            '数据结构', '算法设计', '机器学习', '深度学习'
+                        ]
+                    },
+                    'science_fundamental': {
+                        'targets': [
+                            '数学', '物理学', '化学', '生物学', '统计学', 
+                            '应用数学', '应用物理学', '应用化学', '生物技术', 
+                            '生物信息学', '材料科学', '环境科学'
+                        ],
+                        'related': [
+                            '数学', '物理学', '化学', '生物学', '统计学', 
+                            '应用数学', '应用物理学', '应用化学', '生物技术', 
+                            '生物信息学', '材料科学', '环境科学',
+                            '基础数学', '理论物理', '有机化学', '分子生物学'
+                        ]
+                    },
+                    'business_economics': {
+                        'targets': [
+                            '经济学', '金融学', '国际经济与贸易', '工商管理', '市场营销', '会计学', 
+                            '财务管理', '人力资源管理', '电子商务', '物流管理'
+                        ],
+                        'related': [
+                            '经济学', '金融学', '工商管理', '会计学', '市场营销', 
+                            '财务管理', '人力资源管理', '国际经济与贸易',
+                            '电子商务', '物流管理', '保险学', '投资学',
+                            '国际贸易', '商务管理', '市场营销管理'
+                        ]
+                    },
+                    'medicine_health': {
+                        'targets': [
+                            '临床医学', '口腔医学', '中医学', '护理学', 
+                            '药学', '预防医学', '医学影像学', '基础医学',
+                            '康复治疗学', '眼视光学', '精神医学'
+                        ],
+                        'related': [
+                            '临床医学', '口腔医学', '中医学', '护理学', 
+                            '药学', '预防医学', '医学影像学', '基础医学',
+                            '康复治疗学', '眼视光学', '精神医学', '中西医结合',
+                            '医学检验技术', '口腔医学技术', '药学技术'
+                        ]
                     },
-                    "scenario": "A",
-                    "total": len(universities)
+                    'law_politics': {
+                        'targets': [
+                            '法学', '政治学与行政学', '国际政治', '社会学', 
+                            '民族学', '知识产权', '马克思主义理论',
+                            '思想政治教育', '国际关系', '外交学'
+                        ],
+                        'related': [
+                            '法学', '政治学与行政学', '国际政治', '社会学', 
+                            '民族学', '知识产权', '马克思主义理论',
+                            '思想政治教育', '国际关系', '外交学',
+                            '宪法学与行政法学', '刑法学', '民商法学', '经济法学'
+                        ]
+                    },
+                    'humanities_arts': {
+                        'targets': [
+                            '汉语言文学', '历史学', '哲学', '考古学', 
+                            '文物与博物馆学', '古典文献学', '艺术设计学',
+                            '音乐学', '美术学', '戏剧影视文学', '新闻传播学'
+                        ],
+                        'related': [
+                            '汉语言文学', '历史学', '哲学', '考古学', 
+                            '文物与博物馆学', '古典文献学', '艺术设计学',
+                            '音乐学', '美术学', '戏剧影视文学', '新闻传播学',
+                            '传播学', '广播电视学', '广告学', '编辑出版学',
+                            '中国语言文学', '世界历史', '逻辑学', '伦理学'
+                        ]
+                    },
+                    'education_psychology': {
+                        'targets': [
+                            '教育学', '学前教育', '小学教育', '特殊教育', 
+                            '教育技术学', '心理学', '应用心理学', 
+                            '教育康复学', '体育教育', '运动训练'
+                        ],
+                        'related': [
+                            '教育学', '学前教育', '小学教育', '特殊教育', 
+                            '教育技术学', '心理学', '应用心理学', 
+                            '教育康复学', '体育教育', '运动训练',
+                            '发展与教育心理学', '认知科学', '教育管理', '课程与教学论'
+                        ]
+                    }
                 }
                 
-            elif province and score is None:
-                # 场景B：只有省份+专业
-                scenario = "B"
+                # 确定目标专业属于哪个类别
+                target_category = None
+                for category, mapping in category_mappings.items():
+                    if target_major in mapping['targets']:
+                        target_category = category
+                        break
                 
-                # 1. Python智能专业匹配：获取省内所有大学，使用智能算法进行匹配和排序
-                cursor.execute("""
-                    SELECT DISTINCT
-                        u.id,
-                        u.name,
-                        u.level,
-                        u.province,
-                        u.city,
-                        u.employment_rate,
-                        u.major_strengths,
-                        u.website,
-                        'province' as match_type,
-                        '📍 同省优质大学' as match_reason
-                    FROM universities u
-                    WHERE u.province = %s
-                    ORDER BY 
-                        CASE 
-                            WHEN u.level LIKE '%985%' THEN 1
-                            WHEN u.level LIKE '%211%' THEN 2
-                            WHEN u.level LIKE '%双一流%' THEN 3
-                            ELSE 4
-                        END,
-                        u.employment_rate DESC
-                    LIMIT %s
-                """, (province, limit * 2))  # 获取更多数据以便智能筛选
+                if target_category:
+                    related_majors = category_mappings[target_category]['related']
+                    if any(major in university_strengths for major in related_majors):
+                        return 0.8, "相关专业", f"属于{target_category}类别相关专业"  # 相关专业
                 
-                all_province_universities = cursor.fetchall()
+                # 跨学科匹配：新兴专业可以匹配其他类别
+                cross_discipline_mappings = {
+                    '人工智能': ['engineering_ai', 'science_fundamental'],  # 人工智能可匹配工科和理科
+                    '数据科学': ['engineering_ai', 'science_fundamental'],  # 数据科学可匹配工科和理科
+                    '金融科技': ['business_economics', 'engineering_ai'],  # 金融科技可匹配商科和工科
+                    '生物信息学': ['medicine_health', 'science_fundamental'],  # 生物信息学可匹配医学和理科
+                    '计算语言学': ['humanities_arts', 'engineering_ai'],  # 计算语言学可匹配文科和工科
+                }
                 
-                # 智能专业匹配算法
-                def intelligent_major_matching(target_major, university_strengths):
-                    """
-                    智能专业匹配算法
-                    支持动态专业类别识别和跨学科匹配
-                    """
-                    if university_strengths is None:
-                        return 0.95, "无专业限制", "可匹配任何专业"  # 最高优先级：无专业限制
-                    
-                    if target_major in university_strengths:
-                        return 1.0, "直接匹配", f"直接开设{target_major}专业"  # 直接匹配
-                    
-                    # 专业类别映射表
-                    category_mappings = {
-                        'engineering_ai': {
-                            'targets': [
-                                '人工智能', '计算机科学与技术', '软件工程', '数据科学', '网络工程', 
-                                '信息安全', '物联网工程', '数字媒体技术', '智能科学与技术',
-                                '区块链工程', '虚拟现实技术', '增强现实技术', '数据科学与大数据技术'
-                            ],
-                            'related': [
-                                '计算机科学与技术', '软件工程', '人工智能', '自动化', 
-                                '电子信息工程', '通信工程', '网络工程', '信息安全', 
-                                '物联网工程', '数字媒体技术', '智能科学与技术',
-                                '数据科学与大数据技术', '电子科学与技术', '微电子学',
-                                '数据结构', '算法设计', '机器学习', '深度学习'
-                            ]
-                        },
-                        'science_fundamental': {
-                            'targets': [
-                                '数学', '物理学', '化学', '生物学', '统计学', 
-                                '应用数学', '应用物理学', '应用化学', '生物技术', 
-                                '生物信息学', '材料科学', '环境科学'
-                            ],
-                            'related': [
-                                '数学', '物理学', '化学', '生物学', '统计学', 
-                                '应用数学', '应用物理学', '应用化学', '生物技术', 
-                                '生物信息学', '材料科学', '环境科学',
-                                '基础数学', '理论物理', '有机化学', '分子生物学'
-                            ]
-                        },
-                        'business_economics': {
-                            'targets': [
-                                '经济学', '金融学', '国际经济与贸易', '工商管理', '市场营销', '会计学', 
-                                '财务管理', '人力资源管理', '电子商务', '物流管理'
-                            ],
-                            'related': [
-                                '经济学', '金融学', '工商管理', '会计学', '市场营销', 
-                                '财务管理', '人力资源管理', '国际经济与贸易',
-                                '电子商务', '物流管理', '保险学', '投资学',
-                                '国际贸易', '商务管理', '市场营销管理'
-                            ]
-                        },
-                        'medicine_health': {
-                            'targets': [
-                                '临床医学', '口腔医学', '中医学', '护理学', 
-                                '药学', '预防医学', '医学影像学', '基础医学',
-                                '康复治疗学', '眼视光学', '精神医学'
-                            ],
-                            'related': [
-                                '临床医学', '口腔医学', '中医学', '护理学', 
-                                '药学', '预防医学', '医学影像学', '基础医学',
-                                '康复治疗学', '眼视光学', '精神医学', '中西医结合',
-                                '医学检验技术', '口腔医学技术', '药学技术'
-                            ]
-                        },
-                        'law_politics': {
-                            'targets': [
-                                '法学', '政治学与行政学', '国际政治', '社会学', 
-                                '民族学', '知识产权', '马克思主义理论',
-                                '思想政治教育', '国际关系', '外交学'
-                            ],
-                            'related': [
-                                '法学', '政治学与行政学', '国际政治', '社会学', 
-                                '民族学', '知识产权', '马克思主义理论',
-                                '思想政治教育', '国际关系', '外交学',
-                                '宪法学与行政法学', '刑法学', '民商法学', '经济法学'
-                            ]
-                        },
-                        'humanities_arts': {
-                            'targets': [
-                                '汉语言文学', '历史学', '哲学', '考古学', 
-                                '文物与博物馆学', '古典文献学', '艺术设计学',
-                                '音乐学', '美术学', '戏剧影视文学', '新闻传播学'
-                            ],
-                            'related': [
-                                '汉语言文学', '历史学', '哲学', '考古学', 
-                                '文物与博物馆学', '古典文献学', '艺术设计学',
-                                '音乐学', '美术学', '戏剧影视文学', '新闻传播学',
-                                '传播学', '广播电视学', '广告学', '编辑出版学',
-                                '中国语言文学', '世界历史', '逻辑学', '伦理学'
-                            ]
-                        },
-                        'education_psychology': {
-                            'targets': [
-                                '教育学', '学前教育', '小学教育', '特殊教育', 
-                                '教育技术学', '心理学', '应用心理学', 
-                                '教育康复学', '体育教育', '运动训练'
-                            ],
-                            'related': [
-                                '教育学', '学前教育', '小学教育', '特殊教育', 
-                                '教育技术学', '心理学', '应用心理学', 
-                                '教育康复学', '体育教育', '运动训练',
-                                '发展与教育心理学', '认知科学', '教育管理', '课程与教学论'
-                            ]
-                        }
-                    }
-                    
-                    # 确定目标专业属于哪个类别
-                    target_category = None
-                    for category, mapping in category_mappings.items():
-                        if target_major in mapping['targets']:
-                            target_category = category
-                            break
-                    
-                    if target_category:
-                        related_majors = category_mappings[target_category]['related']
+                if target_major in cross_discipline_mappings:
+                    for category in cross_discipline_mappings[target_major]:
+                        related_majors = category_mappings[category]['related']
                         if any(major in university_strengths for major in related_majors):
-                            return 0.8, "相关专业", f"属于{target_category}类别相关专业"  # 相关专业
-                    
-                    # 跨学科匹配：新兴专业可以匹配其他类别
-                    cross_discipline_mappings = {
-                        '人工智能': ['engineering_ai', 'science_fundamental'],  # 人工智能可匹配工科和理科
-                        '数据科学': ['engineering_ai', 'science_fundamental'],  # 数据科学可匹配工科和理科
-                        '金融科技': ['business_economics', 'engineering_ai'],  # 金融科技可匹配商科和工科
-                        '生物信息学': ['medicine_health', 'science_fundamental'],  # 生物信息学可匹配医学和理科
-                        '计算语言学': ['humanities_arts', 'engineering_ai'],  # 计算语言学可匹配文科和工科
-                    }
-                    
-                    if target_major in cross_discipline_mappings:
-                        for category in cross_discipline_mappings[target_major]:
-                            related_majors = category_mappings[category]['related']
-                            if any(major in university_strengths for major in related_majors):
-                                return 0.6, "跨学科相关", f"跨{category}类相关"  # 跨学科相关
-                    
-                    # 通用匹配：检查是否有任何相关学科
-                    general_related_majors = []
-                    for mapping in category_mappings.values():
-                        general_related_majors.extend(mapping['related'])
-                    
-                    # 去重
-                    general_related_majors = list(set(general_related_majors))
-                    if any(major in university_strengths for major in general_related_majors[:10]):  # 检查前10个最相关专业
-                        return 0.4, "通用相关", "相关学科匹配"
-                    
-                    # 兜底匹配：任何专业都有基础分，确保不遗漏
-                    return 0.2, "兜底推荐", "基础匹配，确保覆盖"
-                
-                # 为每所大学计算综合评分并排序
-                scored_universities = []
-                for uni in all_province_universities:
-                    # 提取数据
-                    uni_id = uni[0]
-                    uni_name = uni[1] 
-                    uni_level = uni[2]
-                    uni_province = uni[3]
-                    uni_city = uni[4]
-                    uni_employment_rate = uni[5]
-                    uni_strengths = uni[6]
-                    uni_website = uni[7]
-                    uni_match_type = uni[8]
-                    uni_match_reason = uni[9]
-                    
-                    # 计算专业匹配分数
-                    major_score, match_type_desc, match_detail = intelligent_major_matching(major, uni_strengths)
-                    
-                    # 计算大学层次分数
-                    if '985' in uni_level:
-                        level_score = 1
-                        level_rank_name = '985'
-                    elif '211' in uni_level:
-                        level_score = 2
-                        level_rank_name = '211'
-                    elif '双一流' in uni_level:
-                        level_score = 3
-                        level_rank_name = '双一流'
-                    else:
-                        level_score = 4
-                        level_rank_name = '省属重点'
-                    
-                    # 计算综合评分（层次优先 + 专业匹配度 + 就业率）
-                    # 综合评分 = 专业匹配分数 * 100 + (5-层次分数) * 20 + 就业率 * 0.5
-                    total_score = major_score * 100 + (5 - level_score) * 20 + uni_employment_rate * 0.5
-                    
-                    scored_uni = {
-                        'id': uni_id,
-                        'name': uni_name,
-                        'level': uni_level,
-                        'province': uni_province,
-                        'city': uni_city,
-                        'employment_rate': uni_employment_rate,
-                        'major_strengths': uni_strengths,
-                        'website': uni_website,
-                        'match_type': uni_match_type,
-                        'match_reason': uni_match_reason,
-                        'major_score': major_score,
-                        'match_type_desc': match_type_desc,
-                        'match_detail': match_detail,
-                        'level_score': level_score,
-                        'level_rank_name': level_rank_name,
-                        'total_score': total_score
-                    }
-                    scored_universities.append(scored_uni)
+                            return 0.6, "跨学科相关", f"跨{category}类相关"  # 跨学科相关
                 
-                # 智能排序：层次优先 + 专业匹配度 + 就业率
-                scored_universities.sort(key=lambda x: (
-                    x['level_score'],           # 1. 层次优先（985=1, 211=2, 双一流=3, 其他=4）
-                    -x['major_score'],           # 2. 专业匹配度降序
-                    -x['employment_rate']       # 3. 就业率降序
-                ))
+                # 通用匹配：检查是否有任何相关学科
+                general_related_majors = []
+                for mapping in category_mappings.values():
+                    general_related_majors.extend(mapping['related'])
                 
-                # 取前N所大学
-                province_match_universities = scored_universities[:limit]
+                # 去重
+                general_related_majors = list(set(general_related_majors))
+                if any(major in university_strengths for major in general_related_majors[:10]):  # 检查前10个最相关专业
+                    return 0.4, "通用相关", "相关学科匹配"
                 
-                # 转换为数据库结果格式
-                final_province_universities = []
-                for uni in province_match_universities:
-                    final_province_universities.append({
-                        'id': uni['id'],
-                        'name': uni['name'],
-                        'level': uni['level'],
-                        'province': uni['province'],
-                        'city': uni['city'],
-                        'employment_rate': uni['employment_rate'],
-                        'major_strengths': uni['major_strengths'],
-                        'website': uni['website'],
-                        'match_type': uni['match_type'],
-                        'match_reason': uni['match_reason']
-                    })
+                # 兜底匹配：任何专业都有基础分，确保不遗漏
+                return 0.2, "兜底推荐", "基础匹配，确保覆盖"
+            
+            # 为每所大学计算综合评分并排序
+            scored_universities = []
+            for uni in all_province_universities:
+                # 提取数据
+                uni_id = uni['id']
+                uni_name = uni['name']
+                uni_level = uni['level']
+                uni_province = uni['province']
+                uni_city = uni['city']
+                uni_employment_rate = uni['employment_rate']
+                uni_strengths = uni['major_strengths']
+                uni_website = uni['website']
+                uni_match_type = uni['match_type']
+                uni_match_reason = uni['match_reason']
                 
-                # 2. 全国优质大学：全国范围内该专业相对排名靠前的大学
-                cursor.execute("""
-                    SELECT DISTINCT
-                        u.id,
-                        u.name,
-                        u.level,
-                        u.province,
-                        u.city,
-                        u.employment_rate,
-                        u.major_strengths,
-                        u.website,
-                        'national' as match_type,
-                        '🌟 全国推荐大学' as match_reason,
-                        CASE 
-                            WHEN %s = ANY(u.major_strengths) THEN 1
-                            WHEN u.major_strengths IS NULL THEN 0.5
-                            ELSE 0
-                        END as major_match_score
-                    FROM universities u
-                    WHERE (%s = ANY(u.major_strengths) OR u.major_strengths IS NULL)
-                    ORDER BY major_match_score DESC,
-                        CASE 
-                            WHEN u.level LIKE '%985%' THEN 1
-                            WHEN u.level LIKE '%211%' THEN 2
-                            WHEN u.level LIKE '%双一流%' THEN 3
-                            ELSE 4
-                        END,
-                        u.employment_rate DESC
-                    LIMIT %s
-                """, (major, major, limit))
+                # 计算专业匹配分数
+                major_score, match_type_desc, match_detail = intelligent_major_matching(major, uni_strengths)
                 
-                national_match_universities = cursor.fetchall()
+                # 计算大学层次分数
+                if '985' in uni_level:
+                    level_score = 1
+                    level_rank_name = '985'
+                elif '211' in uni_level:
+                    level_score = 2
+                    level_rank_name = '211'
+                elif '双一流' in uni_level:
+                    level_score = 3
+                    level_rank_name = '双一流'
+                else:
+                    level_score = 4
+                    level_rank_name = '省属重点'
                 
-                # 构建响应
-                universities = []
-                universities.extend(province_match_universities)
-                universities.extend(national_match_universities)
+                # 计算综合评分（层次优先 + 专业匹配度 + 就业率）
+                # 综合评分 = 专业匹配分数 * 100 + (5-层次分数) * 20 + 就业率 * 0.5
+                total_score = major_score * 100 + (5 - level_score) * 20 + uni_employment_rate * 0.5
                 
-                return {
-                    "universities": universities,
-                    "groups": {
-                        "score_match": None,
-                        "province_match": {
-                            "name": "📍 同省优质大学",
-                            "count": len(province_match_universities),
-                            "description": f"您所在省份内该专业的优质高校"
-                        },
-                        "national_match": {
-                            "name": "🌟 全国推荐大学",
-                            "count": len(national_match_universities),
-                            "description": "全国范围内该专业的优质高校"
-                        }
-                    },
-                    "scenario": "B",
-                    "total": len(universities)
+                scored_uni = {
+                    'id': uni_id,
+                    'name': uni_name,
+                    'level': uni_level,
+                    'province': uni_province,
+                    'city': uni_city,
+                    'employment_rate': uni_employment_rate,
+                    'major_strengths': uni_strengths,
+                    'website': uni_website,
+                    'match_type': uni_match_type,
+                    'match_reason': uni_match_reason,
+                    'major_score': major_score,
+                    'match_type_desc': match_type_desc,
+                    'match_detail': match_detail,
+                    'level_score': level_score,
+                    'level_rank_name': level_rank_name,
+                    'total_score': total_score
                 }
-                
-            else:
-                # 场景C：什么都没填+专业
-                scenario = "C"
-                
-                # 全国推荐大学：全国范围内该专业排名靠前的大学
-                cursor.execute("""
-                    SELECT DISTINCT
-                        u.id,
-                        u.name,
-                        u.level,
-                        u.province,
-                        u.city,
-                        u.employment_rate,
-                        u.major_strengths,
-                        u.website,
-                        'national' as match_type,
-                        '🌟 全国推荐大学' as match_reason,
-                        CASE 
-                            WHEN %s = ANY(u.major_strengths) THEN 1
-                            WHEN u.major_strengths IS NULL THEN 0.5
-                            ELSE 0
-                        END as major_match_score
-                    FROM universities u
-                    WHERE (%s = ANY(u.major_strengths) OR u.major_strengths IS NULL)
-                    ORDER BY major_match_score DESC,
-                        CASE 
-                            WHEN u.level LIKE '%985%' THEN 1
-                            WHEN u.level LIKE '%211%' THEN 2
-                            WHEN u.level LIKE '%双一流%' THEN 3
-                            ELSE 4
-                        END,
-                        u.employment_rate DESC
-                    LIMIT %s
-                """, (major, major, limit))
-                
-                national_match_universities = cursor.fetchall()
-                
-                return {
-                    "universities": national_match_universities,
-                    "groups": {
-                        "score_match": None,
-                        "province_match": None,
-                        "national_match": {
-                            "name": "🌟 全国推荐大学",
-                            "count": len(national_match_universities),
-                            "description": "全国范围内该专业的优质高校"
-                        }
+                scored_universities.append(scored_uni)
+            
+            # 智能排序：层次优先 + 专业匹配度 + 就业率
+            scored_universities.sort(key=lambda x: (
+                x['level_score'],           # 1. 层次优先（985=1, 211=2, 双一流=3, 其他=4）
+                -x['major_score'],           # 2. 专业匹配度降序
+                -x['employment_rate']       # 3. 就业率降序
+            ))
+            
+            # 取前N所大学
+            province_match_universities = scored_universities[:limit]
+            
+            # 转换为数据库结果格式
+            final_province_universities = []
+            for uni in province_match_universities:
+                final_province_universities.append({
+                    'id': uni['id'],
+                    'name': uni['name'],
+                    'level': uni['level'],
+                    'province': uni['province'],
+                    'city': uni['city'],
+                    'employment_rate': uni['employment_rate'],
+                    'major_strengths': uni['major_strengths'],
+                    'website': uni['website'],
+                    'match_type': uni['match_type'],
+                    'match_reason': uni['match_reason']
+                })
+            
+            # 2. 全国优质大学：全国范围内该专业相对排名靠前的大学
+            national_match_universities = await db.fetch("""
+                SELECT DISTINCT
+                    u.id,
+                    u.name,
+                    u.level,
+                    u.province,
+                    u.city,
+                    u.employment_rate,
+                    u.major_strengths,
+                    u.website,
+                    'national' as match_type,
+                    '🌟 全国推荐大学' as match_reason,
+                    CASE 
+                        WHEN $1 = ANY(u.major_strengths) THEN 1
+                        WHEN u.major_strengths IS NULL THEN 0.5
+                        ELSE 0
+                    END as major_match_score
+                FROM universities u
+                WHERE ($1 = ANY(u.major_strengths) OR u.major_strengths IS NULL)
+                ORDER BY major_match_score DESC,
+                    CASE 
+                        WHEN u.level LIKE '%985%' THEN 1
+                        WHEN u.level LIKE '%211%' THEN 2
+                        WHEN u.level LIKE '%双一流%' THEN 3
+                        ELSE 4
+                    END,
+                    u.employment_rate DESC
+                LIMIT $2
+            """, major, limit)
+            
+            # 构建响应
+            universities = []
+            universities.extend(province_match_universities)
+            universities.extend(national_match_universities)
+            
+            return {
+                "universities": universities,
+                "groups": {
+                    "score_match": None,
+                    "province_match": {
+                        "name": "📍 同省优质大学",
+                        "count": len(province_match_universities),
+                        "description": f"您所在省份内该专业的优质高校"
                     },
-                    "scenario": "C",
-                    "total": len(national_match_universities)
-                }
-        
+                    "national_match": {
+                        "name": "🌟 全国推荐大学",
+                        "count": len(national_match_universities),
+                        "description": "全国范围内该专业的优质高校"
+                    }
+                },
+                "scenario": "B",
+                "total": len(universities)
+            }
+            
+        else:
+            # 场景C：什么都没填+专业
+            scenario = "C"
+            
+            # 全国推荐大学：全国范围内该专业排名靠前的大学
+            national_match_universities = await db.fetch("""
+                SELECT DISTINCT
+                    u.id,
+                    u.name,
+                    u.level,
+                    u.province,
+                    u.city,
+                    u.employment_rate,
+                    u.major_strengths,
+                    u.website,
+                    'national' as match_type,
+                    '🌟 全国推荐大学' as match_reason,
+                    CASE 
+                        WHEN $1 = ANY(u.major_strengths) THEN 1
+                        WHEN u.major_strengths IS NULL THEN 0.5
+                        ELSE 0
+                    END as major_match_score
+                FROM universities u
+                WHERE ($1 = ANY(u.major_strengths) OR u.major_strengths IS NULL)
+                ORDER BY major_match_score DESC,
+                    CASE 
+                        WHEN u.level LIKE '%985%' THEN 1
+                        WHEN u.level LIKE '%211%' THEN 2
+                        WHEN u.level LIKE '%双一流%' THEN 3
+                        ELSE 4
+                    END,
+                    u.employment_rate DESC
+                LIMIT $2
+            """, major, limit)
+            
+            return {
+                "universities": national_match_universities,
+                "groups": {
+                    "score_match": None,
+                    "province_match": None,
+                    "national_match": {
+                        "name": "🌟 全国推荐大学",
+                        "count": len(national_match_universities),
+                        "description": "全国范围内该专业的优质高校"
+                    }
+                },
+                "scenario": "C",
+                "total": len(national_match_universities)
+            }
+    
     except Exception as e:
         logger.error(f"获取推荐大学失败: {e}")
         return {
@@ -2806,12 +2614,8 @@ async def reset_and_seed():
     """重置配额并补充所有学科数据（确保每学科至少10条）"""
     try:
         from services.quota_manager import quota_manager
-        from services.data_manager import MajorDataManager
         from services.crawler import generate_mock_data
         
-        # 创建新的 data_manager 实例
-        data_manager = MajorDataManager()
-        
         # 1. 重置配额计数
         quota_manager.reset_counts()
         logger.info("已重置配额计数")
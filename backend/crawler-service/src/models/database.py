@@ -377,9 +377,10 @@ class HotNews(HotNewsBase):
 class HotNewsListResponse(BaseModel):
     """热点资讯列表响应"""
     data: List[HotNews]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class HotNewsByMajorResponse(BaseModel):
@@ -11,6 +11,7 @@
 
 from fastapi import APIRouter, HTTPException, Query, Response
 from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 import sys
 import os
@@ -23,6 +24,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.crawler_data_service import CrawlerDataService, DatabaseConfig
 from services.redis_cache_service import RedisCacheService, CacheKeyBuilder
+from shared.utils.pagination import InvalidCursorError
 from models.database import (
     MajorListResponse, UniversityListResponse, MajorMarketDataListResponse,
     AdmissionScoreListResponse, IndustryTrendListResponse,
@@ -61,7 +63,7 @@ async def get_categories(parent_id: Optional[int] = None):
     """获取学科分类列表（从数据库读取，暂时禁用缓存）"""
     try:
         # 从数据库读取
-        categories = data_service.get_categories(parent_id)
+        categories = await run_in_threadpool(data_service.get_categories, parent_id)
         
         # 手动处理datetime对象，确保JSON序列化正确
         for cat in categories:
@@ -85,7 +87,7 @@ async def get_categories(parent_id: Optional[int] = None):
 async def get_category(category_id: int):
     """获取学科分类详情（从数据库读取）"""
     try:
-        category = data_service.get_category_by_id(category_id)
+        category = await run_in_threadpool(data_service.get_category_by_id, category_id)
         if not category:
             raise HTTPException(status_code=404, detail="学科分类不存在")
         return category
@@ -108,18 +110,11 @@ async def get_majors(
         # 构建缓存键
         cache_key = CacheKeyBuilder.majors_list(page, str(category_id) if category_id else None)
         
-        # 尝试从缓存读取
-        cached_data = cache_service.get(cache_key)
-        if cached_data:
-            return cached_data
-        
-        # 从数据库读取
-        result = data_service.get_majors(category_id, page, page_size)
-        
-        # 写入缓存
-        cache_service.set(cache_key, result.dict())
-        
-        return result
+        # 读取缓存，未命中时从数据库读取并写入缓存（并发未命中只查询一次）
+        return await cache_service.aget_or_compute(
+            cache_key,
+            lambda: data_service.get_majors(category_id, page, page_size).dict()
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -128,7 +123,7 @@ async def get_majors(
 async def get_major(major_id: int):
     """获取专业详情（从数据库读取）"""
     try:
-        major = data_service.get_major_by_id(major_id)
+        major = await run_in_threadpool(data_service.get_major_by_id, major_id)
         if not major:
             raise HTTPException(status_code=404, detail="专业不存在")
         return major
@@ -151,18 +146,11 @@ async def get_market_data(
         # 构建缓存键
         cache_key = f"market-data:{category or 'all'}:{page}:{page_size}"
         
-        # 尝试从缓存读取
-        cached_data = cache_service.get(cache_key)
-        if cached_data:
-            return cached_data
-        
-        # 从数据库读取
-        result = data_service.get_major_market_data(category, page, page_size)
-        
-        # 写入缓存
-        cache_service.set(cache_key, result.dict())
-        
-        return result
+        # 读取缓存，未命中时从数据库读取并写入缓存（并发未命中只查询一次）
+        return await cache_service.aget_or_compute(
+            cache_key,
+            lambda: data_service.get_major_market_data(category, page, page_size).dict()
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -183,18 +171,47 @@ async def get_universities(
         # 构建缓存键
         cache_key = f"universities:{province or 'all'}:{level or 'all'}:{page}:{page_size}"
         
-        # 尝试从缓存读取
-        cached_data = cache_service.get(cache_key)
-        if cached_data:
-            return cached_data
-        
-        # 从数据库读取
-        result = data_service.get_universities(province, level, page, page_size)
+        # 读取缓存，未命中时从数据库读取并写入缓存（并发未命中只查询一次）
+        return await cache_service.aget_or_compute(
+            cache_key,
+            lambda: data_service.get_universities(province, level, page, page_size).dict()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/universities/batch")
+async def get_universities_batch(
+    ids: str = Query(..., description="大学ID列表，逗号分隔，如 1,2,3（最多100个）")
+):
+    """批量获取大学详情（一次读取缓存，未命中的大学一次查询数据库）"""
+    try:
+        university_ids = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids 必须是逗号分隔的整数")
+    if not university_ids or len(university_ids) > 100:
+        raise HTTPException(status_code=400, detail="ids 数量必须在1到100之间")
+    
+    try:
+        keys = {CacheKeyBuilder.university(uid): uid for uid in university_ids}
+        hits, misses = await cache_service.aget_many(list(keys))
         
-        # 写入缓存
-        cache_service.set(cache_key, result.dict())
+        loaded = {}
+        if misses:
+            found = await run_in_threadpool(data_service.get_universities_by_ids, [keys[k] for k in misses])
+            loaded = {CacheKeyBuilder.university(uid): jsonable_encoder(u) for uid, u in found.items()}
+            if loaded:
+                await cache_service.aset_many(loaded)
         
-        return result
+        data = []
+        missing = []
+        for key, uid in keys.items():
+            value = hits.get(key) or loaded.get(key)
+            if value is None:
+                missing.append(uid)
+            else:
+                data.append(value)
+        return {"data": data, "total": len(data), "missing_ids": missing}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -203,7 +220,7 @@ async def get_universities(
 async def get_university(university_id: int):
     """获取大学详情（从数据库读取）"""
     try:
-        university = data_service.get_university_by_id(university_id)
+        university = await run_in_threadpool(data_service.get_university_by_id, university_id)
         if not university:
             raise HTTPException(status_code=404, detail="大学不存在")
         return university
@@ -226,7 +243,9 @@ async def get_admission_scores(
 ):
     """获取录取分数列表（从数据库读取，支持Redis缓存）"""
     try:
-        result = data_service.get_admission_scores(university_id, major_id, province, year, page, page_size)
+        result = await run_in_threadpool(
+            data_service.get_admission_scores, university_id, major_id, province, year, page, page_size
+        )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -244,7 +263,7 @@ async def get_industry_trends(
 ):
     """获取行业趋势列表（从数据库读取，支持Redis缓存）"""
     try:
-        result = data_service.get_industry_trends(industry_name, page, page_size)
+        result = await run_in_threadpool(data_service.get_industry_trends, industry_name, page, page_size)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -263,7 +282,7 @@ async def get_videos(
 ):
     """获取视频内容列表（从数据库读取，支持Redis缓存）"""
     try:
-        result = data_service.get_videos(platform, related_major, page, page_size)
+        result = await run_in_threadpool(data_service.get_videos, platform, related_major, page, page_size)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -282,7 +301,7 @@ async def get_crawl_history(
 ):
     """获取爬取历史列表（从数据库读取）"""
     try:
-        result = data_service.get_crawl_history(task_type, status, page, page_size)
+        result = await run_in_threadpool(data_service.get_crawl_history, task_type, status, page, page_size)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -298,18 +317,11 @@ async def get_crawl_quotas():
     try:
         cache_key = CacheKeyBuilder.quota_status()
         
-        # 尝试从缓存读取
-        cached_data = cache_service.get(cache_key)
-        if cached_data:
-            return cached_data
-        
-        # 从数据库读取
-        result = data_service.get_crawl_quotas()
-        
-        # 写入缓存
-        cache_service.set(cache_key, result.dict())
-        
-        return result
+        # 读取缓存，未命中时从数据库读取并写入缓存（并发未命中只查询一次）
+        return await cache_service.aget_or_compute(
+            cache_key,
+            lambda: data_service.get_crawl_quotas().dict()
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -322,7 +334,7 @@ async def get_crawl_quotas():
 async def delete_cache(cache_key: str):
     """删除指定缓存（管理员接口）"""
     try:
-        success = cache_service.delete(cache_key)
+        success = await cache_service.adelete(cache_key)
         if success:
             return {"status": "success", "message": f"缓存已清除: {cache_key}"}
         else:
@@ -335,7 +347,7 @@ async def delete_cache(cache_key: str):
 async def delete_cache_bulk(pattern: str = Query(..., description="缓存键模式，如 majors:*")):
     """批量清除缓存（管理员接口）"""
     try:
-        count = cache_service.delete_pattern(pattern)
+        count = await run_in_threadpool(cache_service.delete_pattern, pattern)
         return {"status": "success", "message": f"已清除 {count} 个缓存键", "pattern": pattern}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -345,7 +357,7 @@ async def delete_cache_bulk(pattern: str = Query(..., description="缓存键模
 async def delete_all_cache():
     """清除所有数据缓存（爬取完成后调用）（管理员接口）"""
     try:
-        count = cache_service.invalidate_all_data()
+        count = await run_in_threadpool(cache_service.invalidate_all_data)
         return {"status": "success", "message": f"已清除 {count} 个数据缓存"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -355,7 +367,7 @@ async def delete_all_cache():
 async def get_cache_stats():
     """获取缓存统计信息（管理员接口）"""
     try:
-        return cache_service.get_stats()
+        return await run_in_threadpool(cache_service.get_stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -382,7 +394,7 @@ async def trigger_full_crawl(task_type: str = "all"):
         from models.database import CrawlHistory, CrawlStatus, CrawlTaskType
         
         # 重置配额
-        data_service.reset_quota_used()
+        await run_in_threadpool(data_service.reset_quota_used)
         
         # 调用爬虫服务触发全量爬取
         async with httpx.AsyncClient(timeout=600.0) as client:
@@ -404,7 +416,7 @@ async def trigger_full_crawl(task_type: str = "all"):
                     success_count=0,
                     failed_count=0
                 )
-                data_service.log_crawl_history(history)
+                await run_in_threadpool(data_service.log_crawl_history, history)
                 
                 return {
                     "task_id": task_id,
@@ -438,19 +450,26 @@ async def get_hot_news(
     source: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    order_by: str = Query("heat_index", regex="^(heat_index|publish_time)$")
+    order_by: str = Query("heat_index", regex="^(heat_index|publish_time)$"),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor，传入后忽略page"),
+    total_mode: str = Query("exact", regex="^(exact|estimate|none)$")
 ):
     """获取热点资讯列表（从数据库读取，支持Redis缓存）"""
     try:
-        result = data_service.get_hot_news(
+        result = await run_in_threadpool(
+            data_service.get_hot_news,
             category=category,
             related_major=related_major,
             source=source,
             page=page,
             page_size=page_size,
-            order_by=order_by
+            order_by=order_by,
+            cursor=cursor,
+            total_mode=total_mode
         )
         return result
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -459,7 +478,7 @@ async def get_hot_news(
 async def get_hot_news_trending(limit: int = Query(20, ge=1, le=100)):
     """获取热门趋势资讯（按热度排序）"""
     try:
-        return data_service.get_hot_news_trending(limit=limit)
+        return await run_in_threadpool(data_service.get_hot_news_trending, limit=limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -471,7 +490,7 @@ async def get_hot_news_recent(
 ):
     """获取最近发布的热点资讯"""
     try:
-        return data_service.get_hot_news_recent(hours=hours, limit=limit)
+        return await run_in_threadpool(data_service.get_hot_news_recent, hours=hours, limit=limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -480,7 +499,7 @@ async def get_hot_news_recent(
 async def get_hot_news_by_major(major: str, limit: int = Query(10, ge=1, le=50)):
     """获取指定专业的热点资讯"""
     try:
-        return data_service.get_hot_news_by_major(major=major, limit=limit)
+        return await run_in_threadpool(data_service.get_hot_news_by_major, major=major, limit=limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -489,6 +508,6 @@ async def get_hot_news_by_major(major: str, limit: int = Query(10, ge=1, le=50))
 async def get_hot_news_by_category(category: str, limit: int = Query(10, ge=1, le=50)):
     """获取指定分类的热点资讯"""
     try:
-        return data_service.get_hot_news_by_category(category=category, limit=limit)
+        return await run_in_threadpool(data_service.get_hot_news_by_category, category=category, limit=limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1 +1,8 @@
 # 服务模块
+import os
+import sys
+
+# 跨服务共用的模块位于 backend/shared
+_backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if _backend_dir not in sys.path:
+    sys.path.append(_backend_dir)
@@ -10,6 +10,8 @@ import time
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from services.recommendation_candidates import candidate_key, refresh_candidates
+
 logger = logging.getLogger(__name__)
 
 class AdmissionScoreCrawler:
@@ -186,6 +188,7 @@ class AdmissionScoreCrawler:
             cursor = conn.cursor()
             
             saved_count = 0
+            saved_keys = []
             
             for score in scores:
                 try:
@@ -213,12 +216,22 @@ class AdmissionScoreCrawler:
                     ))
                     
                     saved_count += 1
+                    saved_keys.append(candidate_key(score))
                     
                 except Exception as e:
                     logger.error(f"保存分数记录失败: {e}")
                     continue
             
             conn.commit()
+            
+            # 增量刷新推荐候选表（失败不影响已保存的分数，可通过迁移脚本的初始填充重建）
+            try:
+                refresh_candidates(cursor, saved_keys)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"刷新推荐候选表失败: {e}")
+            
             cursor.close()
             conn.close()
             
@@ -0,0 +1,165 @@
+"""
+缓存值编解码
+支持 json / orjson / msgpack 序列化，超过阈值时使用 zlib / lz4 压缩。
+
+每个值带4字节头：魔数(2) + 序列化方式(1) + 压缩方式(1)，
+没有头的值按旧版JSON文本解析，新旧缓存可以在升级期间共存。
+"""
+
+import json
+import logging
+import os
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - 可选依赖
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"\xcaC"
+HEADER_SIZE = 4
+
+# 序列化方式编号（写入值头，不可修改已有编号）
+SERIALIZERS = {"json": 1, "orjson": 2, "msgpack": 3}
+# 压缩方式编号
+COMPRESSIONS = {"none": 0, "zlib": 1, "lz4": 2}
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    # 日期时间交给 default=str 处理，与json序列化结果保持一致
+    return orjson.dumps(value, default=str, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=str, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _available_serializers() -> Dict[int, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    serializers = {SERIALIZERS["json"]: (_json_dumps, _json_loads)}
+    if orjson is not None:
+        serializers[SERIALIZERS["orjson"]] = (_orjson_dumps, orjson.loads)
+    if msgpack is not None:
+        serializers[SERIALIZERS["msgpack"]] = (_msgpack_dumps, _msgpack_loads)
+    return serializers
+
+
+def _available_compressions() -> Dict[int, Tuple[Callable[[bytes, int], bytes], Callable[[bytes], bytes]]]:
+    compressions = {COMPRESSIONS["zlib"]: (lambda data, level: zlib.compress(data, level), zlib.decompress)}
+    if lz4_frame is not None:
+        compressions[COMPRESSIONS["lz4"]] = (
+            lambda data, level: lz4_frame.compress(data, compression_level=level), lz4_frame.decompress
+        )
+    return compressions
+
+
+class CacheCodec:
+    """缓存值编解码器
+
+    Args:
+        serializer: json / orjson / msgpack，依赖未安装时回退到json
+        compression: none / zlib / lz4，依赖未安装时回退到zlib
+        compress_min_bytes: 序列化结果超过该大小才压缩
+        compress_level: 压缩级别
+    """
+
+    def __init__(
+        self,
+        serializer: str = "json",
+        compression: str = "none",
+        compress_min_bytes: int = 4096,
+        compress_level: int = 1
+    ):
+        self._serializers = _available_serializers()
+        self._compressions = _available_compressions()
+
+        serializer_id = SERIALIZERS.get(serializer)
+        if serializer_id is None:
+            raise ValueError(f"不支持的缓存序列化方式: {serializer}")
+        if serializer_id not in self._serializers:
+            logger.warning(f"缓存序列化依赖 {serializer} 未安装，使用json")
+            serializer, serializer_id = "json", SERIALIZERS["json"]
+
+        compression_id = COMPRESSIONS.get(compression)
+        if compression_id is None:
+            raise ValueError(f"不支持的缓存压缩方式: {compression}")
+        if compression_id and compression_id not in self._compressions:
+            logger.warning(f"缓存压缩依赖 {compression} 未安装，使用zlib")
+            compression, compression_id = "zlib", COMPRESSIONS["zlib"]
+
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        self.compress_level = compress_level
+        self._serializer_id = serializer_id
+        self._compression_id = compression_id
+        self._dumps = self._serializers[serializer_id][0]
+
+    @classmethod
+    def from_env(cls) -> "CacheCodec":
+        """根据环境变量创建编解码器"""
+        return cls(
+            serializer=os.getenv("CACHE_SERIALIZER", "orjson"),
+            compression=os.getenv("CACHE_COMPRESSION", "zlib"),
+            compress_min_bytes=int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "4096")),
+            compress_level=int(os.getenv("CACHE_COMPRESS_LEVEL", "1")),
+        )
+
+    def encode(self, value: Any) -> bytes:
+        """编码为带头的字节串"""
+        data = self._dumps(value)
+        compression_id = COMPRESSIONS["none"]
+        if self._compression_id and len(data) >= self.compress_min_bytes:
+            data = self._compressions[self._compression_id][0](data, self.compress_level)
+            compression_id = self._compression_id
+        return MAGIC + bytes((self._serializer_id, compression_id)) + data
+
+    def decode(self, data: Optional[Union[bytes, str]]) -> Any:
+        """解码缓存值（兼容没有头的旧版JSON文本）"""
+        if data is None:
+            return None
+        if isinstance(data, bytes) and data[:2] == MAGIC and len(data) >= HEADER_SIZE:
+            serializer_id, compression_id = data[2], data[3]
+            payload = data[HEADER_SIZE:]
+            if compression_id:
+                if compression_id not in self._compressions:
+                    raise ValueError(f"缓存值使用了未安装的压缩方式: {compression_id}")
+                payload = self._compressions[compression_id][1](payload)
+            if serializer_id not in self._serializers:
+                raise ValueError(f"缓存值使用了未安装的序列化方式: {serializer_id}")
+            return self._serializers[serializer_id][1](payload)
+
+        # 旧版：JSON文本
+        if isinstance(data, bytes):
+            try:
+                data = data.decode("utf-8")
+            except UnicodeDecodeError:
+                return data
+        try:
+            return json.loads(data)
+        except (json.JSONDecodeError, TypeError):
+            return data
@@ -67,7 +67,6 @@ class CrawlerConfig:
                 "default_ttl_hours": 12
             },
             "crawler": {
-                "default_request_delay_seconds": 2,
                 "max_concurrent_requests": 5
             }
         }
@@ -323,7 +322,9 @@ class CrawlerConfig:
                     "crawl_strategy": config.get("crawl_strategy", "incremental"),
                     "data_source": config.get("data_source", ""),
                     "cache_ttl_hours": config.get("cache_ttl_hours", 12),
-                    "quota": config.get("quota")
+                    "quota": config.get("quota"),
+                    "depends_on": config.get("depends_on", []),
+                    "fetcher": config.get("fetcher")
                 })
         
         # 按优先级排序
@@ -0,0 +1,103 @@
+"""
+启动爬取计划
+把按数据源配置的启动爬取任务整理成依赖图（DAG）后入队：
+- 使用同一抓取器（数据源配置 fetcher，默认为全部来源）的数据源合并为一个任务，相同来源只抓取一次；
+  未注册的抓取器名称按全部来源处理，避免多个名称各自重复执行全部来源抓取
+- 数据源的 depends_on 转换为抓取任务之间的依赖，被依赖的任务继承依赖方的优先级
+- 没有依赖关系的任务由工作池按优先级并行执行（并发受 worker_concurrency 和数据源并发上限约束），
+  服务启动不等待回填完成
+"""
+
+import logging
+from typing import Any, Collection, Dict, List, NamedTuple
+
+from services.config_loader import CrawlerConfig
+from services.crawl_queue import CrawlQueue
+from services.crawl_worker import ALL_SOURCES, FETCHERS, job_options
+
+logger = logging.getLogger(__name__)
+
+
+class PlannedCrawl(NamedTuple):
+    """计划中的一个抓取任务"""
+    fetcher: str
+    data_types: List[str]
+    priority: int
+    depends_on: List[str]  # 依赖的抓取器
+
+
+def plan_crawl(schedule_tasks: List[Dict[str, Any]], fetchers: Collection[str] = FETCHERS) -> List[PlannedCrawl]:
+    """按抓取器合并调度任务并按依赖排序（拓扑序，同层按优先级）
+
+    Args:
+        schedule_tasks: CrawlerConfig.get_schedule_tasks() 的结果
+        fetchers: 工作池已注册的抓取器名称
+
+    Raises:
+        ValueError: 数据源依赖存在环
+    """
+    fetcher_of: Dict[str, str] = {}
+    for task in schedule_tasks:
+        fetcher = task.get("fetcher") or ALL_SOURCES
+        if fetcher not in fetchers:
+            logger.warning(f"数据源 {task['task_key']} 配置的抓取器 {fetcher} 未注册，改用 {ALL_SOURCES}")
+            fetcher = ALL_SOURCES
+        fetcher_of[task["task_key"]] = fetcher
+    nodes: Dict[str, Dict[str, Any]] = {}
+    for task in schedule_tasks:
+        fetcher = fetcher_of[task["task_key"]]
+        node = nodes.setdefault(fetcher, {"data_types": [], "priority": task.get("priority", 10), "depends_on": set()})
+        node["data_types"].append(task["task_key"])
+        node["priority"] = min(node["priority"], task.get("priority", 10))
+        for dependency in task.get("depends_on") or []:
+            if dependency not in fetcher_of:
+                logger.warning(f"数据源 {task['task_key']} 依赖的 {dependency} 未启用，忽略该依赖")
+            elif fetcher_of[dependency] != fetcher:
+                node["depends_on"].add(fetcher_of[dependency])
+
+    # Kahn 拓扑排序，可执行的节点中优先级高的先出
+    remaining = {fetcher: set(node["depends_on"]) for fetcher, node in nodes.items()}
+    order: List[str] = []
+    while remaining:
+        ready = [fetcher for fetcher, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"数据源依赖存在环: {sorted(remaining)}")
+        ready.sort(key=lambda fetcher: nodes[fetcher]["priority"])
+        order.append(ready[0])
+        del remaining[ready[0]]
+        for deps in remaining.values():
+            deps.discard(ready[0])
+
+    # 被依赖的任务至少与依赖方同样优先（逆拓扑序传递）
+    for fetcher in reversed(order):
+        for dependency in nodes[fetcher]["depends_on"]:
+            nodes[dependency]["priority"] = min(nodes[dependency]["priority"], nodes[fetcher]["priority"])
+
+    return [
+        PlannedCrawl(fetcher, nodes[fetcher]["data_types"], nodes[fetcher]["priority"], sorted(nodes[fetcher]["depends_on"]))
+        for fetcher in order
+    ]
+
+
+def enqueue_plan(queue: CrawlQueue, config: CrawlerConfig, plan: List[PlannedCrawl], force: bool = False) -> Dict[str, str]:
+    """按拓扑序入队计划中的任务（同一抓取器已在排队或执行时复用已有任务）
+
+    Returns:
+        {抓取器: 任务ID}
+    """
+    job_ids: Dict[str, str] = {}
+    for planned in plan:
+        options = job_options(config, planned.data_types[0])
+        job_ids[planned.fetcher] = queue.enqueue(
+            planned.fetcher,
+            priority=planned.priority,
+            payload={
+                "force": force,
+                "crawl_mode": "full" if force else "incremental",
+                "data_types": planned.data_types,
+            },
+            max_attempts=options["max_attempts"],
+            unique=True,
+            depends_on=[job_ids[dependency] for dependency in planned.depends_on]
+        )
+    return job_ids
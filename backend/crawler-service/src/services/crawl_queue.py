@@ -0,0 +1,375 @@
+"""
+持久化爬取任务队列
+任务存放在本地SQLite（WAL模式），API进程只负责入队和查询状态，
+由 services.crawl_worker 中的工作池（独立线程或独立进程）领取执行。
+
+- 按优先级领取（数值越小越优先，与 crawler_config.json 的 priority 一致）
+- 每个数据源的并发上限在领取时检查
+- 任务可依赖其他任务，依赖全部完成后才可领取；依赖最终失败时一并标记失败
+- 失败后按指数退避重新入队，超过最大次数标记为失败
+- 执行中的任务持有租约，工作进程崩溃后租约过期的任务按失败处理（计入执行次数，退避后重试或标记失败）
+"""
+
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(ts).isoformat() if ts else None
+
+
+class CrawlQueue:
+    """SQLite持久化任务队列（可被多个线程、多个进程共享）
+
+    Args:
+        db_path: 数据库文件路径，默认 CRAWL_QUEUE_PATH 或爬虫服务目录下的 crawl_queue.db
+        backoff_base: 首次重试的退避秒数
+        backoff_max: 退避上限（秒）
+    """
+
+    PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    }
+
+    def __init__(self, db_path: str = None, backoff_base: float = 30.0, backoff_max: float = 1800.0):
+        self.db_path = db_path or os.getenv("CRAWL_QUEUE_PATH") or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            "crawl_queue.db"
+        )
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # 每个线程复用一个连接
+        self._local = threading.local()
+        self._init_db()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 自动提交模式，写事务显式 BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            for name, value in self.PRAGMAS.items():
+                conn.execute(f"PRAGMA {name}={value}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._get_conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _init_db(self):
+        conn = self._get_conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_jobs (
+                id TEXT PRIMARY KEY,
+                task_type TEXT NOT NULL,
+                source TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 10,
+                payload TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 1,
+                available_at REAL NOT NULL,
+                lease_until REAL,
+                worker_id TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                completed_at REAL,
+                result TEXT,
+                error_message TEXT,
+                depends_on TEXT NOT NULL DEFAULT '[]'
+            )
+        ''')
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(crawl_jobs)")}
+        if "depends_on" not in columns:
+            conn.execute("ALTER TABLE crawl_jobs ADD COLUMN depends_on TEXT NOT NULL DEFAULT '[]'")
+        # 领取：按状态、优先级、可执行时间扫描
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_crawl_jobs_claim ON crawl_jobs(status, priority, available_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_crawl_jobs_task_type ON crawl_jobs(task_type, status)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_crawl_jobs_created ON crawl_jobs(created_at DESC)')
+
+    # ==================== 入队 ====================
+
+    def enqueue(
+        self,
+        task_type: str,
+        source: Optional[str] = None,
+        priority: int = 10,
+        payload: Optional[Dict[str, Any]] = None,
+        max_attempts: int = 1,
+        unique: bool = False,
+        depends_on: Optional[List[str]] = None
+    ) -> str:
+        """添加任务，返回任务ID
+
+        Args:
+            task_type: 任务类型（数据源名称或 "all"）
+            source: 并发限制所属的数据源，默认与 task_type 相同
+            priority: 优先级，数值越小越先执行
+            payload: 传给执行函数的参数
+            max_attempts: 最多执行次数（含首次）
+            unique: 同类型任务已在排队或执行时不重复添加，返回已有任务ID
+            depends_on: 依赖的任务ID，全部完成后才可领取
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            if unique:
+                row = conn.execute(
+                    "SELECT id FROM crawl_jobs WHERE task_type = ? AND status IN (?, ?) LIMIT 1",
+                    (task_type, *ACTIVE_STATUSES)
+                ).fetchone()
+                if row:
+                    return row["id"]
+            job_id = str(uuid.uuid4())
+            conn.execute(
+                '''INSERT INTO crawl_jobs (id, task_type, source, priority, payload, status,
+                                           max_attempts, available_at, created_at, depends_on)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                (job_id, task_type, source or task_type, priority, json.dumps(payload or {}),
+                 QUEUED, max(1, max_attempts), now, now, json.dumps(depends_on or []))
+            )
+        return job_id
+
+    # ==================== 工作进程接口 ====================
+
+    def claim(
+        self,
+        worker_id: str,
+        source_limits: Optional[Dict[str, int]] = None,
+        default_limit: int = 1,
+        lease_seconds: float = 600.0
+    ) -> Optional[Dict[str, Any]]:
+        """领取一个可执行的任务（优先级最高、依赖已完成、且所属数据源未达并发上限），没有时返回None"""
+        source_limits = source_limits or {}
+        now = time.time()
+        with self._transaction() as conn:
+            running = {
+                row["source"]: row["n"] for row in conn.execute(
+                    "SELECT source, COUNT(*) AS n FROM crawl_jobs WHERE status = ? GROUP BY source", (RUNNING,)
+                )
+            }
+            full = [s for s, n in running.items() if n >= source_limits.get(s, default_limit)]
+            excluded = f"AND source NOT IN ({','.join('?' * len(full))})" if full else ""
+            row = conn.execute(
+                f'''SELECT * FROM crawl_jobs j
+                    WHERE status = ? AND available_at <= ? {excluded}
+                      AND NOT EXISTS (
+                          SELECT 1 FROM json_each(j.depends_on) d
+                          JOIN crawl_jobs dep ON dep.id = d.value
+                          WHERE dep.status != ?
+                      )
+                    ORDER BY priority, available_at, created_at
+                    LIMIT 1''',
+                (QUEUED, now, *full, COMPLETED)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                '''UPDATE crawl_jobs
+                   SET status = ?, attempts = attempts + 1, worker_id = ?, lease_until = ?,
+                       started_at = ?, error_message = NULL
+                   WHERE id = ?''',
+                (RUNNING, worker_id, now + lease_seconds, now, row["id"])
+            )
+        job = self._to_dict(row)
+        job.update(status=RUNNING, attempts=job["attempts"] + 1, worker_id=worker_id,
+                   started_at=_iso(now), lease_until=_iso(now + lease_seconds), error_message=None)
+        return job
+
+    # 心跳、完成、失败和放回只对仍由该工作进程持有的任务生效：租约过期后任务可能已被回收
+    # 并由其他工作进程重新领取，原工作进程迟到的结果不能覆盖新一次执行的状态
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = 600.0) -> bool:
+        """延长执行中任务的租约
+
+        Returns:
+            是否仍持有该任务
+        """
+        cursor = self._get_conn().execute(
+            "UPDATE crawl_jobs SET lease_until = ? WHERE id = ? AND status = ? AND worker_id = ?",
+            (time.time() + lease_seconds, job_id, RUNNING, worker_id)
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: str, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """记录完成
+
+        Returns:
+            是否已记录（不再持有该任务时忽略）
+        """
+        cursor = self._get_conn().execute(
+            '''UPDATE crawl_jobs SET status = ?, completed_at = ?, lease_until = NULL, result = ?
+               WHERE id = ? AND status = ? AND worker_id = ?''',
+            (COMPLETED, time.time(), json.dumps(result or {}, ensure_ascii=False), job_id, RUNNING, worker_id)
+        )
+        if cursor.rowcount == 0:
+            logger.warning(f"爬取任务已不由 {worker_id} 持有，忽略完成结果: {job_id}")
+            return False
+        return True
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """记录失败；未超过最大次数时退避后重新入队（不再持有该任务时忽略）
+
+        Returns:
+            是否会重试
+        """
+        with self._transaction() as conn:
+            owned = conn.execute(
+                "SELECT 1 FROM crawl_jobs WHERE id = ? AND status = ? AND worker_id = ?",
+                (job_id, RUNNING, worker_id)
+            ).fetchone()
+            if owned is None:
+                logger.warning(f"爬取任务已不由 {worker_id} 持有，忽略失败结果: {job_id} - {error}")
+                return False
+            return self._fail(conn, job_id, error, time.time())
+
+    def _fail(self, conn: sqlite3.Connection, job_id: str, error: str, now: float) -> bool:
+        row = conn.execute("SELECT attempts, max_attempts FROM crawl_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return False
+        if row["attempts"] < row["max_attempts"]:
+            delay = self.backoff_delay(row["attempts"])
+            conn.execute(
+                '''UPDATE crawl_jobs SET status = ?, available_at = ?, lease_until = NULL, error_message = ?
+                   WHERE id = ?''',
+                (QUEUED, now + delay, error, job_id)
+            )
+            logger.warning(f"爬取任务失败，{delay:.0f}秒后重试({row['attempts']}/{row['max_attempts']}): {job_id} - {error}")
+            return True
+        conn.execute(
+            '''UPDATE crawl_jobs SET status = ?, completed_at = ?, lease_until = NULL, error_message = ?
+               WHERE id = ?''',
+            (FAILED, now, error, job_id)
+        )
+        self._fail_dependents(conn, job_id, now)
+        return False
+
+    def _fail_dependents(self, conn: sqlite3.Connection, job_id: str, now: float):
+        """依赖最终失败的任务无法再执行，递归标记为失败"""
+        pending = [job_id]
+        while pending:
+            failed_id = pending.pop()
+            rows = conn.execute(
+                '''SELECT j.id FROM crawl_jobs j, json_each(j.depends_on) d
+                   WHERE d.value = ? AND j.status = ?''',
+                (failed_id, QUEUED)
+            ).fetchall()
+            for row in rows:
+                conn.execute(
+                    "UPDATE crawl_jobs SET status = ?, completed_at = ?, error_message = ? WHERE id = ?",
+                    (FAILED, now, f"依赖任务失败: {failed_id}", row["id"])
+                )
+                pending.append(row["id"])
+
+    def release(self, job_id: str, worker_id: str):
+        """工作池停止时把执行中的任务放回队列（不计入失败次数）"""
+        self._get_conn().execute(
+            '''UPDATE crawl_jobs SET status = ?, attempts = MAX(attempts - 1, 0), lease_until = NULL,
+                                     available_at = ?
+               WHERE id = ? AND status = ? AND worker_id = ?''',
+            (QUEUED, time.time(), job_id, RUNNING, worker_id)
+        )
+
+    def requeue_expired(self) -> int:
+        """租约过期的执行中任务（工作进程已退出）按失败处理：未超过最大次数的退避后重新入队，否则标记为失败
+
+        Returns:
+            处理的任务数
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id FROM crawl_jobs WHERE status = ? AND lease_until < ?", (RUNNING, now)
+            ).fetchall()
+            retried = sum(self._fail(conn, row["id"], "租约过期，执行任务的工作进程已退出", now) for row in rows)
+        if rows:
+            logger.warning(f"{len(rows)}个爬取任务租约过期: {retried}个重新入队，{len(rows) - retried}个标记为失败")
+        return len(rows)
+
+    def backoff_delay(self, attempts: int) -> float:
+        """第 attempts 次失败后的退避时间：指数增长并加随机抖动"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** max(0, attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    # ==================== 状态查询 ====================
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._get_conn().execute("SELECT * FROM crawl_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, task_type: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if task_type:
+            conditions.append("task_type = ?")
+            params.append(task_type)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._get_conn().execute(
+            f"SELECT * FROM crawl_jobs {where} ORDER BY created_at DESC LIMIT ?", (*params, limit)
+        ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        conn = self._get_conn()
+        by_status = {row["status"]: row["n"] for row in conn.execute(
+            "SELECT status, COUNT(*) AS n FROM crawl_jobs GROUP BY status"
+        )}
+        running = {row["source"]: row["n"] for row in conn.execute(
+            "SELECT source, COUNT(*) AS n FROM crawl_jobs WHERE status = ? GROUP BY source", (RUNNING,)
+        )}
+        return {
+            "db_path": self.db_path,
+            "by_status": {status: by_status.get(status, 0) for status in (QUEUED, RUNNING, COMPLETED, FAILED)},
+            "running_by_source": running,
+        }
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"] or "{}")
+        job["depends_on"] = json.loads(job["depends_on"] or "[]")
+        result = json.loads(job.pop("result") or "{}")
+        job.update({
+            "records_crawled": result.get("records_crawled", 0),
+            "records_saved": result.get("records_saved", 0),
+            "message": result.get("message"),
+            "ingest_stats": result.get("ingest_stats"),
+        })
+        for field in ("available_at", "lease_until", "created_at", "started_at", "completed_at"):
+            job[field] = _iso(job[field])
+        return job
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
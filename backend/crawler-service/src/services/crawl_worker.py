@@ -0,0 +1,283 @@
+"""
+爬取任务工作池
+从 CrawlQueue 领取任务并执行，运行在独立线程（自己的事件循环）或独立进程中，
+爬取和入库不占用API请求处理的事件循环。
+
+独立进程运行（API进程设置 CRAWL_WORKER_MODE=external）：
+    python -m services.crawl_worker
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.config_loader import CrawlerConfig, get_crawler_config
+from services.crawl_queue import CrawlQueue
+
+logger = logging.getLogger(__name__)
+
+# 手动触发的任务优先于按配置调度的任务
+MANUAL_PRIORITY = 0
+ALL_SOURCES = "all"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def job_options(config: CrawlerConfig, task_type: str) -> Dict[str, Any]:
+    """按 crawler_config.json 计算任务的优先级和最多执行次数"""
+    crawler_settings = config.get_crawler_config()
+    retries = crawler_settings.get("max_retries", 3) if crawler_settings.get("retry_on_failure", True) else 0
+    source_config = config.get_data_source_config(task_type) or {}
+    return {
+        "priority": source_config.get("priority", MANUAL_PRIORITY if task_type == ALL_SOURCES else 10),
+        "max_attempts": retries + 1,
+    }
+
+
+def source_limits(config: CrawlerConfig) -> Dict[str, int]:
+    """每个数据源同时执行的任务数上限（数据源配置 max_concurrent_jobs，默认1）"""
+    return {
+        key: int(source.get("max_concurrent_jobs", 1))
+        for key, source in config.get_all_data_sources().items()
+    }
+
+
+# CrawlJobRunner 注册的抓取器名称（数据源配置的 fetcher 只能取这些值，入队计划时据此校验）
+FETCHERS = (ALL_SOURCES,)
+
+
+def enqueue_crawl(
+    queue: CrawlQueue,
+    config: CrawlerConfig,
+    task_type: str = ALL_SOURCES,
+    force: bool = False,
+    priority: Optional[int] = None,
+    unique: bool = False
+) -> str:
+    """按配置入队一个爬取任务，返回任务ID"""
+    options = job_options(config, task_type)
+    if priority is not None:
+        options["priority"] = priority
+    return queue.enqueue(
+        task_type,
+        priority=options["priority"],
+        payload={"force": force, "crawl_mode": "full" if force else "incremental"},
+        max_attempts=options["max_attempts"],
+        unique=unique
+    )
+
+
+class CrawlJobRunner:
+    """默认任务执行函数：按任务类型选择抓取器，抓取结果写入本地数据库
+
+    已注册的抓取器见 FETCHERS，未单独注册抓取器的任务类型（数据源名称）执行全部来源抓取。
+    爬虫实例按任务创建（aiohttp会话属于执行任务的事件循环），数据管理器在工作池内共享。
+    """
+
+    def __init__(self, data_manager=None):
+        self._data_manager = data_manager
+        self.fetchers: Dict[str, Callable[[], Awaitable[list]]] = {ALL_SOURCES: self.crawl_all_sources}
+
+    @property
+    def data_manager(self):
+        if self._data_manager is None:
+            from services.data_manager import MajorDataManager
+            self._data_manager = MajorDataManager()
+        return self._data_manager
+
+    @staticmethod
+    async def crawl_all_sources() -> list:
+        from services.crawler import MajorDataCrawler
+
+        return await MajorDataCrawler().crawl_all_sources()
+
+    async def __call__(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        fetch = self.fetchers.get(job["task_type"], self.crawl_all_sources)
+        new_data = await fetch()
+        if not new_data:
+            return {"records_crawled": 0, "records_saved": 0, "message": "未获取到新数据"}
+        ingest_stats = await asyncio.to_thread(self.data_manager.ingest, new_data)
+        logger.info(f"爬虫任务完成 {job['task_type']}: 获取{len(new_data)}条，保存{ingest_stats['saved']}条")
+        return {"records_crawled": len(new_data), "records_saved": ingest_stats["saved"], "ingest_stats": ingest_stats}
+
+    def close(self):
+        if self._data_manager is not None:
+            self._data_manager.close()
+
+
+class CrawlWorkerPool:
+    """爬取任务工作池
+
+    Args:
+        queue: 任务队列
+        handler: 任务执行函数，返回结果字典（records_crawled / records_saved / message / ingest_stats）
+        concurrency: 同时执行的任务数
+        source_limits: {数据源: 并发上限}，未配置的数据源为1
+        poll_interval: 队列为空或访问队列出错时的等待间隔（秒）
+        lease_seconds: 任务租约，执行期间每 lease_seconds/3 续约一次，
+            同时按该间隔回收其他工作进程遗留的租约过期任务
+    """
+
+    def __init__(
+        self,
+        queue: CrawlQueue,
+        handler: JobHandler,
+        concurrency: int = 2,
+        source_limits: Optional[Dict[str, int]] = None,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 600.0
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.source_limits = source_limits or {}
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"completed": 0, "failed": 0, "retried": 0, "errors": 0}
+
+    @classmethod
+    def from_config(cls, queue: CrawlQueue, handler: JobHandler, config: Optional[CrawlerConfig] = None) -> "CrawlWorkerPool":
+        config = config or get_crawler_config()
+        crawler_settings = config.get_crawler_config()
+        queue.backoff_base = float(crawler_settings.get("retry_backoff_seconds", queue.backoff_base))
+        return cls(
+            queue,
+            handler,
+            concurrency=int(os.getenv("CRAWL_WORKER_CONCURRENCY", crawler_settings.get("worker_concurrency", 2))),
+            source_limits=source_limits(config),
+            lease_seconds=float(crawler_settings.get("job_lease_seconds", 600)),
+        )
+
+    # ==================== 运行 ====================
+
+    async def run(self):
+        """在当前事件循环中运行，直到 stop()"""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        logger.info(f"爬取工作池启动: {self.worker_id}, 并发={self.concurrency}")
+        workers = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        workers.append(asyncio.create_task(self._requeue_expired()))
+        try:
+            await self._stopping.wait()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            logger.info("爬取工作池已停止")
+
+    def start(self):
+        """在独立线程（独立事件循环）中运行"""
+        if self._thread is not None:
+            return
+        started = threading.Event()
+
+        def target():
+            async def main():
+                run = asyncio.create_task(self.run())
+                await asyncio.sleep(0)
+                started.set()
+                await run
+            asyncio.run(main())
+
+        self._thread = threading.Thread(target=target, name="crawl-worker-pool", daemon=True)
+        self._thread.start()
+        started.wait(timeout=5)
+
+    def stop(self, timeout: float = 10.0):
+        """停止工作池，执行中的任务放回队列"""
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    async def _worker(self, index: int):
+        worker_id = f"{self.worker_id}#{index}"
+        while True:
+            try:
+                job = await asyncio.to_thread(self.queue.claim, worker_id, self.source_limits, 1, self.lease_seconds)
+                if job is None:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                await self._execute(job)
+            except Exception as e:
+                # 如队列数据库锁等待超时；未能记录结果的任务在租约过期后回收
+                self.stats["errors"] += 1
+                logger.error(f"爬取工作协程出错 {worker_id}: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _requeue_expired(self):
+        """定期回收租约过期的任务（启动时立即执行一次）"""
+        while True:
+            try:
+                await asyncio.to_thread(self.queue.requeue_expired)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"回收租约过期任务失败: {e}")
+            await asyncio.sleep(self.lease_seconds / 3)
+
+    async def _execute(self, job: Dict[str, Any]):
+        job_id, worker_id = job["id"], job["worker_id"]
+        logger.info(f"开始执行爬取任务: {job['task_type']} ({job_id}, 第{job['attempts']}次)")
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, worker_id))
+        try:
+            result = await self.handler(job)
+        except asyncio.CancelledError:
+            await asyncio.shield(asyncio.to_thread(self.queue.release, job_id, worker_id))
+            raise
+        except Exception as e:
+            logger.error(f"爬取任务失败 {job['task_type']}: {e}")
+            if await asyncio.to_thread(self.queue.fail, job_id, worker_id, str(e)):
+                self.stats["retried"] += 1
+            else:
+                self.stats["failed"] += 1
+        else:
+            if await asyncio.to_thread(self.queue.complete, job_id, worker_id, result):
+                self.stats["completed"] += 1
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str, worker_id: str):
+        """定期续约；续约出错时记录后继续（连续出错到租约过期，任务才会被回收）"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await asyncio.to_thread(self.queue.heartbeat, job_id, worker_id, self.lease_seconds):
+                    logger.warning(f"爬取任务租约已失效，停止续约: {job_id} ({worker_id})")
+                    return
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"爬取任务续约失败 {job_id}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "running": self._thread is not None or (self._stopping is not None and not self._stopping.is_set()),
+            "concurrency": self.concurrency,
+            "source_limits": self.source_limits,
+            **self.stats,
+        }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    queue = CrawlQueue()
+    runner = CrawlJobRunner()
+    pool = CrawlWorkerPool.from_config(queue, runner)
+    try:
+        asyncio.run(pool.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.close()
+
+
+if __name__ == "__main__":
+    main()
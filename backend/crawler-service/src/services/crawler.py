@@ -11,6 +11,8 @@ import random
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from .fetch_scheduler import get_fetch_scheduler
+
 logger = logging.getLogger(__name__)
 
 class MajorDataCrawler:
@@ -87,26 +89,12 @@ class MajorDataCrawler:
                 # 查找专业信息链接（根据实际页面结构调整选择器）
                 major_links = soup.select('a[href*="/special/"]')[:20]  # 限制爬取数量避免被封
                 
-                for link in major_links:
-                    try:
-                        major_url = base_url + link.get('href', '')
-                        major_name = link.get_text(strip=True)
-                        
-                        # 爬取专业详情页面
-                        major_detail_html = await self._fetch_with_retry(major_url)
-                        if major_detail_html:
-                            major_data = self._parse_major_detail(
-                                major_detail_html, major_name, major_url
-                            )
-                            if major_data:
-                                data.append(major_data)
-                                
-                        # 遵守爬虫礼貌，避免请求过于频繁
-                        await asyncio.sleep(random.uniform(2, 5))
-                        
-                    except Exception as e:
-                        logger.warning(f"爬取专业 {major_name} 失败: {e}")
-                        continue
+                # 详情页并发请求，请求频率由抓取调度器按主机限制
+                details = await asyncio.gather(*[
+                    self._crawl_major_detail(base_url + link.get('href', ''), link.get_text(strip=True))
+                    for link in major_links
+                ])
+                data.extend(major_data for major_data in details if major_data)
             
             logger.info(f"阳光高考真实数据获取完成: {len(data)} 条")
             
@@ -115,6 +103,16 @@ class MajorDataCrawler:
         
         return data
     
+    async def _crawl_major_detail(self, major_url: str, major_name: str) -> Optional[Dict]:
+        """爬取并解析单个专业详情页面"""
+        try:
+            major_detail_html = await self._fetch_with_retry(major_url)
+            if major_detail_html:
+                return self._parse_major_detail(major_detail_html, major_name, major_url)
+        except Exception as e:
+            logger.warning(f"爬取专业 {major_name} 失败: {e}")
+        return None
+    
     async def crawl_edu_online(self) -> List[Dict]:
         """爬取中国教育在线数据"""
         logger.info("开始爬取中国教育在线数据...")
@@ -232,29 +230,18 @@ class MajorDataCrawler:
         headers: Dict = None,
         max_retries: int = 3
     ) -> Optional[str]:
-        """带重试的HTTP请求"""
-        for attempt in range(max_retries):
-            try:
-                await asyncio.sleep(random.uniform(1, 3))  # 随机延迟
-                
-                req_headers = {
-                    "User-Agent": random.choice(self.user_agents),
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                    "Accept-Language": "zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3",
-                }
-                if headers:
-                    req_headers.update(headers)
-                
-                async with self.session.get(url, headers=req_headers) as response:
-                    if response.status == 200:
-                        return await response.text()
-                    else:
-                        logger.warning(f"请求失败，状态码: {response.status}")
-                        
-            except Exception as e:
-                logger.warning(f"请求异常 (尝试 {attempt + 1}/{max_retries}): {e}")
+        """带重试的HTTP请求（按主机限速、429/5xx退避重试）"""
+        req_headers = {
+            "User-Agent": random.choice(self.user_agents),
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3",
+        }
+        if headers:
+            req_headers.update(headers)
         
-        return None
+        return await get_fetch_scheduler().fetch(
+            self.session, url, headers=req_headers, max_attempts=max_retries
+        )
     
     def _extract_category(self, soup) -> str:
         """提取专业类别"""
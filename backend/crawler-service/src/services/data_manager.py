@@ -3,6 +3,8 @@ import os
 import sys
 import logging
 import sqlite3
+import threading
+import time
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import json
@@ -10,6 +12,10 @@ import json
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from quota_manager import quota_manager
+from shared.utils.pagination import (
+    SortKey, TOTAL_EXACT, TOTAL_ESTIMATE, TOTAL_NONE,
+    encode_cursor, decode_cursor, keyset_condition, validate_total_mode
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,11 +24,31 @@ class MajorDataManager:
     
     MAX_RECORDS = 10000
     
+    # 连接级PRAGMA：WAL模式下读不阻塞写，爬虫写入时API读请求仍可并发
+    PRAGMAS = {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "cache_size": int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000")) * -1,   # 负数表示KB
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        "temp_store": "MEMORY",
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    }
+    
+    # 每个连接缓存的预编译语句数量
+    CACHED_STATEMENTS = 256
+    
     def __init__(self, db_path: str = None):
-        self.db_path = db_path or os.path.join(
+        # 默认 MARKET_DATA_DB_PATH 或爬虫服务目录下的 market_data.db
+        self.db_path = db_path or os.getenv("MARKET_DATA_DB_PATH") or os.path.join(
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
             "market_data.db"
         )
+        # 每个线程复用一个连接
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # {分类: (条数, 统计时间)}，用于估算总数
+        self._count_cache: Dict[Optional[str], Tuple[int, float]] = {}
         self._init_db()
     
     def _init_db(self):
@@ -56,26 +82,84 @@ class MajorDataManager:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_crawled_at ON major_market_data(crawled_at DESC)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_major_name ON major_market_data(major_name)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON major_market_data(category)')
+        # 游标分页按 (排序字段, id) 定位，id 为 rowid 已隐含在索引中
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_heat_index ON major_market_data(heat_index)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_employment_rate ON major_market_data(employment_rate)')
         
         conn.commit()
-        conn.close()
         logger.info(f"数据库初始化完成: {self.db_path}")
     
     def _get_conn(self) -> sqlite3.Connection:
-        """获取数据库连接"""
-        return sqlite3.connect(self.db_path)
+        """获取当前线程的数据库连接（首次调用时创建并设置PRAGMA）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, cached_statements=self.CACHED_STATEMENTS)
+            for name, value in self.PRAGMAS.items():
+                conn.execute(f"PRAGMA {name}={value}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self):
+        """关闭所有线程的数据库连接（服务关闭时调用）"""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.ProgrammingError:
+                    # 其他线程创建的连接只能在创建线程中关闭
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+    
+    # 单条 IN 查询携带的最大参数个数（SQLite默认上限999）
+    URL_PROBE_CHUNK = 500
+    
+    INSERT_SQL = '''
+        INSERT OR IGNORE INTO major_market_data (
+            title, major_name, category, source_url, source_website,
+            employment_rate, avg_salary, admission_score, heat_index,
+            trend_data, description, courses, career_prospects
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    TRIM_SQL = '''
+        DELETE FROM major_market_data
+        WHERE id IN (
+            SELECT id FROM major_market_data
+            ORDER BY crawled_at ASC
+            LIMIT MAX(0, (SELECT COUNT(*) FROM major_market_data) - ?)
+        )
+    '''
     
     def save_crawled_data(self, new_data: List[Dict]) -> int:
+        """保存爬取的数据，返回保存条数（见 ingest）"""
+        return self.ingest(new_data)["saved"]
+    
+    def ingest(self, new_data: List[Dict]) -> Dict:
         """
         保存爬取的数据，并确保数据库不超过最大记录数
-        策略：
-        1. 配额检查（每个学科最多100条，总共不超过10000条）
-        2. 去重（根据URL+标题）
-        3. 插入新数据
-        4. 如果超过10000条，删除最旧的记录
+        策略（批量模式）：
+        1. 一次性探测本批数据中已存在的URL
+        2. 内存中完成配额检查与去重（每个学科最多100条，总共不超过10000条）
+        3. 单个事务内 executemany 批量插入
+        4. 一条有界DELETE删除超出10000条的最旧记录
+        
+        Returns:
+            本批入库统计：保存/跳过/清理条数和各阶段耗时（timings_ms）
         """
+        stats = {
+            "received": len(new_data),
+            "saved": 0,
+            "skipped_quota": 0,
+            "skipped_duplicate": 0,
+            "trimmed": 0,
+            "timings_ms": {}
+        }
         if not new_data:
-            return 0
+            return stats
+        timings = stats["timings_ms"]
         
         # 获取分配计划
         quota_plan = quota_manager.get_distribution_plan(len(new_data))
@@ -84,113 +168,143 @@ class MajorDataManager:
         conn = self._get_conn()
         cursor = conn.cursor()
         
-        saved_count = 0
-        
         try:
+            # 1. 批量探测已存在的URL
+            started = time.perf_counter()
+            existing_urls = self._probe_existing_urls(
+                cursor, {item.get('source_url', '') for item in new_data} - {None}
+            )
+            timings["probe"] = round((time.perf_counter() - started) * 1000, 2)
+            
+            # 2. 配额检查 + 去重（内存）
+            started = time.perf_counter()
+            rows = []
             for item in new_data:
                 category = item.get('category', '未知')
                 
-                # 1. 配额检查
                 if not quota_manager.can_crawl(category):
                     logger.info(f"学科 {category} 已达配额上限，跳过")
+                    stats["skipped_quota"] += 1
                     continue
                 
-                # 2. 去重检查
-                cursor.execute(
-                    "SELECT id FROM major_market_data WHERE source_url = ?",
-                    (item.get('source_url', ''),)
-                )
-                if cursor.fetchone():
+                url_key = item.get('source_url', '')
+                if url_key is not None and url_key in existing_urls:
+                    stats["skipped_duplicate"] += 1
                     continue
                 
-                # 3. 分配配额
                 if not quota_manager.allocate_quota(category):
                     logger.info(f"无法为学科 {category} 分配配额，跳过")
+                    stats["skipped_quota"] += 1
                     continue
                 
-                # 4. 插入数据
                 try:
-                    cursor.execute('''
-                        INSERT INTO major_market_data (
-                            title, major_name, category, source_url, source_website,
-                            employment_rate, avg_salary, admission_score, heat_index,
-                            trend_data, description, courses, career_prospects
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        item.get('title', ''),
-                        item.get('major_name'),
-                        category,
-                        item.get('source_url'),
-                        item.get('source_website'),
-                        item.get('employment_rate'),
-                        item.get('avg_salary'),
-                        item.get('admission_score'),
-                        item.get('heat_index'),
-                        json.dumps(item.get('trend_data')) if item.get('trend_data') else None,
-                        item.get('description'),
-                        json.dumps(item.get('courses')) if item.get('courses') else None,
-                        item.get('career_prospects')
-                    ))
-                    
-                    saved_count += 1
-                    
-                except sqlite3.IntegrityError:
-                    # URL重复，跳过
-                    continue
+                    rows.append(self._to_row(item, category))
                 except Exception as e:
                     logger.error(f"保存单条数据失败: {e}")
                     continue
+                
+                # 本批次内相同URL只保存第一条
+                if item.get('source_url') is not None:
+                    existing_urls.add(item['source_url'])
+            timings["quota"] = round((time.perf_counter() - started) * 1000, 2)
             
+            # 3. 批量插入（单事务）
+            started = time.perf_counter()
+            changes_before = conn.total_changes
+            try:
+                cursor.executemany(self.INSERT_SQL, rows)
+            except sqlite3.Error as e:
+                # 批量失败时逐条插入，跳过有问题的记录（已插入的会被 OR IGNORE 忽略）
+                logger.warning(f"批量插入失败，改为逐条插入: {e}")
+                for row in rows:
+                    try:
+                        cursor.execute(self.INSERT_SQL, row)
+                    except sqlite3.Error as row_error:
+                        logger.error(f"保存单条数据失败: {row_error}")
+            stats["saved"] = conn.total_changes - changes_before
+            timings["insert"] = round((time.perf_counter() - started) * 1000, 2)
+            
+            # 4. 清理旧数据（确保总数不超过10000）
+            started = time.perf_counter()
+            cursor.execute(self.TRIM_SQL, (self.MAX_RECORDS,))
+            stats["trimmed"] = cursor.rowcount
+            timings["trim"] = round((time.perf_counter() - started) * 1000, 2)
+            
+            started = time.perf_counter()
             conn.commit()
-            logger.info(f"成功保存 {saved_count} 条数据")
+            self._count_cache.clear()
+            timings["commit"] = round((time.perf_counter() - started) * 1000, 2)
             
-            # 检查并清理旧数据（确保总数不超过10000）
-            self.ensure_max_records(cursor)
-            self.ensure_max_records(cursor)
+            logger.info(f"成功保存 {stats['saved']} 条数据")
+            if stats["trimmed"] > 0:
+                logger.info(f"已清理 {stats['trimmed']} 条旧数据，当前数据库最多保留 {self.MAX_RECORDS} 条最新记录")
+            logger.info(f"批量入库统计: {stats}")
             
         except Exception as e:
             logger.error(f"保存数据失败: {e}")
             conn.rollback()
-        finally:
-            conn.close()
+            stats["saved"] = 0
         
-        return saved_count
+        return stats
+    
+    def _probe_existing_urls(self, cursor, urls: set) -> set:
+        """分批查询本批URL中已存在于数据库的部分"""
+        urls = list(urls)
+        existing = set()
+        for i in range(0, len(urls), self.URL_PROBE_CHUNK):
+            chunk = urls[i:i + self.URL_PROBE_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT source_url FROM major_market_data WHERE source_url IN ({placeholders})",
+                chunk
+            )
+            existing.update(row[0] for row in cursor.fetchall())
+        return existing
+    
+    @staticmethod
+    def _to_row(item: Dict, category: str) -> tuple:
+        """爬取数据转换为插入参数"""
+        return (
+            item.get('title', ''),
+            item.get('major_name'),
+            category,
+            item.get('source_url'),
+            item.get('source_website'),
+            item.get('employment_rate'),
+            item.get('avg_salary'),
+            item.get('admission_score'),
+            item.get('heat_index'),
+            json.dumps(item.get('trend_data')) if item.get('trend_data') else None,
+            item.get('description'),
+            json.dumps(item.get('courses')) if item.get('courses') else None,
+            item.get('career_prospects')
+        )
     
     def ensure_max_records(self, cursor = None):
-        """确保数据库中只有最新的10000条数据"""
+        """确保数据库中只有最新的10000条数据（一条有界DELETE完成）"""
         conn = cursor.connection if cursor else self._get_conn()
-        needs_close = cursor is None
+        external_cursor = cursor is not None
         
-        if needs_close:
+        if not external_cursor:
             cursor = conn.cursor()
         
         try:
-            cursor.execute("SELECT COUNT(*) FROM major_market_data")
-            current_count = cursor.fetchone()[0]
-            
-            if current_count > self.MAX_RECORDS:
-                excess = current_count - self.MAX_RECORDS
-                
-                # 删除最旧的excess条记录
-                cursor.execute('''
-                    DELETE FROM major_market_data
-                    WHERE id IN (
-                        SELECT id FROM major_market_data
-                        ORDER BY crawled_at ASC
-                        LIMIT ?
-                    )
-                ''', (excess,))
-                
-                conn.commit()
-                logger.info(f"已清理 {excess} 条旧数据，当前数据库共有 {min(current_count, self.MAX_RECORDS)} 条最新记录")
+            cursor.execute(self.TRIM_SQL, (self.MAX_RECORDS,))
+            deleted = cursor.rowcount
+            conn.commit()
+            self._count_cache.clear()
+            if deleted > 0:
+                logger.info(f"已清理 {deleted} 条旧数据，当前数据库最多保留 {self.MAX_RECORDS} 条最新记录")
                 
         except Exception as e:
             logger.error(f"清理旧数据失败: {e}")
-            if not needs_close:
-                conn.rollback()
-        finally:
-            if needs_close:
-                conn.close()
+            conn.rollback()
+    
+    # 行情列表允许的排序字段
+    MARKET_SORT_FIELDS = ['crawled_at', 'heat_index', 'employment_rate', 'created_at']
+    
+    # 估算总数的缓存有效期（秒），写入时也会主动失效
+    COUNT_CACHE_TTL = 60
     
     def get_market_data(
         self,
@@ -201,45 +315,91 @@ class MajorDataManager:
         order: str = "desc"
     ) -> Tuple[List[Dict], int]:
         """获取专业行情数据"""
+        result = self.get_market_data_page(
+            page=page, page_size=page_size, category=category,
+            sort_by=sort_by, order=order
+        )
+        return result["data"], result["total"]
+    
+    def get_market_data_page(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        category: Optional[str] = None,
+        sort_by: str = "crawled_at",
+        order: str = "desc",
+        cursor: Optional[str] = None,
+        total_mode: str = TOTAL_EXACT
+    ) -> Dict:
+        """获取专业行情数据（支持游标分页）
+        
+        传入 cursor 时按 (排序字段, id) 定位下一页，忽略 page；
+        否则按 page/page_size 分页。两种方式都返回 next_cursor。
+        
+        Args:
+            total_mode: exact 精确统计 / estimate 使用缓存计数 / none 不统计
+        
+        Returns:
+            {"data": [...], "total": int或None, "next_cursor": str或None}
+        
+        Raises:
+            InvalidCursorError: 游标无效或与排序方式不匹配
+        """
+        total_mode = validate_total_mode(total_mode)
+        order_desc = order.lower() == "desc"
+        sort_field = sort_by if sort_by in self.MARKET_SORT_FIELDS else 'crawled_at'
+        # SQLite 中 NULL 视为最小值：降序排在最后，升序排在最前
+        keys = [
+            SortKey(sort_field, order_desc, nulls_last=order_desc),
+            SortKey("id", order_desc, nulls_last=order_desc),
+        ]
+        signature = f"{sort_field}:{'desc' if order_desc else 'asc'}:{category or ''}"
+        
         conn = self._get_conn()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        db_cursor = conn.cursor()
+        db_cursor.row_factory = sqlite3.Row
         
         try:
             # 构建查询条件
-            where_clause = ""
+            conditions = []
             params = []
             if category:
-                where_clause = "WHERE category = ?"
+                conditions.append("category = ?")
                 params.append(category)
             
-            # 排序
-            order_dir = "DESC" if order.lower() == "desc" else "ASC"
-            valid_sort_fields = ['crawled_at', 'heat_index', 'employment_rate', 'created_at']
-            sort_field = sort_by if sort_by in valid_sort_fields else 'crawled_at'
-            
             # 查询总数
-            count_sql = f"SELECT COUNT(*) as total FROM major_market_data {where_clause}"
-            cursor.execute(count_sql, params)
-            total = cursor.fetchone()['total']
+            total = None
+            if total_mode != TOTAL_NONE:
+                total = self._count_market_data(db_cursor, category, use_cache=total_mode == TOTAL_ESTIMATE)
+            
+            # 游标定位，不再使用 OFFSET
+            offset = 0
+            if cursor:
+                condition, cursor_params = keyset_condition(keys, decode_cursor(cursor, signature))
+                conditions.append(condition)
+                params.extend(cursor_params)
+            else:
+                offset = (page - 1) * page_size
             
-            # 查询数据
-            offset = (page - 1) * page_size
+            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            order_clause = ", ".join(key.order_sql() for key in keys)
             sql = f'''
                 SELECT id, title, major_name, category, source_website,
                        employment_rate, avg_salary, heat_index,
-                       crawled_at, description, courses
+                       crawled_at, description, courses,
+                       {sort_field} AS sort_value
                 FROM major_market_data
                 {where_clause}
-                ORDER BY {sort_field} {order_dir}
+                ORDER BY {order_clause}
                 LIMIT ? OFFSET ?
             '''
             
             params.extend([page_size, offset])
-            cursor.execute(sql, params)
+            db_cursor.execute(sql, params)
+            rows = db_cursor.fetchall()
             
             results = []
-            for row in cursor.fetchall():
+            for row in rows:
                 results.append({
                     "id": row["id"],
                     "title": row["title"],
@@ -254,15 +414,37 @@ class MajorDataManager:
                     "courses": json.loads(row["courses"]) if row["courses"] else []
                 })
             
-            return results, total
+            next_cursor = None
+            if rows and len(rows) == page_size:
+                last = rows[-1]
+                next_cursor = encode_cursor(signature, [last["sort_value"], last["id"]])
+            
+            return {"data": results, "total": total, "next_cursor": next_cursor}
             
         finally:
-            conn.close()
+            db_cursor.close()
+    
+    def _count_market_data(self, cursor, category: Optional[str], use_cache: bool) -> int:
+        """统计行情数据条数（use_cache 时复用最近一次计数，数据写入后失效）"""
+        now = time.monotonic()
+        if use_cache:
+            cached = self._count_cache.get(category)
+            if cached and now - cached[1] < self.COUNT_CACHE_TTL:
+                return cached[0]
+        
+        if category:
+            cursor.execute("SELECT COUNT(*) as total FROM major_market_data WHERE category = ?", (category,))
+        else:
+            cursor.execute("SELECT COUNT(*) as total FROM major_market_data")
+        total = cursor.fetchone()['total']
+        self._count_cache[category] = (total, now)
+        return total
     
     def get_stats(self) -> Dict:
         """获取统计数据"""
         conn = self._get_conn()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
         
         try:
             stats = {}
@@ -290,7 +472,7 @@ class MajorDataManager:
             return stats
             
         finally:
-            conn.close()
+            cursor.close()
     
     def get_record_count(self) -> int:
         """获取当前数据条数"""
@@ -298,7 +480,7 @@ class MajorDataManager:
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM major_market_data")
         count = cursor.fetchone()[0]
-        conn.close()
+        cursor.close()
         return count
     
     def get_existing_urls(self) -> set:
@@ -307,7 +489,7 @@ class MajorDataManager:
         cursor = conn.cursor()
         cursor.execute("SELECT source_url FROM major_market_data WHERE source_url != ''")
         urls = {row[0] for row in cursor.fetchall() if row[0]}
-        conn.close()
+        cursor.close()
         return urls
     
     def get_subject_data_count(self, category: str) -> int:
@@ -316,7 +498,7 @@ class MajorDataManager:
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM major_market_data WHERE category = ?", (category,))
         count = cursor.fetchone()[0]
-        conn.close()
+        cursor.close()
         return count
     
     def get_subjects_needing_data(self, min_data: int = 10) -> List[str]:
@@ -331,7 +513,7 @@ class MajorDataManager:
         
         # 获取当前有数据的学科中，数据不足的
         subjects_with_insufficient_data = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        cursor.close()
         
         # 获取所有配置的学科
         all_subjects = set(quota_manager.SUBJECT_QUOTAS.keys())
@@ -378,5 +560,5 @@ class MajorDataManager:
         ''', (count,))
         deleted = cursor.rowcount
         conn.commit()
-        conn.close()
+        self._count_cache.clear()
         return deleted
@@ -0,0 +1,158 @@
+"""
+PostgreSQL异步连接池
+为API路由提供共享的asyncpg连接池，避免每次请求新建连接、在事件循环中执行阻塞查询
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+
+class PoolConfig:
+    """连接池配置"""
+    def __init__(self):
+        self.host = os.getenv("POSTGRES_HOST", "localhost")
+        self.port = int(os.getenv("POSTGRES_PORT", "5432"))
+        self.database = os.getenv("POSTGRES_DB", "employment")
+        self.user = os.getenv("POSTGRES_USER", "postgres")
+        self.password = os.getenv("POSTGRES_PASSWORD", "postgres")
+        self.min_size = int(os.getenv("POSTGRES_POOL_MIN_SIZE", "2"))
+        self.max_size = int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10"))
+        # 单条查询默认超时（秒），可在调用时覆盖
+        self.command_timeout = float(os.getenv("POSTGRES_COMMAND_TIMEOUT", "5"))
+        # 每个连接缓存的预编译语句数量（0表示关闭）
+        self.statement_cache_size = int(os.getenv("POSTGRES_STATEMENT_CACHE_SIZE", "100"))
+        # 空闲连接最长保留时间（秒）
+        self.max_inactive_connection_lifetime = float(os.getenv("POSTGRES_POOL_MAX_IDLE_SECONDS", "300"))
+        # 创建连接池失败后的重试间隔（秒），连续失败时翻倍，不超过上限
+        self.retry_base_seconds = float(os.getenv("POSTGRES_POOL_RETRY_SECONDS", "1"))
+        self.retry_max_seconds = float(os.getenv("POSTGRES_POOL_RETRY_MAX_SECONDS", "60"))
+
+
+class DatabasePool:
+    """PostgreSQL异步连接池
+
+    查询通过 asyncpg 的预编译语句缓存执行，同一SQL在同一连接上只解析一次。
+    创建失败后按指数退避重试，退避期间的请求直接失败，不会每个请求都尝试连接。
+    """
+
+    def __init__(self, config: Optional[PoolConfig] = None):
+        self.config = config or PoolConfig()
+        self._pool: Optional[asyncpg.Pool] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._last_error: Optional[BaseException] = None
+
+    def _check_backoff(self):
+        remaining = self._retry_at - time.monotonic()
+        if remaining > 0:
+            raise ConnectionError(f"PostgreSQL连接池不可用（{self._last_error}），{remaining:.0f}秒后重试")
+
+    async def open(self) -> asyncpg.Pool:
+        """创建连接池（重复调用返回同一个池）
+
+        Raises:
+            ConnectionError: 上次创建失败后仍在退避期内
+        """
+        if self._pool is not None:
+            return self._pool
+        self._check_backoff()
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._pool is None:
+                self._check_backoff()
+                try:
+                    self._pool = await self._create_pool()
+                except Exception as e:
+                    self._failures += 1
+                    delay = min(self.config.retry_max_seconds, self.config.retry_base_seconds * 2 ** (self._failures - 1))
+                    self._retry_at = time.monotonic() + delay
+                    self._last_error = e
+                    logger.error(f"PostgreSQL连接池创建失败（第{self._failures}次），{delay:.0f}秒后重试: {e}")
+                    raise
+                self._failures = 0
+                logger.info(
+                    f"PostgreSQL连接池已创建: {self.config.host}:{self.config.port}/{self.config.database} "
+                    f"(min={self.config.min_size}, max={self.config.max_size})"
+                )
+        return self._pool
+
+    async def _create_pool(self) -> asyncpg.Pool:
+        return await asyncpg.create_pool(
+            host=self.config.host,
+            port=self.config.port,
+            database=self.config.database,
+            user=self.config.user,
+            password=self.config.password,
+            min_size=self.config.min_size,
+            max_size=self.config.max_size,
+            command_timeout=self.config.command_timeout,
+            statement_cache_size=self.config.statement_cache_size,
+            max_inactive_connection_lifetime=self.config.max_inactive_connection_lifetime,
+        )
+
+    async def close(self):
+        """关闭连接池"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+            logger.info("PostgreSQL连接池已关闭")
+
+    @asynccontextmanager
+    async def acquire(self):
+        """获取连接（用于事务等需要独占连接的场景）"""
+        pool = await self.open()
+        async with pool.acquire() as conn:
+            yield conn
+
+    async def fetch(self, query: str, *args, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """执行查询并返回字典列表"""
+        pool = await self.open()
+        rows = await pool.fetch(query, *args, timeout=timeout)
+        return [dict(row) for row in rows]
+
+    async def fetchrow(self, query: str, *args, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """执行查询并返回单行"""
+        pool = await self.open()
+        row = await pool.fetchrow(query, *args, timeout=timeout)
+        return dict(row) if row else None
+
+    async def fetchval(self, query: str, *args, timeout: Optional[float] = None) -> Any:
+        """执行查询并返回单个值"""
+        pool = await self.open()
+        return await pool.fetchval(query, *args, timeout=timeout)
+
+    async def execute(self, query: str, *args, timeout: Optional[float] = None) -> str:
+        """执行写操作"""
+        pool = await self.open()
+        return await pool.execute(query, *args, timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池状态"""
+        if self._pool is None:
+            return {"status": "closed"}
+        return {
+            "status": "open",
+            "size": self._pool.get_size(),
+            "idle": self._pool.get_idle_size(),
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+        }
+
+
+# 全局连接池实例
+db_pool = DatabasePool()
+
+
+def get_db_pool() -> DatabasePool:
+    """获取连接池实例"""
+    return db_pool
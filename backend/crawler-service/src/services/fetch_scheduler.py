@@ -0,0 +1,244 @@
+"""
+按主机限速的异步抓取调度器
+所有爬虫共用，替代各爬虫中固定的随机延迟，按每个站点允许的速度抓取：
+- 每个主机一个令牌桶（rate_per_second / burst）控制请求速率
+- 每个主机同时进行的请求数上限（max_concurrency）
+- 收到429/5xx时速率减半并遵守 Retry-After，之后随成功请求逐步恢复到配置速率（AIMD）
+- 失败重试使用带抖动的指数退避
+
+限速状态在进程内共享（工作池线程和API线程各自的事件循环共用），并发上限按事件循环计算。
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, NamedTuple, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# 需要减速并重试的状态码
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# 减速后的速率下限（相对配置速率）
+MIN_RATE_FACTOR = 0.05
+# 每次成功请求恢复的速率（相对配置速率）
+RECOVERY_STEP = 0.1
+
+
+class HostPolicy(NamedTuple):
+    """单个主机的抓取策略"""
+    rate_per_second: float = 1.0
+    burst: int = 2
+    max_concurrency: int = 2
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After（秒数或HTTP日期）"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostState:
+    """主机的令牌桶和自适应速率"""
+
+    def __init__(self, policy: HostPolicy):
+        self.policy = policy
+        self.rate = policy.rate_per_second
+        self.tokens = float(policy.burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+    def reserve(self, now: float) -> float:
+        """预留一个令牌，返回发出请求前需要等待的秒数（令牌不足时记为欠账，后来者排在其后）"""
+        self.tokens = min(float(self.policy.burst), self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def on_success(self):
+        self.requests += 1
+        if self.rate < self.policy.rate_per_second:
+            self.rate = min(self.policy.rate_per_second, self.rate + self.policy.rate_per_second * RECOVERY_STEP)
+
+    def on_throttle(self, now: float, retry_after: Optional[float]):
+        self.requests += 1
+        self.throttled += 1
+        self.rate = max(self.policy.rate_per_second * MIN_RATE_FACTOR, self.rate / 2)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+class FetchScheduler:
+    """共享抓取调度器
+
+    Args:
+        default_policy: 未单独配置的主机使用的策略
+        host_policies: {主机名: HostPolicy}
+        max_attempts: 默认最多尝试次数（含首次）
+        retry_on_failure: 为False时每个请求只尝试一次
+        retry_base: 重试退避基数（秒），第n次重试在 [0, retry_base * 2^n] 内随机
+        retry_max: 单次退避上限（秒）
+    """
+
+    def __init__(
+        self,
+        default_policy: HostPolicy = HostPolicy(),
+        host_policies: Optional[Dict[str, HostPolicy]] = None,
+        max_attempts: int = 4,
+        retry_on_failure: bool = True,
+        retry_base: float = 1.0,
+        retry_max: float = 30.0
+    ):
+        self.default_policy = default_policy
+        self.host_policies = dict(host_policies or {})
+        self.max_attempts = max_attempts
+        self.retry_on_failure = retry_on_failure
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+        # {事件循环: {主机: 信号量}}
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_config(cls, crawler_settings: Dict[str, Any]) -> "FetchScheduler":
+        """从 crawler_config.json 的 crawler 配置创建
+
+        max_retries 与任务队列一致，表示失败后的重试次数（不含首次）。
+        """
+        default_policy = HostPolicy(
+            rate_per_second=float(crawler_settings.get("host_rate_per_second", 1.0)),
+            burst=int(crawler_settings.get("host_burst", 2)),
+            max_concurrency=int(crawler_settings.get("max_concurrent_per_host", 2)),
+        )
+        host_policies = {
+            host: default_policy._replace(**{k: v for k, v in overrides.items() if k in HostPolicy._fields})
+            for host, overrides in crawler_settings.get("hosts", {}).items()
+        }
+        return cls(
+            default_policy,
+            host_policies,
+            max_attempts=int(crawler_settings.get("max_retries", 3)) + 1,
+            retry_on_failure=bool(crawler_settings.get("retry_on_failure", True)),
+            retry_base=float(crawler_settings.get("retry_base_seconds", 1.0)),
+            retry_max=float(crawler_settings.get("retry_max_seconds", 30.0)),
+        )
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            with self._lock:
+                state = self._hosts.setdefault(host, HostState(self.host_policies.get(host, self.default_policy)))
+        return state
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.get(loop)
+        if semaphores is None:
+            semaphores = self._semaphores.setdefault(loop, {})
+        semaphore = semaphores.get(host)
+        if semaphore is None:
+            semaphore = semaphores[host] = asyncio.Semaphore(self._state(host).policy.max_concurrency)
+        return semaphore
+
+    def retry_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """第 attempt 次失败后的退避时间（全抖动指数退避，不短于 Retry-After）"""
+        delay = random.uniform(0, min(self.retry_max, self.retry_base * (2 ** attempt)))
+        return max(delay, retry_after or 0.0)
+
+    async def fetch(
+        self,
+        session,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        max_attempts: Optional[int] = None
+    ) -> Optional[str]:
+        """按主机限速发送GET请求，返回200响应的文本，失败返回None
+
+        429/5xx和网络异常按退避重试，其他状态码不重试。
+        max_attempts 为最多尝试次数（含首次），未指定时使用默认值，0 与 1 相同（不重试）；
+        retry_on_failure 为False时始终只尝试一次。
+        """
+        host = urlparse(url).netloc.lower()
+        state = self._state(host)
+        attempts = max(1, self.max_attempts if max_attempts is None else max_attempts) if self.retry_on_failure else 1
+        for attempt in range(attempts):
+            status = None
+            retry_after = None
+            async with self._semaphore(host):
+                with self._lock:
+                    wait = state.reserve(time.monotonic())
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                try:
+                    async with session.get(url, headers=headers, params=params) as response:
+                        status = response.status
+                        if status == 200:
+                            content = await response.text()
+                            with self._lock:
+                                state.on_success()
+                            return content
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                except Exception as e:
+                    with self._lock:
+                        state.errors += 1
+                    logger.warning(f"请求异常 (尝试 {attempt + 1}/{attempts}): {url} - {e}")
+
+            if status is not None:
+                logger.warning(f"请求失败，状态码: {status}, URL: {url}")
+                if status not in RETRY_STATUSES:
+                    with self._lock:
+                        state.requests += 1
+                    return None
+                with self._lock:
+                    state.on_throttle(time.monotonic(), retry_after)
+            if attempt < attempts - 1:
+                await asyncio.sleep(self.retry_delay(attempt, retry_after))
+        return None
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                host: {
+                    "rate_per_second": round(state.rate, 3),
+                    "configured_rate": state.policy.rate_per_second,
+                    "max_concurrency": state.policy.max_concurrency,
+                    "requests": state.requests,
+                    "throttled": state.throttled,
+                    "errors": state.errors,
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+_fetch_scheduler: Optional[FetchScheduler] = None
+_fetch_scheduler_lock = threading.Lock()
+
+
+def get_fetch_scheduler() -> FetchScheduler:
+    """获取全局抓取调度器（首次调用时按爬虫配置创建）"""
+    global _fetch_scheduler
+    if _fetch_scheduler is None:
+        with _fetch_scheduler_lock:
+            if _fetch_scheduler is None:
+                from .config_loader import get_crawler_config
+                _fetch_scheduler = FetchScheduler.from_config(get_crawler_config().get_crawler_config())
+    return _fetch_scheduler
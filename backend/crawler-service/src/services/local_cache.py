@@ -0,0 +1,114 @@
+"""
+进程内缓存（L1）
+位于Redis之前的有界LRU缓存，热点键直接从内存返回，无需网络往返和JSON解析
+"""
+
+import fnmatch
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class LocalCache:
+    """有界LRU缓存，带TinyLFU准入策略
+
+    缓存满时，新键的访问频率不低于淘汰候选（最久未使用的键）才会被写入，
+    避免一次性访问的键把热点键挤出缓存。频率计数定期减半以适应访问模式变化。
+
+    缓存的值与调用方共享，调用方应视为只读。
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._freq: Dict[str, int] = {}
+        self._freq_events = 0
+        self._freq_window = max_entries * 10
+        # 每次失效递增，写入时校验，防止失效前读到的旧值在失效后写回
+        self.generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def _record_access(self, key: str):
+        """记录访问频率（调用方持有锁）"""
+        self._freq[key] = self._freq.get(key, 0) + 1
+        self._freq_events += 1
+        if self._freq_events >= self._freq_window:
+            self._freq = {k: v // 2 for k, v in self._freq.items() if v > 1}
+            self._freq_events = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存值，不存在或已过期返回None"""
+        with self._lock:
+            self._record_access(key)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: float, generation: Optional[int] = None) -> bool:
+        """写入缓存
+
+        Args:
+            generation: 读取数据前获取的 generation，期间发生过失效则放弃写入
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            if key not in self._data and len(self._data) >= self.max_entries:
+                victim = next(iter(self._data))
+                if self._freq.get(key, 0) < self._freq.get(victim, 0):
+                    self.rejections += 1
+                    return False
+                del self._data[victim]
+                self.evictions += 1
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            return True
+
+    def delete(self, key: str):
+        """删除单个键"""
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def delete_pattern(self, pattern: str) -> int:
+        """删除匹配通配符模式（与Redis KEYS语法一致）的键"""
+        with self._lock:
+            self.generation += 1
+            keys = [k for k in self._data if fnmatch.fnmatchcase(k, pattern)]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "rejections": self.rejections,
+            }
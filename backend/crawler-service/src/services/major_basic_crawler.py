@@ -3,7 +3,6 @@
 负责从阳光高考等网站爬取专业名称、代码、分类等基础信息
 """
 
-import asyncio
 import logging
 import time
 from typing import Dict, List, Optional, Set
@@ -12,11 +11,12 @@ from dataclasses import dataclass
 from datetime import datetime
 
 import aiohttp
-import asyncio
 from bs4 import BeautifulSoup
 import json
 import hashlib
 
+from .fetch_scheduler import get_fetch_scheduler
+
 logger = logging.getLogger(__name__)
 
 
@@ -71,7 +71,6 @@ class MajorBasicCrawler:
         }
         
         # 请求配置
-        self.request_delay = config.get("request_delay", 2)
         self.max_concurrent = config.get("max_concurrent", 3)
         self.timeout = config.get("timeout", 30)
         self.max_retries = config.get("max_retries", 3)
@@ -213,9 +212,6 @@ class MajorBasicCrawler:
                     
                     logger.info(f"第 {page} 页爬取到 {len(page_majors)} 个专业，累计 {crawled_count}/{quota}")
                     
-                    # 避免请求过于频繁
-                    await asyncio.sleep(self.request_delay)
-                    
                 except Exception as e:
                     logger.error(f"爬取第 {page} 页失败: {e}")
                     break
@@ -247,22 +243,11 @@ class MajorBasicCrawler:
             logger.debug(f"URL已爬取，跳过: {url}")
             return None
         
-        for attempt in range(self.max_retries):
-            try:
-                async with self.session.get(url) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        self.crawled_urls.add(url)
-                        return content
-                    else:
-                        logger.warning(f"HTTP错误 {response.status}: {url}")
-                        
-            except Exception as e:
-                logger.error(f"请求失败 (尝试 {attempt + 1}/{self.max_retries}): {e}")
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)  # 指数退避
-        
-        return None
+        # 按主机限速，429/5xx和网络异常退避重试
+        content = await get_fetch_scheduler().fetch(self.session, url, max_attempts=self.max_retries)
+        if content is not None:
+            self.crawled_urls.add(url)
+        return content
     
     async def _parse_majors_from_html(self, html_content: str, category: str, remaining_quota: int) -> List[MajorBasicInfo]:
         """从HTML解析专业信息"""
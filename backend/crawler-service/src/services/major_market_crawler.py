@@ -3,7 +3,6 @@
 负责从麦可思报告、教育在线等网站爬取就业率、薪资、发展趋势等行情数据
 """
 
-import asyncio
 import logging
 import re
 import json
@@ -14,10 +13,11 @@ from datetime import datetime, timedelta
 import hashlib
 
 import aiohttp
-import asyncio
 from bs4 import BeautifulSoup
 import pandas as pd
 
+from .fetch_scheduler import get_fetch_scheduler
+
 logger = logging.getLogger(__name__)
 
 
@@ -148,7 +148,6 @@ class MajorMarketCrawler:
         }
         
         # 请求配置
-        self.request_delay = config.get("request_delay", 2)
         self.max_concurrent = config.get("max_concurrent", 3)
         self.timeout = config.get("timeout", 30)
         self.max_retries = config.get("max_retries", 3)
@@ -523,22 +522,11 @@ class MajorMarketCrawler:
         if url in self.crawled_urls:
             return None
         
-        for attempt in range(self.max_retries):
-            try:
-                async with self.session.get(url) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        self.crawled_urls.add(url)
-                        return content
-                    else:
-                        logger.warning(f"HTTP错误 {response.status}: {url}")
-                        
-            except Exception as e:
-                logger.error(f"请求失败 (尝试 {attempt + 1}/{self.max_retries}): {e}")
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)
-        
-        return None
+        # 按主机限速，429/5xx和网络异常退避重试
+        content = await get_fetch_scheduler().fetch(self.session, url, max_attempts=self.max_retries)
+        if content is not None:
+            self.crawled_urls.add(url)
+        return content
     
     def _extract_employment_rate(self, text: str) -> Optional[float]:
         """从文本中提取就业率"""
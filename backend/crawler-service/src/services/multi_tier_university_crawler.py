@@ -16,6 +16,8 @@ from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import re
 
+from .fetch_scheduler import get_fetch_scheduler
+
 logger = logging.getLogger(__name__)
 
 class MultiTierUniversityCrawler:
@@ -23,7 +25,7 @@ class MultiTierUniversityCrawler:
     
     def __init__(self):
         self.session: Optional[aiohttp.ClientSession] = None
-        self crawled_urls: Set[str] = set()
+        self.crawled_urls: Set[str] = set()
         self.total_crawled = 0
         
         # 目标省份优先级
@@ -139,9 +141,6 @@ class MultiTierUniversityCrawler:
                 batch_data = await self._crawl_batch_from_sunshine(base_url, batch_type)
                 result["universities_data"].extend(batch_data["universities"])
                 result["admission_scores_data"].extend(batch_data["scores"])
-                
-                # 控制请求频率
-                await asyncio.sleep(random.uniform(2, 4))
             
             logger.info(f"阳光高考爬取完成: {len(result['universities_data'])} 所院校")
             
@@ -181,8 +180,6 @@ class MultiTierUniversityCrawler:
                             # 爬取该院校的录取分数数据
                             score_data = await self._crawl_university_scores(uni_data["name"], base_url)
                             scores.extend(score_data)
-                            
-                        await asyncio.sleep(random.uniform(1, 2))
                         
                     except Exception as e:
                         logger.warning(f"解析院校项目失败: {e}")
@@ -262,8 +259,6 @@ class MultiTierUniversityCrawler:
                         if uni_data:
                             result["universities"].append(uni_data)
                         
-                        await asyncio.sleep(random.uniform(2, 3))
-                        
                     except Exception as e:
                         logger.warning(f"解析省份院校页面失败 {link_info['url']}: {e}")
                         continue
@@ -490,34 +485,24 @@ class MultiTierUniversityCrawler:
         params: Dict = None,
         max_retries: int = 3
     ) -> Optional[str]:
-        """带重试的HTTP请求"""
-        for attempt in range(max_retries):
-            try:
-                await asyncio.sleep(random.uniform(1, 3))
-                
-                req_headers = {
-                    "User-Agent": random.choice(self.user_agents),
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                    "Accept-Language": "zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3",
-                    "Accept-Encoding": "gzip, deflate",
-                    "Connection": "keep-alive",
-                    "Upgrade-Insecure-Requests": "1"
-                }
-                if headers:
-                    req_headers.update(headers)
-                
-                async with self.session.get(url, headers=req_headers, params=params) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        logger.debug(f"成功获取 {url}，内容长度: {len(content)}")
-                        return content
-                    else:
-                        logger.warning(f"请求失败，状态码: {response.status}, URL: {url}")
-                        
-            except Exception as e:
-                logger.warning(f"请求异常 (尝试 {attempt + 1}/{max_retries}): {e}")
-        
-        return None
+        """带重试的HTTP请求（按主机限速、429/5xx退避重试）"""
+        req_headers = {
+            "User-Agent": random.choice(self.user_agents),
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "zh-CN,zh;q=0.8,en-US;q=0.5,en;q=0.3",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+            "Upgrade-Insecure-Requests": "1"
+        }
+        if headers:
+            req_headers.update(headers)
+        
+        content = await get_fetch_scheduler().fetch(
+            self.session, url, headers=req_headers, params=params, max_attempts=max_retries
+        )
+        if content is not None:
+            logger.debug(f"成功获取 {url}，内容长度: {len(content)}")
+        return content
     
     def _convert_batch_type(self, batch_type: str) -> str:
         """转换批次类型到阳光高考参数"""
@@ -0,0 +1,77 @@
+"""
+大学推荐候选表增量刷新
+recommendation_candidates（见 database/migrations/003_create_recommendation_candidates.sql）
+按 (省份, 专业, 年份, 专业层次, 大学, 平均分) 预聚合 university_admission_scores
+（平均分作为聚合键，分数段过滤与逐条过滤原始记录一致），
+录取分数提交后按受影响的 (大学, 专业, 省份, 年份) 重新聚合对应行。
+并发刷新同一个键时，后写入的一方覆盖已有行（ON CONFLICT），不会因主键冲突失败。
+"""
+
+import logging
+from typing import Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (university_id, major_name, province, year)
+CandidateKey = Tuple[int, str, str, int]
+
+_DELETE_SQL = """
+    DELETE FROM recommendation_candidates c
+    USING unnest(%s::int[], %s::text[], %s::text[], %s::int[]) AS k(university_id, major_name, province, year)
+    WHERE c.university_id = k.university_id
+      AND c.major_name = k.major_name
+      AND c.province = k.province
+      AND c.year = k.year
+"""
+
+_INSERT_SQL = """
+    INSERT INTO recommendation_candidates (
+        province, major_name, year, program_tier, university_id, university_province,
+        score_sum, score_count, avg_score, min_score, max_score
+    )
+    SELECT s.province, s.major_name, s.year, COALESCE(s.program_tier, ''), s.university_id, u.province,
+           SUM(s.avg_score), COUNT(*), s.avg_score, MIN(s.min_score), MAX(s.max_score)
+    FROM unnest(%s::int[], %s::text[], %s::text[], %s::int[]) AS k(university_id, major_name, province, year)
+    JOIN university_admission_scores s
+      ON s.university_id = k.university_id
+     AND s.major_name = k.major_name
+     AND s.province = k.province
+     AND s.year = k.year
+    JOIN universities u ON u.id = s.university_id
+    WHERE s.avg_score IS NOT NULL
+    GROUP BY s.province, s.major_name, s.year, COALESCE(s.program_tier, ''), s.university_id, u.province, s.avg_score
+    ON CONFLICT (province, major_name, year, program_tier, university_id, avg_score) DO UPDATE SET
+        university_province = EXCLUDED.university_province,
+        score_sum = EXCLUDED.score_sum,
+        score_count = EXCLUDED.score_count,
+        min_score = EXCLUDED.min_score,
+        max_score = EXCLUDED.max_score,
+        refreshed_at = NOW()
+"""
+
+
+def candidate_key(score) -> CandidateKey:
+    """录取分数记录（字典或带属性的对象）对应的候选表刷新键"""
+    if isinstance(score, dict):
+        return score['university_id'], score['major_name'], score['province'], score['year']
+    return score.university_id, score.major_name, score.province, score.year
+
+
+def refresh_candidates(cursor, keys: Iterable[CandidateKey]) -> int:
+    """重新聚合受影响键对应的候选行（不提交事务，由调用方在分数写入提交后调用并提交）
+
+    Args:
+        cursor: psycopg2 游标
+        keys: (university_id, major_name, province, year)
+
+    Returns:
+        刷新的键数量
+    """
+    unique: Set[CandidateKey] = {key for key in keys if None not in key}
+    if not unique:
+        return 0
+    columns: List[list] = [list(column) for column in zip(*unique)]
+    cursor.execute(_DELETE_SQL, columns)
+    cursor.execute(_INSERT_SQL, columns)
+    logger.debug(f"刷新推荐候选表: {len(unique)}个键")
+    return len(unique)
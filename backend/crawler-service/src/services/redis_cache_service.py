@@ -3,13 +3,26 @@ Redis缓存服务
 提供数据缓存功能，支持缓存读写、失效、统计等操作
 """
 
+import asyncio
 import json
 import logging
+import math
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, Callable, Dict, List, Tuple
 import redis
+import redis.asyncio as aioredis
 import os
 
+from services.local_cache import LocalCache
+from services.cache_codec import CacheCodec
+from services.ttl_resolver import TTLResolver
+from services.config_loader import get_crawler_config
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,6 +34,31 @@ class RedisConfig:
         self.password = os.getenv("REDIS_PASSWORD", "")
         self.db = int(os.getenv("REDIS_DB", "0"))
         self.max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+        # 异步连接池耗尽时等待空闲连接的时间（秒）
+        self.pool_timeout = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+        # 进程内L1缓存
+        self.local_cache_enabled = os.getenv("LOCAL_CACHE_ENABLED", "true").lower() == "true"
+        self.local_cache_max_entries = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "1024"))
+        # L1缓存TTL上限（秒），实际TTL取该值与Redis TTL的较小值
+        self.local_cache_max_ttl = int(os.getenv("LOCAL_CACHE_MAX_TTL", "300"))
+        # get_or_compute：过期后仍可返回旧值的宽限期（秒），期间后台刷新
+        self.stale_ttl = int(os.getenv("CACHE_STALE_TTL", "300"))
+        # 分布式重建锁的持有时间与等待时间（毫秒）
+        self.lock_ttl_ms = int(os.getenv("CACHE_LOCK_TTL_MS", "10000"))
+        self.lock_wait_ms = int(os.getenv("CACHE_LOCK_WAIT_MS", "3000"))
+        # 提前刷新系数，越大越早刷新（0表示关闭提前刷新）
+        self.early_refresh_beta = float(os.getenv("CACHE_EARLY_REFRESH_BETA", "1.0"))
+        self.refresh_workers = int(os.getenv("CACHE_REFRESH_WORKERS", "4"))
+        # 批量失效时每批删除的键数
+        self.invalidation_batch_size = int(os.getenv("CACHE_INVALIDATION_BATCH_SIZE", "500"))
+
+
+class _Flight:
+    """进程内同一个键的一次加载，并发请求共享结果"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
 
 
 class CacheKeyBuilder:
@@ -109,9 +147,79 @@ class RedisCacheService:
         "crawl-task:*": 86400,          # 24小时
     }
     
-    def __init__(self, config: Optional[RedisConfig] = None):
+    # 未匹配任何规则时的TTL（秒）
+    DEFAULT_TTL = 3600
+    
+    # 爬虫配置数据源 → 缓存键前缀，数据源的 cache_ttl_hours 覆盖该前缀的TTL
+    DATA_SOURCE_CACHE_PREFIXES = {
+        "major_categories": "categories:",
+        "majors": "majors:",
+        "major_market_data": "market-data:",
+        "universities": "universities:",
+        "university_admission_scores": "admission:",
+        "industry_trends": "trends:",
+        "hot_news": "hot-news:",
+        "video_content": "videos:",
+        "crawl_history": "crawl-history:",
+        "crawl_quota": "quota:",
+    }
+    
+    # 跨进程缓存失效通知频道
+    INVALIDATION_CHANNEL = "cache:invalidate"
+    
+    # 订阅失败后重试间隔（秒）
+    SUBSCRIBE_RETRY_INTERVAL = 5
+    
+    # get_or_compute 写入的缓存条目标记（携带逻辑过期时间和计算耗时）
+    ENTRY_MARKER = "__cache_entry__"
+    
+    # 等待其他进程重建缓存时的轮询间隔（秒）
+    LOCK_POLL_INTERVAL = 0.05
+    
+    # 标签键前缀：tags:<键前缀> 是有序集合，成员为直接位于该前缀下的缓存键和下一级标签，
+    # 分数为成员的过期时间（用于清理已过期的成员）
+    TAG_PREFIX = "tags:"
+    
+    # 开始登记标签的时间，此前写入的缓存可能不在标签集合中
+    TAG_SINCE_KEY = "tags:since"
+    
+    # 仅当持有者匹配时释放锁
+    RELEASE_LOCK_SCRIPT = """
+        if redis.call("get", KEYS[1]) == ARGV[1] then
+            return redis.call("del", KEYS[1])
+        end
+        return 0
+    """
+    
+    def __init__(self, config: Optional[RedisConfig] = None, codec: Optional[CacheCodec] = None):
         self.config = config or RedisConfig()
+        self.codec = codec or CacheCodec.from_env()
         self._client: Optional[redis.Redis] = None
+        # 缓存值为二进制，读写值使用不解码响应的客户端
+        self._binary_client: Optional[redis.Redis] = None
+        # 异步客户端与事件循环绑定，事件循环变化时重建
+        self._async_client: Optional[aioredis.Redis] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_flights: Dict[str, asyncio.Future] = {}
+        self._local: Optional[LocalCache] = (
+            LocalCache(self.config.local_cache_max_entries) if self.config.local_cache_enabled else None
+        )
+        self._instance_id = uuid.uuid4().hex
+        self._pubsub = None
+        self._subscriber = None
+        self._subscriber_lock = threading.Lock()
+        self._subscribe_retry_at = 0.0
+        # 防击穿：进程内单飞、后台刷新
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._refreshing: set = set()
+        self.reload_ttl_config()
+        self._tag_since_checked = False
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        self._compute_stats = {
+            "computed": 0, "coalesced": 0, "lock_waits": 0,
+            "early_refreshes": 0, "stale_served": 0
+        }
     
     def _get_client(self) -> redis.Redis:
         """获取Redis客户端"""
@@ -126,79 +234,725 @@ class RedisCacheService:
             )
         return self._client
     
-    def _get_ttl(self, key: str) -> int:
-        """获取缓存TTL"""
-        # 精确匹配
-        if key in self.TTL_CONFIG:
-            return self.TTL_CONFIG[key]
-        
-        # 模式匹配
-        for pattern, ttl in self.TTL_CONFIG.items():
-            if pattern.endswith('*'):
-                prefix = pattern[:-1]
-                if key.startswith(prefix):
-                    return ttl
+    def _get_binary_client(self) -> redis.Redis:
+        """获取读写缓存值的Redis客户端（返回bytes）"""
+        if self._binary_client is None:
+            self._binary_client = redis.Redis(
+                host=self.config.host,
+                port=self.config.port,
+                password=self.config.password if self.config.password else None,
+                db=self.config.db,
+                max_connections=self.config.max_connections,
+                decode_responses=False
+            )
+        return self._binary_client
+    
+    def _get_async_client(self) -> aioredis.Redis:
+        """获取当前事件循环的异步Redis客户端（返回bytes，所有协程共享一个连接池）"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            pool = aioredis.BlockingConnectionPool(
+                host=self.config.host,
+                port=self.config.port,
+                password=self.config.password if self.config.password else None,
+                db=self.config.db,
+                max_connections=self.config.max_connections,
+                timeout=self.config.pool_timeout,
+                decode_responses=False
+            )
+            self._async_client = aioredis.Redis(connection_pool=pool)
+            self._async_loop = loop
+            self._async_flights = {}
+        return self._async_client
+    
+    def reload_ttl_config(self, crawler_config=None):
+        """重新编译TTL规则（配置热加载时调用）
         
-        # 默认TTL
-        return 3600  # 1小时
+        Args:
+            crawler_config: CrawlerConfig 实例，默认使用全局配置
+        """
+        try:
+            crawler_config = crawler_config or get_crawler_config()
+        except Exception as e:
+            logger.warning(f"读取爬虫配置失败，只使用内置TTL规则: {e}")
+            crawler_config = None
+        self._ttl_resolver = TTLResolver.from_config(
+            self.TTL_CONFIG, self.DATA_SOURCE_CACHE_PREFIXES, crawler_config, self.DEFAULT_TTL
+        )
+        # 标签集合的过期时间需覆盖其中最长的缓存TTL
+        self._tag_ttl = self._ttl_resolver.max_ttl + self.config.stale_ttl
     
-    def _serialize(self, value: Any) -> str:
-        """序列化值"""
-        return json.dumps(value, ensure_ascii=False, default=str)
+    def _get_ttl(self, key: str) -> int:
+        """获取缓存TTL（精确匹配优先，其次最长前缀匹配）"""
+        return self._ttl_resolver.resolve(key)
+    
+    def _get_local_ttl(self, key: str, ttl: Optional[int] = None) -> int:
+        """L1缓存TTL：不超过Redis TTL和配置上限"""
+        return min(ttl or self._get_ttl(key), self.config.local_cache_max_ttl)
+    
+    # ========== 进程内缓存与失效通知 ==========
+    
+    def _local_ready(self) -> bool:
+        """L1缓存是否可用（只有订阅到失效通知时才使用，避免其他进程更新后读到旧值）"""
+        if self._local is None:
+            return False
+        if self._subscriber is not None and self._subscriber.is_alive():
+            return True
+        if time.monotonic() < self._subscribe_retry_at:
+            return False
+        self._start_subscriber()
+        return self._subscriber is not None and self._subscriber.is_alive()
+    
+    def _start_subscriber(self):
+        """启动失效通知订阅线程"""
+        with self._subscriber_lock:
+            if self._subscriber is not None and self._subscriber.is_alive():
+                return
+            # 订阅中断期间可能错过通知，重新订阅前清空L1
+            self._local.clear()
+            try:
+                self._pubsub = self._get_client().pubsub(ignore_subscribe_messages=True)
+                self._pubsub.subscribe(**{self.INVALIDATION_CHANNEL: self._on_invalidation})
+                self._subscriber = self._pubsub.run_in_thread(sleep_time=1, daemon=True)
+            except Exception as e:
+                logger.warning(f"缓存失效订阅启动失败，L1缓存暂不可用: {e}")
+                self._pubsub = None
+                self._subscriber = None
+                self._subscribe_retry_at = time.monotonic() + self.SUBSCRIBE_RETRY_INTERVAL
     
-    def _deserialize(self, value: str) -> Any:
-        """反序列化值"""
+    def _on_invalidation(self, message: Dict[str, Any]):
+        """处理其他进程发布的失效通知"""
         try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            return value
+            payload = json.loads(message["data"])
+        except (json.JSONDecodeError, TypeError, KeyError):
+            return
+        if payload.get("origin") == self._instance_id or self._local is None:
+            return
+        if "keys" in payload:
+            for key in payload["keys"]:
+                self._local.delete(key)
+        elif "pattern" in payload:
+            self._local.delete_pattern(payload["pattern"])
+    
+    def _invalidation_message(self, keys: Optional[List[str]] = None, pattern: Optional[str] = None) -> str:
+        payload = {"origin": self._instance_id}
+        if keys is not None:
+            payload["keys"] = keys
+        else:
+            payload["pattern"] = pattern
+        return json.dumps(payload, ensure_ascii=False)
+    
+    def _serialize(self, value: Any) -> bytes:
+        """序列化值"""
+        return self.codec.encode(value)
+    
+    def _deserialize(self, value: bytes) -> Any:
+        """反序列化值（兼容旧版JSON文本）"""
+        return self.codec.decode(value)
     
     # ========== 基本操作 ==========
     
     def get(self, key: str) -> Optional[Any]:
-        """获取缓存值"""
+        """获取缓存值（优先读取进程内L1缓存，返回值应视为只读）"""
+        entry = self._get_raw(key)
+        return self._unwrap(entry)[0] if entry is not None else None
+    
+    def _get_raw(self, key: str) -> Optional[Any]:
+        """读取缓存中存储的原始对象（可能是 get_or_compute 写入的条目）"""
+        use_local = self._local_ready()
+        if use_local:
+            value = self._local.get(key)
+            if value is not None:
+                return value
+            generation = self._local.generation
         try:
-            client = self._get_client()
+            client = self._get_binary_client()
             value = client.get(key)
-            return self._deserialize(value) if value else None
+            if not value:
+                return None
+            value = self._deserialize(value)
+            if use_local and value is not None:
+                self._local.set(key, value, self._get_local_ttl(key), generation)
+            return value
         except Exception as e:
             logger.error(f"Redis GET error for key {key}: {e}")
             return None
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """设置缓存值"""
+        """设置缓存值（同时通知其他进程失效L1缓存）"""
+        ttl = ttl or self._get_ttl(key)
+        return self._write(key, self._serialize(value), ttl, self._get_local_ttl(key, ttl))
+    
+    def _write(self, key: str, serialized: bytes, redis_ttl: int, local_ttl: int) -> bool:
+        """写入Redis并登记标签，同步本进程及其他进程的L1缓存"""
+        return self._write_many([(key, serialized, redis_ttl, local_ttl)])
+    
+    def _write_many(self, entries: List[Tuple[str, bytes, int, int]]) -> bool:
+        """在一次管道往返中写入多个 (键, 序列化值, Redis TTL, L1 TTL)"""
         try:
-            client = self._get_client()
-            ttl = ttl or self._get_ttl(key)
-            serialized = self._serialize(value)
-            client.setex(key, ttl, serialized)
+            pipe = self._get_binary_client().pipeline(transaction=False)
+            self._queue_writes(pipe, entries)
+            pipe.execute()
+            self._after_write(entries, self._local_ready() if self._local is not None else False)
             return True
         except Exception as e:
-            logger.error(f"Redis SET error for key {key}: {e}")
+            logger.error(f"Redis SET error for keys {[entry[0] for entry in entries][:5]}: {e}")
             return False
     
+    def _queue_writes(self, pipe, entries: List[Tuple[str, bytes, int, int]]):
+        """把写入、标签登记和失效通知加入管道（同步与异步管道通用）"""
+        now = time.time()
+        tags: Dict[str, Dict[str, float]] = {}
+        for key, serialized, redis_ttl, _ in entries:
+            pipe.setex(key, redis_ttl, serialized)
+            tag = self._tag_for(key)
+            if tag is None:
+                continue
+            tags.setdefault(tag, {})[key] = now + redis_ttl
+            # 逐级把标签登记到上一级标签中，失效上级前缀时沿子标签删除
+            child, parent = tag, self._parent_tag(tag)
+            while parent is not None:
+                tags.setdefault(parent, {})[child] = now + self._tag_ttl
+                child, parent = parent, self._parent_tag(parent)
+        # EXPIRE 对不存在的键无效，须在 ZADD 创建集合之后设置
+        for tag, members in tags.items():
+            pipe.zadd(tag, members)
+            pipe.zremrangebyscore(tag, "-inf", now)
+            pipe.expire(tag, self._tag_ttl)
+        if self._local is not None:
+            pipe.publish(self.INVALIDATION_CHANNEL, self._invalidation_message(keys=[entry[0] for entry in entries]))
+        if not self._tag_since_checked:
+            pipe.set(self.TAG_SINCE_KEY, int(time.time()), nx=True)
+    
+    def _after_write(self, entries: List[Tuple[str, bytes, int, int]], local_ready: bool):
+        """写入成功后同步本进程L1缓存"""
+        self._tag_since_checked = True
+        if self._local is None:
+            return
+        for key, serialized, _, local_ttl in entries:
+            self._local.delete(key)
+            if local_ready:
+                # 缓存反序列化后的副本，与从Redis读取的结果一致
+                self._local.set(key, self._deserialize(serialized), local_ttl)
+    
+    def get_many(self, keys: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """批量获取缓存值（L1未命中的键通过一次MGET读取）
+        
+        Returns:
+            (命中的 {键: 值}, 未命中的键列表)，未命中键保持传入顺序
+        """
+        hits: Dict[str, Any] = {}
+        keys = list(dict.fromkeys(keys))
+        remaining = keys
+        use_local = self._local_ready()
+        if use_local:
+            remaining = []
+            for key in keys:
+                value = self._local.get(key)
+                if value is not None:
+                    hits[key] = self._unwrap(value)[0]
+                else:
+                    remaining.append(key)
+            generation = self._local.generation
+        
+        if remaining:
+            try:
+                values = self._get_binary_client().mget(remaining)
+                for key, raw in zip(remaining, values):
+                    if not raw:
+                        continue
+                    value = self._deserialize(raw)
+                    if value is None:
+                        continue
+                    if use_local:
+                        self._local.set(key, value, self._get_local_ttl(key), generation)
+                    hits[key] = self._unwrap(value)[0]
+            except Exception as e:
+                logger.error(f"Redis MGET error for keys {remaining[:5]}: {e}")
+        
+        misses = [key for key in keys if key not in hits]
+        return hits, misses
+    
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """批量设置缓存值（一次管道往返，未指定ttl时各键按前缀取TTL）"""
+        if not items:
+            return True
+        entries = []
+        for key, value in items.items():
+            key_ttl = ttl or self._get_ttl(key)
+            entries.append((key, self._serialize(value), key_ttl, self._get_local_ttl(key, key_ttl)))
+        return self._write_many(entries)
+    
     def delete(self, key: str) -> bool:
         """删除缓存"""
+        if self._local is not None:
+            self._local.delete(key)
         try:
             client = self._get_client()
             client.delete(key)
+            if self._local is not None:
+                client.publish(self.INVALIDATION_CHANNEL, self._invalidation_message(keys=[key]))
             return True
         except Exception as e:
             logger.error(f"Redis DELETE error for key {key}: {e}")
             return False
     
     def delete_pattern(self, pattern: str) -> int:
-        """批量删除匹配模式的缓存"""
+        """批量删除匹配模式的缓存（invalidate_* 均经由此方法，同步失效各进程L1缓存）
+        
+        "前缀:*" 形式的模式通过标签集合删除，其他模式使用SCAN增量遍历，
+        均分批删除，不会像 KEYS 一样长时间阻塞Redis。
+        """
+        if self._local is not None:
+            self._local.delete_pattern(pattern)
         try:
             client = self._get_client()
-            keys = client.keys(pattern)
-            if keys:
-                return client.delete(*keys)
-            return 0
+            deleted = None
+            tag = self._tag_for_pattern(pattern)
+            if tag is not None:
+                deleted = self._delete_tagged(client, tag)
+                if deleted is not None and self._untagged_keys_possible(client):
+                    deleted += self._delete_scanned(client, pattern)
+            if deleted is None:
+                deleted = self._delete_scanned(client, pattern)
+            if self._local is not None:
+                client.publish(self.INVALIDATION_CHANNEL, self._invalidation_message(pattern=pattern))
+            return deleted
         except Exception as e:
             logger.error(f"Redis DELETE pattern error for {pattern}: {e}")
             return 0
     
+    # ========== 标签失效 ==========
+    
+    def _tag_for(self, key: str) -> Optional[str]:
+        """缓存键直接所属的标签（最后一个":"之前的前缀），如 majors:list:all:1 → tags:majors:list:all:"""
+        end = key.rfind(":")
+        return self.TAG_PREFIX + key[:end + 1] if end >= 0 else None
+    
+    def _parent_tag(self, tag: str) -> Optional[str]:
+        """上一级标签，如 tags:majors:list: → tags:majors:，顶级标签返回None"""
+        end = tag.rfind(":", len(self.TAG_PREFIX), len(tag) - 1)
+        return tag[:end + 1] if end >= 0 else None
+    
+    def _tag_for_pattern(self, pattern: str) -> Optional[str]:
+        """"前缀:*" 形式的模式对应的标签，其他模式返回None"""
+        if not pattern.endswith(":*"):
+            return None
+        prefix = pattern[:-1]
+        if any(ch in prefix for ch in "*?[]\\"):
+            return None
+        return self.TAG_PREFIX + prefix
+    
+    def _delete_tagged(self, client: redis.Redis, tag: str) -> Optional[int]:
+        """删除标签及其各级子标签中的所有键，标签不存在时返回None
+        
+        先把标签重命名为临时键，之后新写入的键登记到新标签，不会被误删。
+        """
+        pending = f"{tag}deleting:{uuid.uuid4().hex}"
+        try:
+            client.rename(tag, pending)
+        except redis.ResponseError:
+            return None  # 标签不存在（如升级前写入的缓存），改用SCAN
+        
+        deleted = 0
+        batch = []
+        children = []
+        for member, _ in client.zscan_iter(pending, count=self.config.invalidation_batch_size):
+            if member.startswith(self.TAG_PREFIX):
+                children.append(member)
+                continue
+            batch.append(member)
+            if len(batch) >= self.config.invalidation_batch_size:
+                deleted += client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += client.unlink(*batch)
+        client.unlink(pending)
+        for child in children:
+            deleted += self._delete_tagged(client, child) or 0
+        return deleted
+    
+    def _untagged_keys_possible(self, client: redis.Redis) -> bool:
+        """开始登记标签后还未超过最长缓存TTL时，可能仍有未登记标签的旧缓存"""
+        since = client.get(self.TAG_SINCE_KEY)
+        return since is None or time.time() - int(since) < self._tag_ttl
+    
+    def _delete_scanned(self, client: redis.Redis, pattern: str) -> int:
+        """SCAN增量遍历匹配的键并分批删除"""
+        if not any(ch in pattern for ch in "*?["):
+            return client.unlink(pattern)
+        deleted = 0
+        batch = []
+        for key in client.scan_iter(match=pattern, count=self.config.invalidation_batch_size):
+            if key.startswith(self.TAG_PREFIX):
+                continue
+            batch.append(key)
+            if len(batch) >= self.config.invalidation_batch_size:
+                deleted += client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += client.unlink(*batch)
+        return deleted
+    
+    # ========== 防击穿读取 ==========
+    
+    def get_or_compute(self, key: str, loader: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+        """读取缓存，未命中时调用 loader 计算并写入（阻塞调用，异步路由使用 aget_or_compute）
+        
+        - 同一进程内并发未命中只执行一次 loader（单飞）
+        - 多进程之间通过Redis锁保证同一时刻只有一个进程重建
+        - 临近过期时按计算耗时概率性提前刷新（XFetch）
+        - 过期后宽限期内直接返回旧值，并在后台刷新
+        
+        loader 返回None时不缓存。
+        """
+        ttl = ttl or self._get_ttl(key)
+        entry = self._get_raw(key)
+        if entry is not None:
+            return self._serve_cached(key, entry, loader, ttl)
+        return self._single_flight(key, lambda: self._load(key, loader, ttl))
+    
+    def _serve_cached(self, key: str, entry: Any, loader: Callable[[], Any], ttl: int) -> Any:
+        """返回命中的缓存值，已过期或临近过期时提交后台刷新"""
+        value, meta = self._unwrap(entry)
+        if meta is None:
+            # set() 写入的普通缓存，没有过期元数据
+            return value
+        remaining = meta["expires_at"] - time.time()
+        if remaining <= 0:
+            self._compute_stats["stale_served"] += 1
+            self._refresh_async(key, loader, ttl)
+        elif self._should_refresh_early(meta["compute_time"], remaining):
+            self._compute_stats["early_refreshes"] += 1
+            self._refresh_async(key, loader, ttl)
+        return value
+    
+    def _unwrap(self, entry: Any) -> Tuple[Any, Optional[Dict[str, float]]]:
+        """拆分缓存条目为 (值, 元数据)，普通缓存值的元数据为None"""
+        if isinstance(entry, dict) and entry.get(self.ENTRY_MARKER):
+            return entry.get("value"), entry
+        return entry, None
+    
+    def _should_refresh_early(self, compute_time: float, remaining: float) -> bool:
+        """XFetch：计算越慢、离过期越近，提前刷新的概率越大"""
+        beta = self.config.early_refresh_beta
+        if beta <= 0 or compute_time <= 0:
+            return False
+        return compute_time * beta * -math.log(1.0 - random.random()) >= remaining
+    
+    def _single_flight(self, key: str, fn: Callable[[], Any]) -> Any:
+        """同一进程内同一个键只执行一次 fn，其余调用等待并共享结果"""
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        
+        if not leader:
+            self._compute_stats["coalesced"] += 1
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            flight.value = fn()
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+    
+    def _load(self, key: str, loader: Callable[[], Any], ttl: int) -> Any:
+        """缓存未命中时加载：获取Redis锁后计算，锁被其他进程持有时等待其结果"""
+        token = self._acquire_lock(key)
+        if token is None:
+            self._compute_stats["lock_waits"] += 1
+            deadline = time.monotonic() + self.config.lock_wait_ms / 1000
+            while time.monotonic() < deadline:
+                time.sleep(self.LOCK_POLL_INTERVAL)
+                entry = self._get_raw(key)
+                if entry is not None:
+                    return self._unwrap(entry)[0]
+            logger.warning(f"等待缓存重建超时，自行计算: {key}")
+        try:
+            return self._compute_and_store(key, loader, ttl)
+        finally:
+            self._release_lock(key, token)
+    
+    def _compute_and_store(self, key: str, loader: Callable[[], Any], ttl: int) -> Any:
+        """执行 loader 并写入带过期元数据的缓存条目"""
+        started = time.perf_counter()
+        value = loader()
+        compute_time = time.perf_counter() - started
+        self._compute_stats["computed"] += 1
+        if value is not None:
+            self._write_many([self._entry_write(key, value, ttl, compute_time)])
+        return value
+    
+    def _entry_write(self, key: str, value: Any, ttl: int, compute_time: float) -> Tuple[str, bytes, int, int]:
+        """构造 get_or_compute 条目的写入参数（Redis中多保留宽限期）"""
+        entry = {
+            self.ENTRY_MARKER: 1,
+            "value": value,
+            "expires_at": time.time() + ttl,
+            "compute_time": round(compute_time, 4),
+        }
+        return key, self._serialize(entry), ttl + self.config.stale_ttl, self._get_local_ttl(key, ttl)
+    
+    def _refresh_async(self, key: str, loader: Callable[[], Any], ttl: int):
+        """后台刷新缓存（同一个键同时只有一个刷新任务）"""
+        with self._flights_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.config.refresh_workers, thread_name_prefix="cache-refresh"
+                )
+        self._refresh_executor.submit(self._refresh, key, loader, ttl)
+    
+    def _refresh(self, key: str, loader: Callable[[], Any], ttl: int):
+        try:
+            token = self._acquire_lock(key)
+            if token is None:
+                return  # 其他进程正在刷新
+            try:
+                self._compute_and_store(key, loader, ttl)
+            finally:
+                self._release_lock(key, token)
+        except Exception as e:
+            logger.error(f"后台刷新缓存失败 {key}: {e}")
+        finally:
+            with self._flights_lock:
+                self._refreshing.discard(key)
+    
+    def _acquire_lock(self, key: str) -> Optional[str]:
+        """获取重建锁，返回锁令牌；锁被占用返回None，Redis不可用时返回空串（直接计算）"""
+        token = uuid.uuid4().hex
+        try:
+            client = self._get_client()
+            if client.set(f"lock:{key}", token, nx=True, px=self.config.lock_ttl_ms):
+                return token
+            return None
+        except Exception as e:
+            logger.error(f"Redis LOCK error for key {key}: {e}")
+            return ""
+    
+    def _release_lock(self, key: str, token: Optional[str]):
+        """释放重建锁"""
+        if not token:
+            return
+        try:
+            self._get_client().eval(self.RELEASE_LOCK_SCRIPT, 1, f"lock:{key}", token)
+        except Exception as e:
+            logger.error(f"Redis UNLOCK error for key {key}: {e}")
+    
+    # ========== 异步接口 ==========
+    # 与同步接口语义一致，使用 redis.asyncio 共享连接池，供 async def 路由调用而不阻塞事件循环；
+    # 同步接口保留给脚本和线程池中的调用方。
+    
+    async def _alocal_ready(self) -> bool:
+        """异步版 _local_ready：订阅线程需要（重新）启动时放入线程池执行"""
+        if self._local is None:
+            return False
+        if self._subscriber is not None and self._subscriber.is_alive():
+            return True
+        if time.monotonic() < self._subscribe_retry_at:
+            return False
+        return await asyncio.get_running_loop().run_in_executor(None, self._local_ready)
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """异步获取缓存值（返回值应视为只读）"""
+        entry = await self._aget_raw(key)
+        return self._unwrap(entry)[0] if entry is not None else None
+    
+    async def _aget_raw(self, key: str) -> Optional[Any]:
+        use_local = await self._alocal_ready()
+        if use_local:
+            value = self._local.get(key)
+            if value is not None:
+                return value
+            generation = self._local.generation
+        try:
+            value = await self._get_async_client().get(key)
+            if not value:
+                return None
+            value = self._deserialize(value)
+            if use_local and value is not None:
+                self._local.set(key, value, self._get_local_ttl(key), generation)
+            return value
+        except Exception as e:
+            logger.error(f"Redis GET error for key {key}: {e}")
+            return None
+    
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """异步设置缓存值"""
+        ttl = ttl or self._get_ttl(key)
+        return await self._awrite_many([(key, self._serialize(value), ttl, self._get_local_ttl(key, ttl))])
+    
+    async def _awrite_many(self, entries: List[Tuple[str, bytes, int, int]]) -> bool:
+        try:
+            pipe = self._get_async_client().pipeline(transaction=False)
+            self._queue_writes(pipe, entries)
+            await pipe.execute()
+            self._after_write(entries, await self._alocal_ready())
+            return True
+        except Exception as e:
+            logger.error(f"Redis SET error for keys {[entry[0] for entry in entries][:5]}: {e}")
+            return False
+    
+    async def aget_many(self, keys: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """异步批量获取缓存值，返回 (命中的 {键: 值}, 未命中的键列表)"""
+        hits: Dict[str, Any] = {}
+        keys = list(dict.fromkeys(keys))
+        remaining = keys
+        use_local = await self._alocal_ready()
+        if use_local:
+            remaining = []
+            for key in keys:
+                value = self._local.get(key)
+                if value is not None:
+                    hits[key] = self._unwrap(value)[0]
+                else:
+                    remaining.append(key)
+            generation = self._local.generation
+        
+        if remaining:
+            try:
+                values = await self._get_async_client().mget(remaining)
+                for key, raw in zip(remaining, values):
+                    if not raw:
+                        continue
+                    value = self._deserialize(raw)
+                    if value is None:
+                        continue
+                    if use_local:
+                        self._local.set(key, value, self._get_local_ttl(key), generation)
+                    hits[key] = self._unwrap(value)[0]
+            except Exception as e:
+                logger.error(f"Redis MGET error for keys {remaining[:5]}: {e}")
+        
+        misses = [key for key in keys if key not in hits]
+        return hits, misses
+    
+    async def aset_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """异步批量设置缓存值"""
+        if not items:
+            return True
+        entries = []
+        for key, value in items.items():
+            key_ttl = ttl or self._get_ttl(key)
+            entries.append((key, self._serialize(value), key_ttl, self._get_local_ttl(key, key_ttl)))
+        return await self._awrite_many(entries)
+    
+    async def adelete(self, key: str) -> bool:
+        """异步删除缓存"""
+        if self._local is not None:
+            self._local.delete(key)
+        try:
+            client = self._get_async_client()
+            if self._local is None:
+                await client.delete(key)
+            else:
+                pipe = client.pipeline(transaction=False)
+                pipe.delete(key)
+                pipe.publish(self.INVALIDATION_CHANNEL, self._invalidation_message(keys=[key]))
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis DELETE error for key {key}: {e}")
+            return False
+    
+    async def aget_or_compute(self, key: str, loader: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+        """异步版 get_or_compute
+        
+        loader 是同步函数（如数据库查询），在线程池中执行；
+        同一事件循环内并发未命中共享一次加载，其余行为与 get_or_compute 相同。
+        """
+        ttl = ttl or self._get_ttl(key)
+        entry = await self._aget_raw(key)
+        if entry is not None:
+            # 后台刷新仍由刷新线程池执行，不占用事件循环
+            return self._serve_cached(key, entry, loader, ttl)
+        
+        flight = self._async_flights.get(key)
+        if flight is None:
+            # 加载作为独立任务执行，发起请求被取消时不影响其他等待者
+            client = self._get_async_client()
+            flight = asyncio.ensure_future(self._aload(client, key, loader, ttl))
+            self._async_flights[key] = flight
+            flight.add_done_callback(lambda task: self._async_flight_done(key, task))
+        else:
+            self._compute_stats["coalesced"] += 1
+        return await asyncio.shield(flight)
+    
+    def _async_flight_done(self, key: str, task: asyncio.Future):
+        if self._async_flights.get(key) is task:
+            del self._async_flights[key]
+        if not task.cancelled():
+            task.exception()  # 等待者都已取消时避免 "exception was never retrieved" 警告
+    
+    async def _aload(self, client: aioredis.Redis, key: str, loader: Callable[[], Any], ttl: int) -> Any:
+        token = await self._aacquire_lock(client, key)
+        if token is None:
+            self._compute_stats["lock_waits"] += 1
+            deadline = time.monotonic() + self.config.lock_wait_ms / 1000
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.LOCK_POLL_INTERVAL)
+                entry = await self._aget_raw(key)
+                if entry is not None:
+                    return self._unwrap(entry)[0]
+            logger.warning(f"等待缓存重建超时，自行计算: {key}")
+        try:
+            started = time.perf_counter()
+            value = await asyncio.get_running_loop().run_in_executor(None, loader)
+            compute_time = time.perf_counter() - started
+            self._compute_stats["computed"] += 1
+            if value is not None:
+                await self._awrite_many([self._entry_write(key, value, ttl, compute_time)])
+            return value
+        finally:
+            await self._arelease_lock(client, key, token)
+    
+    async def _aacquire_lock(self, client: aioredis.Redis, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            if await client.set(f"lock:{key}", token, nx=True, px=self.config.lock_ttl_ms):
+                return token
+            return None
+        except Exception as e:
+            logger.error(f"Redis LOCK error for key {key}: {e}")
+            return ""
+    
+    async def _arelease_lock(self, client: aioredis.Redis, key: str, token: Optional[str]):
+        if not token:
+            return
+        try:
+            await client.eval(self.RELEASE_LOCK_SCRIPT, 1, f"lock:{key}", token)
+        except Exception as e:
+            logger.error(f"Redis UNLOCK error for key {key}: {e}")
+    
+    async def ahealth_check(self) -> bool:
+        """异步健康检查"""
+        try:
+            return await self._get_async_client().ping()
+        except Exception as e:
+            logger.error(f"Redis health check error: {e}")
+            return False
+    
+    async def aclose(self):
+        """关闭异步连接池（在创建它的事件循环中调用）"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            await self._async_client.connection_pool.disconnect()
+            self._async_client = None
+            self._async_loop = None
+            self._async_flights = {}
+    
     def exists(self, key: str) -> bool:
         """检查键是否存在"""
         try:
@@ -301,7 +1055,10 @@ class RedisCacheService:
                 "used_memory_mb": round(info.get("used_memory", 0) / 1024 / 1024, 2),
                 "max_memory": info.get("maxmemory_human", "N/A"),
                 "connected_clients": info.get("connected_clients", 0),
-                "total_keys": client.dbsize()
+                "total_keys": client.dbsize(),
+                "codec": f"{self.codec.serializer}+{self.codec.compression}",
+                "local_cache": self._local.get_stats() if self._local is not None else None,
+                "compute": dict(self._compute_stats)
             }
         except Exception as e:
             logger.error(f"Redis stats error: {e}")
@@ -310,16 +1067,17 @@ class RedisCacheService:
     def get_cache_info(self, key: str) -> Optional[Dict[str, Any]]:
         """获取缓存键的详细信息"""
         try:
-            client = self._get_client()
+            client = self._get_binary_client()
             ttl = client.ttl(key)
             value = client.get(key)
             
             if value is None:
                 return None
-                
+            
+            preview = str(self._unwrap(self._deserialize(value))[0])
             return {
                 "key": key,
-                "value": self._deserialize(value)[:100] + "..." if len(str(value)) > 100 else self._deserialize(value),
+                "value": preview[:100] + "..." if len(preview) > 100 else preview,
                 "ttl": ttl,
                 "remaining_seconds": ttl,
                 "size_bytes": len(value)
@@ -339,6 +1097,20 @@ class RedisCacheService:
     
     def close(self):
         """关闭连接"""
+        if self._subscriber is not None:
+            self._subscriber.stop()
+            self._subscriber = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+        if self._local is not None:
+            self._local.clear()
+        if self._refresh_executor is not None:
+            self._refresh_executor.shutdown(wait=False)
+            self._refresh_executor = None
+        if self._binary_client:
+            self._binary_client.close()
+            self._binary_client = None
         if self._client:
             self._client.close()
             self._client = None
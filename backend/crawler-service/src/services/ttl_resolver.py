@@ -0,0 +1,77 @@
+"""
+缓存TTL解析器
+由TTL规则一次性编译为精确匹配表和按长度分组的前缀表，按最长前缀匹配并缓存结果
+"""
+
+from functools import lru_cache
+from typing import Dict, Optional
+
+
+class TTLResolver:
+    """最长前缀匹配的TTL解析器
+
+    规则格式与 RedisCacheService.TTL_CONFIG 一致：
+    - "categories:all" 精确匹配
+    - "majors:list:*" 前缀匹配
+
+    精确匹配优先，其次取匹配的最长前缀，与规则的书写顺序无关。
+
+    Args:
+        rules: {规则: TTL秒数}
+        default_ttl: 没有规则匹配时的TTL
+        memo_size: 解析结果缓存的键数量
+    """
+
+    def __init__(self, rules: Dict[str, int], default_ttl: int = 3600, memo_size: int = 4096):
+        self.rules = dict(rules)
+        self.default_ttl = default_ttl
+        self._exact: Dict[str, int] = {}
+        self._prefixes: Dict[str, int] = {}
+        for pattern, ttl in rules.items():
+            if pattern.endswith("*"):
+                self._prefixes[pattern[:-1]] = ttl
+            else:
+                self._exact[pattern] = ttl
+        # 前缀长度从长到短，逐个长度做一次字典查找
+        self._lengths = sorted({len(p) for p in self._prefixes}, reverse=True)
+        self.max_ttl = max([default_ttl, *rules.values()])
+        self.resolve = lru_cache(maxsize=memo_size)(self._resolve)
+
+    def _resolve(self, key: str) -> int:
+        ttl = self._exact.get(key)
+        if ttl is not None:
+            return ttl
+        key_len = len(key)
+        for length in self._lengths:
+            if length <= key_len:
+                ttl = self._prefixes.get(key[:length])
+                if ttl is not None:
+                    return ttl
+        return self.default_ttl
+
+    @classmethod
+    def from_config(
+        cls,
+        rules: Dict[str, int],
+        data_source_prefixes: Dict[str, str],
+        crawler_config=None,
+        default_ttl: int = 3600
+    ) -> "TTLResolver":
+        """合并爬虫配置中各数据源的 cache_ttl_hours
+
+        数据源的 cache_ttl_hours 覆盖其键前缀（如 majors:*）的TTL，
+        rules 中更具体的前缀（如 majors:list:*）仍按最长前缀优先。
+
+        Args:
+            rules: 基础TTL规则
+            data_source_prefixes: {数据源名称: 缓存键前缀}
+            crawler_config: CrawlerConfig 实例，None时只使用基础规则
+        """
+        merged = dict(rules)
+        if crawler_config is not None:
+            for name, source in crawler_config.get_all_data_sources().items():
+                prefix = data_source_prefixes.get(name)
+                hours: Optional[float] = source.get("cache_ttl_hours")
+                if prefix and hours:
+                    merged[f"{prefix}*"] = int(hours * 3600)
+        return cls(merged, default_ttl=default_ttl)
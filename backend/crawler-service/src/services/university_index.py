@@ -0,0 +1,158 @@
+"""大学数据索引 - 内存大学数据的预计算索引层
+
+在大学数据加载（或变更）时一次性构建，列表、详情、推荐接口
+通过索引直接定位候选大学，避免每次请求全量扫描和复制。
+"""
+import logging
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 不区分招生省份时使用的分数键（取 admission_scores 的第一条）
+ANY_PROVINCE = "*"
+
+
+class UniversityIndex:
+    """大学数据索引
+
+    - id → 大学记录
+    - 所在省份 → 大学ID列表
+    - 层次 → 大学ID列表
+    - 王牌专业 → 大学ID列表
+    - 招生省份 → 按最低录取分排序的分数数组
+
+    所有ID列表均保持原始数据顺序，保证筛选、排序结果与全量扫描一致。
+    """
+
+    def __init__(self, universities: List[dict]):
+        self.by_id: Dict[int, dict] = {}
+        self.position: Dict[int, int] = {}
+        self.all_ids: List[int] = []
+        self.province_ids: Dict[str, List[int]] = {}
+        self.level_ids: Dict[str, List[int]] = {}
+        self.strength_ids: Dict[str, List[int]] = {}
+        # {大学ID: {招生省份: (在admission_scores中的下标, 分数记录)}}，只保留每省第一条
+        self.province_scores: Dict[int, Dict[str, Tuple[int, dict]]] = {}
+        # {招生省份: (最低录取分列表, 大学ID列表)}，按(最低录取分, 原始顺序)升序
+        self.sorted_scores: Dict[str, Tuple[List[int], List[int]]] = {}
+        # 按就业率降序（同分保持原始顺序）
+        self.by_employment_rate: List[int] = []
+        self._level_cache: Dict[str, List[int]] = {}
+        self._build(universities)
+
+    def _build(self, universities: List[dict]):
+        """构建索引"""
+        score_entries: Dict[str, List[Tuple[int, int, int]]] = {}
+
+        for pos, u in enumerate(universities):
+            uid = u["id"]
+            if uid in self.by_id:
+                continue
+            self.by_id[uid] = u
+            self.position[uid] = pos
+            self.all_ids.append(uid)
+
+            self.province_ids.setdefault(u["province"], []).append(uid)
+            self.level_ids.setdefault(u["level"], []).append(uid)
+            for strength in dict.fromkeys(u.get("major_strengths") or []):
+                self.strength_ids.setdefault(strength, []).append(uid)
+
+            firsts: Dict[str, Tuple[int, dict]] = {}
+            for i, s in enumerate(u.get("admission_scores") or []):
+                if s["province"] not in firsts:
+                    firsts[s["province"]] = (i, s)
+            if u.get("admission_scores"):
+                firsts[ANY_PROVINCE] = (0, u["admission_scores"][0])
+            self.province_scores[uid] = firsts
+
+            for prov, (_, s) in firsts.items():
+                score_entries.setdefault(prov, []).append((s["min_score"], pos, uid))
+
+        for prov, entries in score_entries.items():
+            entries.sort()
+            self.sorted_scores[prov] = ([e[0] for e in entries], [e[2] for e in entries])
+
+        self.by_employment_rate = sorted(
+            self.all_ids, key=lambda uid: self.by_id[uid]["employment_rate"], reverse=True
+        )
+        logger.info(
+            f"大学索引构建完成: {len(self.all_ids)}所大学, {len(self.province_ids)}个省份, "
+            f"{len(self.strength_ids)}个王牌专业"
+        )
+
+    # ========== 查询 ==========
+
+    def get(self, university_id: int) -> Optional[dict]:
+        """根据ID获取大学记录"""
+        return self.by_id.get(university_id)
+
+    def records(self, ids: Iterable[int]) -> List[dict]:
+        """ID列表转换为大学记录列表"""
+        return [self.by_id[uid] for uid in ids]
+
+    def ids_for_level(self, level: str) -> List[int]:
+        """层次筛选（与 `level in u["level"]` 语义一致，支持 985/211 等子串）"""
+        if level not in self._level_cache:
+            matched = [ids for raw, ids in self.level_ids.items() if level in raw]
+            self._level_cache[level] = self._merge(matched)
+        return self._level_cache[level]
+
+    def ids_with_any_strength(self, strengths: Iterable[str]) -> List[int]:
+        """拥有任一指定王牌专业的大学ID（保持原始顺序）"""
+        return self._merge([self.strength_ids[s] for s in set(strengths) if s in self.strength_ids])
+
+    def filter_ids(
+        self,
+        province: Optional[str] = None,
+        level: Optional[str] = None,
+        major: Optional[str] = None
+    ) -> List[int]:
+        """按省份、层次、王牌专业组合筛选，返回原始顺序的ID列表"""
+        candidates = []
+        if province:
+            candidates.append(self.province_ids.get(province, []))
+        if level:
+            candidates.append(self.ids_for_level(level))
+        if major:
+            candidates.append(self.strength_ids.get(major, []))
+        if not candidates:
+            return self.all_ids
+        return self._intersect(candidates)
+
+    def score_for_province(self, university_id: int, province: str) -> Optional[dict]:
+        """大学在指定招生省份的第一条录取分数"""
+        entry = self.province_scores.get(university_id, {}).get(province)
+        return entry[1] if entry else None
+
+    def first_score_among(self, university_id: int, provinces: Iterable[str]) -> Optional[dict]:
+        """在多个招生省份中，取 admission_scores 中最靠前的一条"""
+        scores = self.province_scores.get(university_id, {})
+        entries = [scores[p] for p in provinces if p in scores]
+        return min(entries, key=lambda e: e[0])[1] if entries else None
+
+    def ids_in_score_window(self, province: str, score_min: int, score_max: int) -> List[int]:
+        """招生省份最低录取分落在 [score_min, score_max] 的大学ID（保持原始顺序）
+
+        province 传 ANY_PROVINCE 时使用每所大学的第一条录取分数。
+        """
+        if province not in self.sorted_scores:
+            return []
+        keys, ids = self.sorted_scores[province]
+        window = ids[bisect_left(keys, score_min):bisect_right(keys, score_max)]
+        return sorted(window, key=self.position.__getitem__)
+
+    # ========== 内部工具 ==========
+
+    def _merge(self, id_lists: List[List[int]]) -> List[int]:
+        """合并多个ID列表并按原始顺序去重"""
+        if len(id_lists) == 1:
+            return id_lists[0]
+        merged = {uid for ids in id_lists for uid in ids}
+        return sorted(merged, key=self.position.__getitem__)
+
+    def _intersect(self, id_lists: List[List[int]]) -> List[int]:
+        """多个ID列表求交集，从最短列表开始并保持原始顺序"""
+        id_lists = sorted(id_lists, key=len)
+        others = [set(ids) for ids in id_lists[1:]]
+        return [uid for uid in id_lists[0] if all(uid in s for s in others)]
@@ -0,0 +1,108 @@
+"""大学推荐打分引擎 - 列式预计算的专业匹配度与排序
+
+在大学索引构建后一次性生成：
+- 每所大学的王牌专业位图（整数bitset）
+- 就业率、最新录取分等排序列
+
+推荐时对候选大学批量计算匹配度和排序键，只为最终返回的 top-k 生成结果字典。
+"""
+import heapq
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+from shared.utils.major_graph import MajorGraph
+from services.university_index import UniversityIndex, ANY_PROVINCE
+
+logger = logging.getLogger(__name__)
+
+
+class UniversityScoringEngine:
+    """大学推荐打分引擎
+
+    专业匹配度规则（与原逐校计算一致）：
+    - 命中 ≥2 个相关王牌专业：100
+    - 命中 1 个：60
+    - 未命中但拥有同大类王牌专业：30
+    - 其他：0
+    """
+
+    def __init__(self, index: UniversityIndex, graph: MajorGraph):
+        self.index = index
+        self.graph = graph
+
+        # 列式数据：下标与 index.all_ids 一一对应
+        self.ids: List[int] = list(index.all_ids)
+        self.column: Dict[int, int] = {uid: col for col, uid in enumerate(self.ids)}
+        self.bits: Dict[str, int] = {s: 1 << i for i, s in enumerate(index.strength_ids)}
+        self.strength_masks: List[int] = [0] * len(self.ids)
+        for strength, ids in index.strength_ids.items():
+            bit = self.bits[strength]
+            for uid in ids:
+                self.strength_masks[self.column[uid]] |= bit
+        self.employment_rates: List[float] = [index.by_id[uid]["employment_rate"] for uid in self.ids]
+        self.latest_min_scores: List[Optional[int]] = []
+        for uid in self.ids:
+            latest = index.score_for_province(uid, ANY_PROVINCE)
+            self.latest_min_scores.append(latest["min_score"] if latest else None)
+
+        # {专业: (各大学匹配度列, 匹配度>0的大学ID)}
+        self._match_cache: Dict[str, tuple] = {}
+
+    def _mask(self, strengths: Iterable[str]) -> int:
+        """专业名称集合转换为位图（不在任何大学王牌专业中的名称忽略）"""
+        mask = 0
+        for s in strengths:
+            mask |= self.bits.get(s, 0)
+        return mask
+
+    def _compute(self, major: str) -> tuple:
+        """批量计算所有大学对指定专业的匹配度"""
+        related_mask = self._mask(self.graph.related(major))
+        category_mask = self._mask(self.graph.category_peers(major))
+        scores = []
+        for mask in self.strength_masks:
+            hit = (mask & related_mask).bit_count()
+            if hit >= 2:
+                scores.append(100)
+            elif hit == 1:
+                scores.append(60)
+            elif mask & category_mask:
+                scores.append(30)
+            else:
+                scores.append(0)
+        matched = [uid for uid, score in zip(self.ids, scores) if score > 0]
+        return scores, matched
+
+    def _get(self, major: str) -> tuple:
+        if major not in self._match_cache:
+            if not self.graph.has(major):
+                return self._compute(major)
+            self._match_cache[major] = self._compute(major)
+        return self._match_cache[major]
+
+    def match_score(self, major: str, university_id: int) -> int:
+        """单所大学的专业匹配度"""
+        return self._get(major)[0][self.column[university_id]]
+
+    def matched_ids(self, major: str) -> List[int]:
+        """专业匹配度>0的大学ID（保持原始顺序）"""
+        return self._get(major)[1]
+
+    def employment_rate(self, university_id: int) -> float:
+        return self.employment_rates[self.column[university_id]]
+
+    def latest_min_score(self, university_id: int) -> Optional[int]:
+        """第一条录取分数（任意省份）的最低分"""
+        return self.latest_min_scores[self.column[university_id]]
+
+    @staticmethod
+    def top_k(
+        ids: Iterable[int],
+        key: Callable[[int], object],
+        k: int,
+        exclude: Optional[set] = None
+    ) -> List[int]:
+        """按排序键降序取前k个（同分保持原始顺序，等价于稳定排序后切片）"""
+        if exclude:
+            ids = [uid for uid in ids if uid not in exclude]
+        return heapq.nlargest(k, ids, key=key)
@@ -0,0 +1,293 @@
+"""
+爬取任务队列测试
+验证 CrawlQueue 的依赖、失败重试和租约过期处理，以及工作池在异常后继续运行：
+1. 依赖未完成的任务不可领取，依赖最终失败时递归标记为失败
+2. 失败未超过最大次数时退避后重新入队
+3. 租约过期的任务按失败处理（计入执行次数），原工作进程迟到的结果被忽略
+4. 启动爬取计划按已注册的抓取器合并数据源
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+# 添加 src 目录到Python路径（与服务启动方式一致，按 services.* 导入）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from services.crawl_queue import CrawlQueue, QUEUED, RUNNING, COMPLETED, FAILED
+from services.crawl_planner import PlannedCrawl, plan_crawl
+from services.crawl_worker import ALL_SOURCES, CrawlJobRunner, CrawlWorkerPool
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = CrawlQueue(str(tmp_path / "crawl_queue.db"), backoff_base=60.0)
+    yield q
+    q.close()
+
+
+def wait_until(predicate, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class TestDependencies:
+    """任务依赖"""
+
+    def test_dependent_waits_for_dependency(self, queue):
+        """依赖完成前不可领取，完成后可领取"""
+        first = queue.enqueue("universities")
+        second = queue.enqueue("majors", depends_on=[first])
+
+        job = queue.claim("w1", default_limit=5)
+        assert job["id"] == first
+        assert queue.claim("w1", default_limit=5) is None
+
+        queue.complete(first, "w1", {"records_crawled": 3})
+        job = queue.claim("w1", default_limit=5)
+        assert job["id"] == second
+        assert job["status"] == RUNNING and job["attempts"] == 1
+
+    def test_failure_cascades_to_dependents(self, queue):
+        """依赖最终失败时，下游任务递归标记为失败"""
+        root = queue.enqueue("universities")
+        child = queue.enqueue("majors", depends_on=[root])
+        grandchild = queue.enqueue("major_market", depends_on=[child])
+        unrelated = queue.enqueue("news")
+
+        queue.claim("w1", default_limit=5)
+        assert queue.fail(root, "w1", "boom") is False
+
+        assert queue.get(root)["status"] == FAILED
+        for job_id, failed_id in ((child, root), (grandchild, child)):
+            job = queue.get(job_id)
+            assert job["status"] == FAILED
+            assert job["error_message"] == f"依赖任务失败: {failed_id}"
+        assert queue.get(unrelated)["status"] == QUEUED
+
+
+class TestRetry:
+    """失败重试"""
+
+    def test_failed_job_requeued_with_backoff(self, queue):
+        """未超过最大次数时重新入队，退避期内不可领取"""
+        job_id = queue.enqueue("majors", max_attempts=3)
+        queue.claim("w1")
+        before = time.time()
+        assert queue.fail(job_id, "w1", "timeout") is True
+
+        job = queue.get(job_id)
+        assert job["status"] == QUEUED
+        assert job["attempts"] == 1
+        assert job["error_message"] == "timeout"
+        available_at = queue._get_conn().execute(
+            "SELECT available_at FROM crawl_jobs WHERE id = ?", (job_id,)
+        ).fetchone()[0]
+        assert available_at >= before + queue.backoff_base * 0.5
+        assert queue.claim("w1") is None
+
+    def test_job_fails_after_max_attempts(self, queue):
+        """达到最大次数后标记为失败"""
+        queue.backoff_base = 0
+        job_id = queue.enqueue("majors", max_attempts=2)
+        for expected_retry in (True, False):
+            assert queue.claim("w1")["id"] == job_id
+            assert queue.fail(job_id, "w1", "timeout") is expected_retry
+
+        job = queue.get(job_id)
+        assert job["status"] == FAILED
+        assert job["attempts"] == 2
+
+    def test_backoff_delay_grows_and_is_capped(self, queue):
+        queue.backoff_max = 300.0
+        for attempts, upper in ((1, 60.0), (2, 120.0), (3, 240.0), (10, 300.0)):
+            delay = queue.backoff_delay(attempts)
+            assert upper * 0.5 <= delay <= upper
+
+    def test_release_does_not_count_attempt(self, queue):
+        """工作池停止时放回队列的任务不计入执行次数"""
+        job_id = queue.enqueue("majors")
+        queue.claim("w1")
+        queue.release(job_id, "w1")
+
+        job = queue.get(job_id)
+        assert job["status"] == QUEUED and job["attempts"] == 0
+        assert queue.claim("w1")["id"] == job_id
+
+
+class TestLeaseExpiry:
+    """租约过期"""
+
+    def test_expired_job_retried_within_attempts(self, queue):
+        job_id = queue.enqueue("majors", max_attempts=2)
+        queue.claim("dead-worker", lease_seconds=-1)
+
+        assert queue.requeue_expired() == 1
+        job = queue.get(job_id)
+        assert job["status"] == QUEUED
+        assert job["attempts"] == 1
+        assert job["error_message"] == "租约过期，执行任务的工作进程已退出"
+
+    def test_expired_job_fails_when_attempts_exhausted(self, queue):
+        """租约过期计入执行次数，次数用完后标记为失败并级联到下游"""
+        job_id = queue.enqueue("majors", max_attempts=1)
+        dependent = queue.enqueue("major_market", depends_on=[job_id])
+        queue.claim("dead-worker", lease_seconds=-1)
+
+        assert queue.requeue_expired() == 1
+        assert queue.get(job_id)["status"] == FAILED
+        assert queue.get(dependent)["status"] == FAILED
+
+    def test_live_lease_untouched(self, queue):
+        job_id = queue.enqueue("majors")
+        queue.claim("w1", lease_seconds=600)
+
+        assert queue.requeue_expired() == 0
+        assert queue.get(job_id)["status"] == RUNNING
+
+    def test_stale_worker_results_ignored(self, queue):
+        """租约过期后任务由其他工作进程重新领取，原工作进程的心跳、完成和失败不生效"""
+        queue.backoff_base = 0
+        job_id = queue.enqueue("majors", max_attempts=3)
+        queue.claim("w1", lease_seconds=-1)
+        queue.requeue_expired()
+        assert queue.claim("w2")["id"] == job_id
+
+        assert queue.heartbeat(job_id, "w1") is False
+        assert queue.complete(job_id, "w1", {"records_crawled": 1}) is False
+        assert queue.fail(job_id, "w1", "timeout") is False
+        queue.release(job_id, "w1")
+        job = queue.get(job_id)
+        assert job["status"] == RUNNING and job["worker_id"] == "w2" and job["attempts"] == 2
+
+        assert queue.heartbeat(job_id, "w2") is True
+        assert queue.complete(job_id, "w2", {"records_crawled": 2}) is True
+        assert queue.get(job_id)["records_crawled"] == 2
+        # 已完成的任务不再接受失败结果
+        assert queue.fail(job_id, "w2", "late") is False
+        assert queue.get(job_id)["status"] == COMPLETED
+
+
+class TestWorkerPool:
+    """工作池"""
+
+    def test_worker_survives_errors_and_reaps_expired_leases(self, queue):
+        """领取出错时工作协程继续运行，租约过期任务被定期回收"""
+        queue.backoff_base = 0
+        expired = queue.enqueue("majors", max_attempts=2)
+        queue.claim("dead-worker", lease_seconds=0.05)
+
+        errors = {"left": 3}
+        claim = queue.claim
+
+        def flaky_claim(*args, **kwargs):
+            if errors["left"] > 0:
+                errors["left"] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return claim(*args, **kwargs)
+
+        queue.claim = flaky_claim
+        handled = []
+
+        async def handler(job):
+            handled.append(job["id"])
+            return {"records_crawled": 1}
+
+        pool = CrawlWorkerPool(queue, handler, concurrency=1, poll_interval=0.02, lease_seconds=0.3)
+        pool.start()
+        try:
+            fresh = queue.enqueue("news")
+            assert wait_until(lambda: all(queue.get(i)["status"] == COMPLETED for i in (expired, fresh)))
+        finally:
+            pool.stop()
+
+        assert pool.get_stats()["errors"] == 3
+        assert sorted(handled) == sorted([expired, fresh])
+        assert queue.get(expired)["attempts"] == 2
+
+    def test_heartbeat_errors_do_not_stop_renewal(self, queue):
+        """续约出错时记录错误并继续续约，长任务不会因租约过期被回收"""
+        job_id = queue.enqueue("majors")
+        errors = {"left": 1}
+        heartbeat = queue.heartbeat
+
+        def flaky_heartbeat(*args, **kwargs):
+            if errors["left"] > 0:
+                errors["left"] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return heartbeat(*args, **kwargs)
+
+        queue.heartbeat = flaky_heartbeat
+
+        async def handler(job):
+            await asyncio.sleep(0.6)
+            return {"records_crawled": 1}
+
+        pool = CrawlWorkerPool(queue, handler, concurrency=1, poll_interval=0.02, lease_seconds=0.3)
+        pool.start()
+        try:
+            assert wait_until(lambda: queue.get(job_id)["status"] == COMPLETED)
+        finally:
+            pool.stop()
+
+        assert pool.get_stats()["errors"] == 1
+        assert queue.get(job_id)["attempts"] == 1
+
+
+class TestCrawlPlan:
+    """启动爬取计划"""
+
+    def test_unregistered_fetchers_merge_into_all_sources(self):
+        """未注册的抓取器名称按全部来源处理，全部来源只抓取一次"""
+        plan = plan_crawl([
+            {"task_key": "universities", "fetcher": "gaokao_api", "priority": 2},
+            {"task_key": "majors", "fetcher": "eol", "priority": 1, "depends_on": ["universities"]},
+            {"task_key": "news", "priority": 5},
+        ])
+        assert plan == [PlannedCrawl(ALL_SOURCES, ["universities", "majors", "news"], 1, [])]
+
+    def test_registered_fetchers_keep_dependencies(self):
+        plan = plan_crawl([
+            {"task_key": "universities", "fetcher": "gaokao_api", "priority": 5},
+            {"task_key": "majors", "priority": 1, "depends_on": ["universities"]},
+        ], fetchers=[ALL_SOURCES, "gaokao_api"])
+        assert plan == [
+            PlannedCrawl("gaokao_api", ["universities"], 1, []),
+            PlannedCrawl(ALL_SOURCES, ["majors"], 1, ["gaokao_api"]),
+        ]
+
+
+class TestCrawlJobRunner:
+    """默认任务执行函数"""
+
+    def test_ingest_stats_returned_with_job_result(self, queue):
+        """每个任务的入库统计随任务结果返回，不依赖数据管理器上的共享状态"""
+        class FakeDataManager:
+            def ingest(self, new_data):
+                return {"received": len(new_data), "saved": len(new_data) - 1, "timings_ms": {"insert": 1.5}}
+
+        async def fetch():
+            return [{"title": "a"}, {"title": "b"}]
+
+        runner = CrawlJobRunner(FakeDataManager())
+        runner.fetchers[ALL_SOURCES] = fetch
+        job_id = queue.enqueue(ALL_SOURCES)
+        job = queue.claim("w1")
+        result = asyncio.run(runner(job))
+        assert result == {
+            "records_crawled": 2,
+            "records_saved": 1,
+            "ingest_stats": {"received": 2, "saved": 1, "timings_ms": {"insert": 1.5}},
+        }
+
+        queue.complete(job_id, "w1", result)
+        job = queue.get(job_id)
+        assert job["records_saved"] == 1 and job["ingest_stats"]["timings_ms"] == {"insert": 1.5}
@@ -0,0 +1,412 @@
+"""
+大学推荐打分引擎测试
+用生成的大学数据，对比 UniversityScoringEngine 与原逐校全量扫描实现（集合求交 + 构造字典 + 稳定排序）的结果：
+1. 每所大学对每个专业的匹配度一致
+2. get_recommended_universities 各场景返回的推荐列表完全一致
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip("asyncpg")
+
+# 添加 src 目录到Python路径（与服务启动方式一致，按 services.* 导入）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+# 导入 main 时会创建任务队列和本地数据库，测试使用临时文件，不改动仓库中的 market_data.db
+_tmp_dir = tempfile.mkdtemp()
+os.environ.setdefault("CRAWL_QUEUE_PATH", os.path.join(_tmp_dir, "crawl_queue.db"))
+os.environ.setdefault("MARKET_DATA_DB_PATH", os.path.join(_tmp_dir, "market_data.db"))
+
+from main import UniversityDataService
+
+# 原实现中硬编码的专业与大学王牌专业映射、学科门类映射
+MAJOR_TO_STRENGTHS = {
+    '计算机科学与技术': ['计算机科学与技术', '软件工程', '人工智能', '电子信息工程', '数据科学与大数据技术'],
+    '人工智能': ['人工智能', '计算机科学与技术', '自动化', '电子信息工程'],
+    '软件工程': ['软件工程', '计算机科学与技术', '电子信息工程'],
+    '电子信息工程': ['电子信息工程', '通信工程', '自动化', '电气工程'],
+    '自动化': ['自动化', '电气工程', '计算机科学与技术', '机械工程'],
+    '机械工程': ['机械工程', '材料科学与工程', '车辆工程', '航空航天工程'],
+    '航空航天工程': ['航空航天工程', '机械工程', '材料科学与工程', '仪器科学与技术'],
+    '数学': ['数学', '统计学', '计算机科学与技术', '物理学'],
+    '物理学': ['物理学', '电子信息工程', '材料科学与工程', '计算机科学与技术'],
+    '化学': ['化学', '材料科学与工程', '药学', '化学工程与技术'],
+    '数据科学与大数据技术': ['数据科学与大数据技术', '计算机科学与技术', '统计学'],
+    '统计学': ['统计学', '数学', '数据科学与大数据技术', '金融学'],
+    '临床医学': ['临床医学', '基础医学', '口腔医学', '公共卫生与预防医学'],
+    '口腔医学': ['口腔医学', '临床医学', '基础医学'],
+    '护理学': ['护理学', '临床医学', '基础医学'],
+    '药学': ['药学', '化学', '临床医学', '生物医学工程'],
+    '法学': ['法学', '知识产权', '社会学', '政治学与行政学'],
+    '社会学': ['社会学', '社会工作', '法学', '政治学与行政学'],
+    '社会工作': ['社会工作', '社会学', '法学'],
+    '金融学': ['金融学', '经济学', '统计学', '工商管理', '会计学'],
+    '经济学': ['经济学', '金融学', '统计学', '国际经济与贸易'],
+    '会计学': ['会计学', '工商管理', '金融学', '财务管理'],
+    '工商管理': ['工商管理', '会计学', '财务管理', '人力资源管理'],
+    '市场营销': ['工商管理', '市场营销', '电子商务', '经济学'],
+    '财务管理': ['财务管理', '会计学', '工商管理', '金融学'],
+    '英语': ['英语', '翻译', '日语', '法语'],
+    '汉语言文学': ['汉语言文学', '新闻学', '广告学', '编辑出版学'],
+    '新闻学': ['新闻学', '广告学', '传播学', '编辑出版学'],
+    '教育学': ['教育学', '学前教育', '小学教育', '体育教育'],
+    '学前教育': ['学前教育', '教育学', '小学教育'],
+    '体育教育': ['体育教育', '运动训练', '社会体育', '教育学'],
+    '设计学': ['设计学', '美术学', '艺术设计', '视觉传达'],
+    '音乐学': ['音乐学', '作曲与作曲技术理论', '舞蹈学', '戏剧与影视学'],
+    '心理学': ['心理学', '应用心理学', '教育学', '社会学'],
+    '建筑学': ['建筑学', '城乡规划', '土木工程', '风景园林'],
+    '土木工程': ['土木工程', '建筑学', '工程管理', '水利工程'],
+}
+
+CATEGORY_MAPPING = {
+    '工学': ['机械工程', '材料科学与工程', '电气工程', '计算机科学与技术'],
+    '理学': ['数学', '物理学', '化学', '统计学'],
+    '医学': ['临床医学', '口腔医学', '护理学', '药学'],
+    '法学': ['法学', '社会学', '政治学', '哲学', '社会工作'],
+    '经济学': ['金融学', '经济学', '工商管理', '会计学'],
+    '文学': ['英语', '汉语言文学', '新闻学'],
+    '教育学': ['教育学', '学前教育', '体育教育'],
+}
+
+
+def legacy_match_score(university: dict, major: str) -> float:
+    """原实现：计算大学与专业的匹配度（0-100分）"""
+    related_strengths = MAJOR_TO_STRENGTHS.get(major, [])
+    if not major or not related_strengths:
+        return 0
+
+    university_strengths = university.get('major_strengths', [])
+    matched = set(university_strengths) & set(related_strengths)
+    match_count = len(matched)
+
+    if match_count >= 2:
+        return 100
+    elif match_count == 1:
+        return 60
+    else:
+        for category, strengths in CATEGORY_MAPPING.items():
+            if any(s in related_strengths for s in strengths):
+                if any(s in university_strengths for s in strengths):
+                    return 30
+
+        return 0
+
+
+def legacy_recommend(universities: list, province: str = None, score: int = None, major: str = None, limit: int = 10) -> dict:
+    """原推荐实现：每个场景逐校扫描全部大学，构造结果字典后整体排序"""
+    related_strengths = MAJOR_TO_STRENGTHS.get(major, [])
+
+    def get_major_match_score(university: dict) -> float:
+        return legacy_match_score(university, major)
+
+    result = []
+    shown_ids = set()
+
+    # 获取某大学在指定省份的录取分数
+    def get_score_for_province(university, target_province):
+        if not university.get('admission_scores'):
+            return None
+        for s in university['admission_scores']:
+            if s['province'] == target_province:
+                return s
+        return None
+
+    # ==================== 场景1: 省份+分数+专业 ====================
+    if province and score and score > 0 and major and related_strengths:
+        # 1.1 该省符合分数和专业的大学
+        group = []
+        for u in universities:
+            if u["id"] in shown_ids:
+                continue
+            major_score = get_major_match_score(u)
+            if major_score == 0:
+                continue
+
+            latest = get_score_for_province(u, province)
+            if not latest:
+                continue
+
+            score_val = latest["min_score"]
+            if score - 30 <= score_val <= score + 30:
+                group.append({
+                    **u,
+                    "match_type": "score",
+                    "match_reason": f"本省{province}高校，录取分{int(score_val)}分，与您分数({score}分)匹配，{major}专业实力强",
+                    "latest_score": latest,
+                    "major_match_score": major_score
+                })
+
+        group.sort(key=lambda x: (x["major_match_score"], x["latest_score"]["min_score"]), reverse=True)
+        result.extend(group[:5])
+        shown_ids.update([u["id"] for u in group[:5]])
+
+        # 1.2 全国符合分数和专业的大学（排除已显示的）
+        if len(group) < 5:
+            group2 = []
+            for u in universities:
+                if u["id"] in shown_ids:
+                    continue
+                major_score = get_major_match_score(u)
+                if major_score == 0:
+                    continue
+
+                # 获取任意省份的分数
+                latest = u["admission_scores"][0] if u.get("admission_scores") else None
+                if not latest:
+                    continue
+
+                score_val = latest["min_score"]
+                if score - 30 <= score_val <= score + 30:
+                    group2.append({
+                        **u,
+                        "match_type": "score",
+                        "match_reason": f"录取分{int(score_val)}分，与您分数({score}分)匹配，{major}专业实力强",
+                        "latest_score": latest,
+                        "major_match_score": major_score
+                    })
+
+            group2.sort(key=lambda x: (x["major_match_score"], x["latest_score"]["min_score"]), reverse=True)
+            group2 = group2[:(5 - len(group))]
+            result.extend(group2)
+            shown_ids.update([u["id"] for u in group2])
+
+    # ==================== 场景2: 只有省份 ====================
+    elif province and not score and major and related_strengths:
+        # 2.1 同省该专业大学（按专业匹配度+就业率排序）
+        group = []
+        for u in universities:
+            if u["id"] in shown_ids or u["province"] != province:
+                continue
+            major_score = get_major_match_score(u)
+            if major_score > 0:
+                latest = get_score_for_province(u, province)
+                group.append({
+                    **u,
+                    "match_type": "province",
+                    "match_reason": f"本省{province}高校，{major}专业实力较强",
+                    "latest_score": latest,
+                    "major_match_score": major_score
+                })
+
+        # 按专业匹配度和就业率排序
+        group.sort(key=lambda x: (x["major_match_score"], x["employment_rate"]), reverse=True)
+        result.extend(group[:5])
+        shown_ids.update([u["id"] for u in group[:5]])
+
+        # 2.2 全国该专业大学（排除已显示的）- 只有当本省没有足够大学时才补充
+        if len(group) < 5:
+            group2 = []
+            for u in universities:
+                if u["id"] in shown_ids:
+                    continue
+                major_score = get_major_match_score(u)
+                if major_score > 0:
+                    latest = u["admission_scores"][0] if u.get("admission_scores") else None
+                    group2.append({
+                        **u,
+                        "match_type": "national",
+                        "match_reason": f"{major}专业实力强，全国知名",
+                        "latest_score": latest,
+                        "major_match_score": major_score
+                    })
+
+            group2.sort(key=lambda x: (x["major_match_score"], x["employment_rate"]), reverse=True)
+            group2 = group2[:(5 - len(group))]
+            result.extend(group2)
+            shown_ids.update([u["id"] for u in group2])
+
+    # ==================== 场景3: 只有分数 ====================
+    elif score and score > 0 and not province and not major:
+        group = []
+        for u in universities:
+            if u["id"] in shown_ids:
+                continue
+            # 获取任意省份的分数
+            latest = u["admission_scores"][0] if u.get("admission_scores") else None
+            if not latest:
+                continue
+
+            score_val = latest["min_score"]
+            if score - 30 <= score_val <= score + 30:
+                group.append({
+                    **u,
+                    "match_type": "score",
+                    "match_reason": f"录取分{int(score_val)}分，与您分数({score}分)接近",
+                    "latest_score": latest,
+                    "major_match_score": 0
+                })
+
+        group.sort(key=lambda x: x["latest_score"]["min_score"], reverse=True)
+        result.extend(group[:5])
+        shown_ids.update([u["id"] for u in group[:5]])
+
+    # ==================== 场景4: 都没有设置 ====================
+    elif not province and not score and major and related_strengths:
+        # 按专业推荐，知名度从高到低（就业率排序）
+        group = []
+        for u in universities:
+            if u["id"] in shown_ids:
+                continue
+            major_score = get_major_match_score(u)
+            if major_score > 0:
+                latest = u["admission_scores"][0] if u.get("admission_scores") else None
+                group.append({
+                    **u,
+                    "match_type": "national",
+                    "match_reason": f"{major}专业实力强，{u['level']}高校，就业率{u['employment_rate']}%",
+                    "latest_score": latest,
+                    "major_match_score": major_score
+                })
+
+        # 按专业匹配度和就业率排序
+        group.sort(key=lambda x: (x["major_match_score"], x["employment_rate"]), reverse=True)
+        result.extend(group[:5])
+        shown_ids.update([u["id"] for u in group[:5]])
+
+    # ==================== 场景5: 只有省份+分数（无专业） ====================
+    elif province and score and score > 0 and not major:
+        # 5.1 该省符合分数的大学
+        group = []
+        for u in universities:
+            if u["id"] in shown_ids:
+                continue
+            latest = get_score_for_province(u, province)
+            if not latest:
+                continue
+
+            score_val = latest["min_score"]
+            if score - 30 <= score_val <= score + 30:
+                group.append({
+                    **u,
+                    "match_type": "score",
+                    "match_reason": f"本省{province}高校，录取分{int(score_val)}分，与您分数({score}分)匹配",
+                    "latest_score": latest,
+                    "major_match_score": 0
+                })
+
+        group.sort(key=lambda x: x["latest_score"]["min_score"], reverse=True)
+        result.extend(group[:5])
+        shown_ids.update([u["id"] for u in group[:5]])
+
+        # 5.2 全国符合分数的大学（排除已显示的）
+        if len(group) < 5:
+            group2 = []
+            for u in universities:
+                if u["id"] in shown_ids:
+                    continue
+                latest = u["admission_scores"][0] if u.get("admission_scores") else None
+                if not latest:
+                    continue
+
+                score_val = latest["min_score"]
+                if score - 30 <= score_val <= score + 30:
+                    group2.append({
+                        **u,
+                        "match_type": "national",
+                        "match_reason": f"录取分{int(score_val)}分，与您分数({score}分)接近",
+                        "latest_score": latest,
+                        "major_match_score": 0
+                    })
+
+            group2.sort(key=lambda x: x["latest_score"]["min_score"], reverse=True)
+            group2 = group2[:(5 - len(group))]
+            result.extend(group2)
+            shown_ids.update([u["id"] for u in group2])
+
+    # ==================== 场景6: 只有省份（无专业） ====================
+    elif province and not score and not major:
+        # 本省高校按就业率排序
+        group = []
+        for u in universities:
+            if u["id"] in shown_ids or u["province"] != province:
+                continue
+            latest = get_score_for_province(u, province)
+            group.append({
+                **u,
+                "match_type": "province",
+                "match_reason": f"本省{province}高校，就业率{u['employment_rate']}%",
+                "latest_score": latest,
+                "major_match_score": 0
+            })
+
+        group.sort(key=lambda x: x["employment_rate"], reverse=True)
+        result.extend(group[:5])
+        shown_ids.update([u["id"] for u in group[:5]])
+
+    # ==================== 默认兜底 ====================
+    if len(result) == 0:
+        # 返回知名度最高的大学（就业率最高的）
+        group = []
+        for u in universities:
+            if u["id"] in shown_ids:
+                continue
+            latest = u["admission_scores"][0] if u.get("admission_scores") else None
+            group.append({
+                **u,
+                "match_type": "national",
+                "match_reason": f"{u['level']}高校，就业率{u['employment_rate']}%",
+                "latest_score": latest,
+                "major_match_score": 0
+            })
+
+        group.sort(key=lambda x: x["employment_rate"], reverse=True)
+        result.extend(group[:5])
+
+    return {
+        "universities": result[:limit],
+        "user_target": {
+            "province": province,
+            "score": score,
+            "major": major
+        }
+    }
+
+
+@pytest.fixture(scope="module")
+def service():
+    return UniversityDataService()
+
+
+PROVINCES = [None, "北京", "上海", "江苏", "湖北", "山西", "辽宁", "四川", "火星"]
+SCORES = [None, 0, 450, 520, 560, 600, 640, 680, 700]
+MAJORS = [None, "计算机科学与技术", "法学", "数学", "临床医学", "英语", "哲学", "经济学", "建筑学", "不存在"]
+
+
+class TestUniversityScoringEngine:
+    """打分引擎与原逐校循环对比"""
+
+    def test_match_score_matches_legacy(self, service):
+        """每所大学对每个已配置专业的匹配度一致"""
+        majors = list(MAJOR_TO_STRENGTHS) + ["不存在"]
+        for major, university in itertools.product(majors, service.universities):
+            assert service.scoring.match_score(major, university["id"]) == legacy_match_score(university, major), (major, university["name"])
+
+    def test_matched_ids_keep_original_order(self, service):
+        """匹配度>0的大学按原始顺序返回"""
+        for major in MAJOR_TO_STRENGTHS:
+            expected = [u["id"] for u in service.universities if legacy_match_score(u, major) > 0]
+            assert service.scoring.matched_ids(major) == expected, major
+
+    def test_top_k_is_stable_sort(self, service):
+        """同分时保持原始顺序，等价于稳定降序排序后切片"""
+        ids = service.index.all_ids
+        key = lambda uid: service.scoring.employment_rate(uid) // 5
+        expected = sorted(ids, key=key, reverse=True)[:7]
+        assert service.scoring.top_k(ids, key, 7) == expected
+
+    @pytest.mark.parametrize("major", MAJORS)
+    def test_recommendations_match_legacy(self, service, major):
+        """各场景（省份/分数/专业组合）返回的推荐列表一致"""
+        for province, score in itertools.product(PROVINCES, SCORES):
+            expected = legacy_recommend(service.universities, province, score, major, 10)
+            assert service.get_recommended_universities(province, score, major, 10) == expected, (province, score, major)
+
+    def test_limit_truncates_results(self, service):
+        """limit 小于结果数时截断"""
+        expected = legacy_recommend(service.universities, "北京", 640, "计算机科学与技术", 3)
+        assert service.get_recommended_universities("北京", 640, "计算机科学与技术", 3) == expected
@@ -108,6 +108,8 @@ async def get_recommendations(
     sort_order: str = Query("desc", description="排序顺序：desc, asc"),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页数量，最大100"),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor，传入后忽略page"),
+    total_mode: str = Query("exact", description="总数统计方式：exact, estimate, none"),
     engine: MajorRecommendationEngine = Depends(get_db_engine)
 ):
     """
@@ -147,7 +149,9 @@ async def get_recommendations(
             sort_by=sort_by_enum,
             sort_order=sort_order_enum,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            cursor=cursor,
+            total_mode=total_mode
         )
         
         if not result["success"]:
@@ -163,6 +167,9 @@ async def get_recommendations(
         
     except HTTPException:
         raise
+    except ValueError as e:
+        # 游标无效或总数统计方式无效
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ 获取推荐失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取推荐失败: {str(e)}")
@@ -4,12 +4,21 @@
 """
 
 import logging
+import os
+import sys
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
 import psycopg2
 from datetime import datetime
 
+# 跨服务共用的模块位于 backend/shared
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.utils.pagination import (
+    SortKey, TOTAL_EXACT, TOTAL_ESTIMATE,
+    encode_cursor, decode_cursor, keyset_condition, estimate_count, validate_total_mode
+)
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -110,7 +119,9 @@ class MajorRecommendationEngine:
         sort_by: SortBy = SortBy.HEAT_INDEX,
         sort_order: SortOrder = SortOrder.DESC,
         page: int = 1,
-        page_size: int = 10
+        page_size: int = 10,
+        cursor: Optional[str] = None,
+        total_mode: str = TOTAL_EXACT
     ) -> Dict[str, Any]:
         """
         获取专业推荐列表
@@ -121,10 +132,35 @@ class MajorRecommendationEngine:
             sort_order: 排序顺序
             page: 页码
             page_size: 每页数量
+            cursor: 上一页返回的next_cursor，传入后按游标定位并忽略page
+            total_mode: 总数统计方式 exact/estimate/none
             
         Returns:
             推荐结果和分页信息
+            
+        Raises:
+            InvalidCursorError: 游标无效或与排序方式不匹配
         """
+        total_mode = validate_total_mode(total_mode)
+        valid_sort_fields = {
+            SortBy.HEAT_INDEX: "mmd.heat_index",
+            SortBy.EMPLOYMENT_RATE: "mmd.employment_rate", 
+            SortBy.AVG_SALARY: "mmd.avg_salary",
+            SortBy.FUTURE_PROSPECTS: "mmd.future_prospects_score",
+            SortBy.INDUSTRY_DEMAND: "mmd.industry_demand_score",
+            SortBy.CRAWLED_AT: "mmd.crawled_at"
+        }
+        order_field = valid_sort_fields.get(sort_by, "mmd.heat_index")
+        descending = sort_order == SortOrder.DESC
+        # 排序键：主排序字段、热度（次排序）、行情记录id（保证顺序唯一）
+        # PostgreSQL 默认升序 NULL 在后、降序 NULL 在前
+        sort_keys = [SortKey(order_field, descending, nulls_last=not descending)]
+        if order_field != "mmd.heat_index":
+            sort_keys.append(SortKey("mmd.heat_index", True, nulls_last=False))
+        sort_keys.append(SortKey("mmd.id", descending, nulls_last=not descending))
+        signature = f"{sort_by.value}:{sort_order.value}:{category_id if category_id is not None else ''}"
+        cursor_values = decode_cursor(cursor, signature) if cursor else None
+        
         try:
             # 构建WHERE条件
             where_conditions = ["mmd.major_id IS NOT NULL"]
@@ -135,34 +171,32 @@ class MajorRecommendationEngine:
                 params.append(category_id)
             
             where_clause = " AND ".join(where_conditions)
+            from_clause = """
+                FROM majors m
+                LEFT JOIN major_categories mc ON m.category_id = mc.id
+                LEFT JOIN major_market_data mmd ON m.id = mmd.major_id
+            """
             
             # 构建ORDER BY子句
-            valid_sort_fields = {
-                SortBy.HEAT_INDEX: "mmd.heat_index",
-                SortBy.EMPLOYMENT_RATE: "mmd.employment_rate", 
-                SortBy.AVG_SALARY: "mmd.avg_salary",
-                SortBy.FUTURE_PROSPECTS: "mmd.future_prospects_score",
-                SortBy.INDUSTRY_DEMAND: "mmd.industry_demand_score",
-                SortBy.CRAWLED_AT: "mmd.crawled_at"
-            }
-            
-            order_field = valid_sort_fields.get(sort_by, "mmd.heat_index")
-            order_direction = sort_order.value.upper()
-            order_clause = f"ORDER BY {order_field} {order_direction}, mmd.heat_index DESC"
+            order_clause = "ORDER BY " + ", ".join(key.order_sql() for key in sort_keys)
             
-            # 计算分页
+            # 计算分页（游标分页不使用OFFSET）
             offset = (page - 1) * page_size
+            query_conditions = where_conditions
+            query_params = list(params)
+            if cursor_values is not None:
+                condition, cursor_params = keyset_condition(sort_keys, cursor_values, "%s")
+                query_conditions = where_conditions + [condition]
+                query_params.extend(cursor_params)
+                offset = 0
             
             # 查询总数
-            count_query = f"""
-                SELECT COUNT(*)
-                FROM majors m
-                LEFT JOIN major_categories mc ON m.category_id = mc.id
-                LEFT JOIN major_market_data mmd ON m.id = mmd.major_id
-                WHERE {where_clause}
-            """
-            self.cursor.execute(count_query, params)
-            total_count = self.cursor.fetchone()[0]
+            total_count = None
+            if total_mode == TOTAL_EXACT:
+                self.cursor.execute(f"SELECT COUNT(*) {from_clause} WHERE {where_clause}", params)
+                total_count = self.cursor.fetchone()[0]
+            elif total_mode == TOTAL_ESTIMATE:
+                total_count = estimate_count(self.cursor, f"SELECT 1 {from_clause} WHERE {where_clause}", params)
             
             # 查询数据
             query = f"""
@@ -176,16 +210,15 @@ class MajorRecommendationEngine:
                     mmd.industry_demand_score,
                     mmd.future_prospects_score,
                     COALESCE(mmd.talent_shortage, false) as talent_shortage,
-                    mmd.data_period
-                FROM majors m
-                LEFT JOIN major_categories mc ON m.category_id = mc.id
-                LEFT JOIN major_market_data mmd ON m.id = mmd.major_id
-                WHERE {where_clause}
+                    mmd.data_period,
+                    {", ".join(key.expr for key in sort_keys)}
+                {from_clause}
+                WHERE {" AND ".join(query_conditions)}
                 {order_clause}
                 LIMIT %s OFFSET %s
             """
             
-            query_params = params + [page_size, offset]
+            query_params.extend([page_size, offset])
             self.cursor.execute(query, query_params)
             
             results = self.cursor.fetchall()
@@ -209,18 +242,22 @@ class MajorRecommendationEngine:
                 recommendations.append(recommendation)
             
             # 计算分页信息
-            total_pages = (total_count + page_size - 1) // page_size
+            next_cursor = None
+            if results and len(results) == page_size:
+                next_cursor = encode_cursor(signature, list(results[-1][10:]))
+            total_pages = (total_count + page_size - 1) // page_size if total_count is not None else None
             
             result = {
                 "success": True,
                 "data": [rec.to_dict() for rec in recommendations],
                 "pagination": {
-                    "page": page,
+                    "page": None if cursor else page,
                     "page_size": page_size,
                     "total_count": total_count,
                     "total_pages": total_pages,
-                    "has_next": page < total_pages,
-                    "has_prev": page > 1
+                    "has_next": next_cursor is not None if cursor or total_pages is None else page < total_pages,
+                    "has_prev": cursor is not None or page > 1,
+                    "next_cursor": next_cursor
                 },
                 "filters": {
                     "category_id": category_id,
@@ -230,7 +267,7 @@ class MajorRecommendationEngine:
                 "message": f"成功获取 {len(recommendations)} 个专业推荐"
             }
             
-            logger.info(f"📊 获取推荐: {len(recommendations)}/{total_count} 条记录 (第{page}页)")
+            logger.info(f"📊 获取推荐: {len(recommendations)}/{total_count} 条记录 ({'游标分页' if cursor else f'第{page}页'})")
             return result
             
         except Exception as e:
@@ -244,7 +281,8 @@ class MajorRecommendationEngine:
                     "total_count": 0,
                     "total_pages": 0,
                     "has_next": False,
-                    "has_prev": False
+                    "has_prev": False,
+                    "next_cursor": None
                 },
                 "filters": {
                     "category_id": category_id,
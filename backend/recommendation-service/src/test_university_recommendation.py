@@ -0,0 +1,163 @@
+"""
+大学推荐多层次分数线加载测试
+对比 load_tier_scores 批量查询后按大学分组的结果与原逐个大学查询的结果：
+1. 每所大学的层次、年份顺序和字段完全一致
+2. 多所大学只查询一次数据库
+"""
+
+import os
+import random
+import sys
+from decimal import Decimal
+
+import pytest
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from university_recommendation import format_university_with_tiers, get_tier_display_name, load_tier_scores
+
+MAJOR = "计算机科学与技术"
+TIERS = ["first_tier", "second_tier", "985_211", "provincial_key", "vocational"]
+
+
+def generate_scores(seed: int = 1):
+    """生成录取分数表数据（含其他专业和2021年以前的记录）"""
+    rng = random.Random(seed)
+    rows = []
+    for university_id in range(1, 40):
+        for tier in rng.sample(TIERS, rng.randint(0, 3)):
+            for year in (2019, 2020, 2021, 2022, 2023, 2024):
+                for major in (MAJOR, "法学"):
+                    min_score = rng.randint(450, 680)
+                    avg_score = rng.choice([None, Decimal(0), Decimal(f"{min_score + 5}.5")])
+                    rows.append({
+                        "university_id": university_id,
+                        "major_name": major,
+                        "program_tier": tier,
+                        "year": year,
+                        "min_score": min_score,
+                        "max_score": min_score + rng.randint(5, 30),
+                        "avg_score": avg_score,
+                        "admission_type": rng.choice(["统招", "专项计划"]),
+                    })
+    rng.shuffle(rows)
+    return rows
+
+
+class FakeCursor:
+    """按查询中的条件和排序返回 university_admission_scores 数据"""
+
+    COLUMNS = ("program_tier", "year", "min_score", "max_score", "avg_score", "admission_type")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.results = []
+
+    def execute(self, sql, params):
+        self.conn.queries.append(sql)
+        if self.conn.error:
+            raise self.conn.error
+        ids, major = params
+        batched = "ANY(" in sql
+        ids = set(ids) if batched else {ids}
+        rows = [r for r in self.conn.rows if r["university_id"] in ids and r["major_name"] == major and r["year"] >= 2021]
+        rows.sort(key=lambda r: (r["university_id"], r["program_tier"], -r["year"]))
+        columns = (("university_id",) if batched else ()) + self.COLUMNS
+        self.results = [tuple(r[c] for c in columns) for r in rows]
+
+    def fetchall(self):
+        return self.results
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows, error=None):
+        self.rows = rows
+        self.error = error
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def legacy_tier_scores(conn, university_id: int, major: str) -> dict:
+    """原实现：逐个大学查询分数线并按层次分组"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT program_tier, year, min_score, max_score, avg_score, admission_type
+        FROM university_admission_scores
+        WHERE university_id = %s
+          AND major_name = %s
+          AND year >= 2021
+        ORDER BY program_tier, year DESC
+    """, (university_id, major))
+
+    score_data = {}
+    for tier, year, min_score, max_score, avg_score, admission_type in cursor.fetchall():
+        if tier not in score_data:
+            score_data[tier] = {"tier_name": get_tier_display_name(tier), "years": []}
+        score_data[tier]["years"].append({
+            "year": year,
+            "min_score": min_score,
+            "max_score": max_score,
+            "avg_score": float(avg_score) if avg_score else None,
+            "admission_type": admission_type
+        })
+    cursor.close()
+    return score_data
+
+
+def university_row(university_id: int):
+    return (university_id, f"大学{university_id}", "北京", "北京", "985", Decimal("95.5"), None)
+
+
+@pytest.fixture(scope="module")
+def scores():
+    return generate_scores()
+
+
+class TestLoadTierScores:
+    """多层次分数线批量加载"""
+
+    @pytest.mark.parametrize("university_ids", [[1], [3, 1, 7], list(range(39, 0, -1)), [5, 999, 12]])
+    def test_matches_per_university_query(self, scores, university_ids):
+        """按大学分组的结果与逐个大学查询一致（含没有分数线的大学）"""
+        conn = FakeConnection(scores)
+        tier_scores = load_tier_scores(conn, university_ids, MAJOR)
+
+        legacy_conn = FakeConnection(scores)
+        for university_id in university_ids:
+            expected = legacy_tier_scores(legacy_conn, university_id, MAJOR)
+            assert tier_scores.get(university_id, {}) == expected, university_id
+            assert list(tier_scores.get(university_id, {})) == list(expected), university_id
+
+    def test_formatted_universities_match(self, scores):
+        """格式化后的大学信息（tier_scores / available_tiers）与原实现一致"""
+        university_ids = [8, 2, 30, 2, 17]
+        conn = FakeConnection(scores)
+        tier_scores = load_tier_scores(conn, university_ids, MAJOR)
+
+        legacy_conn = FakeConnection(scores)
+        for university_id in university_ids:
+            formatted = format_university_with_tiers(university_row(university_id), MAJOR, tier_scores)
+            expected = legacy_tier_scores(legacy_conn, university_id, MAJOR)
+            assert formatted["tier_scores"] == expected
+            assert formatted["available_tiers"] == list(expected)
+
+    def test_single_query_for_many_universities(self, scores):
+        conn = FakeConnection(scores)
+        load_tier_scores(conn, list(range(1, 40)), MAJOR)
+        assert len(conn.queries) == 1
+
+    def test_no_query_without_universities(self, scores):
+        conn = FakeConnection(scores)
+        assert load_tier_scores(conn, [], MAJOR) == {}
+        assert conn.queries == []
+
+    def test_query_error_returns_empty(self, scores):
+        """查询失败时与原实现一样返回空分数线"""
+        conn = FakeConnection(scores, error=RuntimeError("connection lost"))
+        assert load_tier_scores(conn, [1, 2], MAJOR) == {}
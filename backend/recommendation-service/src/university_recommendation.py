@@ -1,4 +1,6 @@
 """大学推荐服务主应用"""
+import os
+import sys
 import psycopg2
 import json
 import logging
@@ -9,6 +11,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
 
+# 跨服务共用的模块位于 backend/shared
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from shared.utils.major_graph import get_major_graph
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -80,51 +86,16 @@ def determine_scenario(province: Optional[str], score: Optional[int], major: str
         return "C"  # 只有专业
 
 def calculate_major_match_score(target_major: str, university_majors: List[str]) -> float:
-    """计算专业匹配度"""
-    if not university_majors:
-        return 0.3
-    
-    # 直接匹配
-    if target_major in university_majors:
-        return 1.0
-    
-    # 相关专业匹配
-    related_majors = get_related_majors(target_major)
-    for major in university_majors:
-        if major in related_majors:
-            return 0.8
-    
-    # 跨学科匹配
-    cross_disciplinary = get_cross_disciplinary_majors(target_major)
-    for major in university_majors:
-        if major in cross_disciplinary:
-            return 0.6
-    
-    # 兜底匹配
-    return 0.3
+    """计算专业匹配度（直接匹配1.0 / 相关专业0.8 / 跨学科0.6 / 兜底0.3）"""
+    return get_major_graph().score(target_major, university_majors)
 
 def get_related_majors(major: str) -> List[str]:
     """获取相关专业列表"""
-    engineering = ["人工智能", "计算机科学与技术", "软件工程", "数据科学", "电子信息工程", "自动化"]
-    science = ["数学", "物理学", "化学", "生物学"]
-    business = ["经济学", "金融学", "会计学", "工商管理", "市场营销"]
-    medicine = ["临床医学", "口腔医学", "中医学", "药学", "护理学"]
-    law = ["法学", "政治学与行政学", "国际政治", "社会学"]
-    economics = ["经济学", "金融学", "会计学", "工商管理", "市场营销"]
-    
-    if major in engineering:
-        return engineering + science
-    elif major in business:
-        return business + economics
-    elif major in medicine:
-        return medicine + science
-    else:
-        return engineering + business  # 默认返回工科+商科
+    return sorted(get_major_graph().related(major))
 
 def get_cross_disciplinary_majors(major: str) -> List[str]:
-    """获取跨学科专业列表"""
-    # 简化处理，返回更多相关专业
-    return get_related_majors(major)
+    """获取跨学科专业列表（同学科组及关联学科组，不含相关专业）"""
+    return sorted(get_major_graph().cross_disciplinary(major))
 
 def get_level_priority(level: str) -> int:
     """获取大学层次优先级"""
@@ -146,16 +117,16 @@ def recommend_scenario_a(major: str, province: str, score: int, limit: int) -> R
     score_range_max = score + 30
     
     try:
-        # 同省分数段匹配
+        # 同省分数段匹配（recommendation_candidates 预聚合表上按分数范围扫描）
         cursor.execute("""
             SELECT u.id, u.name, u.province, u.city, u.level, u.employment_rate, u.website,
-                   AVG(avg_score) as avg_admission_score
-            FROM universities u
-            JOIN university_admission_scores s ON u.id = s.university_id
-            WHERE u.province = %s 
-              AND s.major_name = %s
-              AND s.avg_score BETWEEN %s AND %s
-              AND s.year = 2023
+                   SUM(c.score_sum) / SUM(c.score_count) as avg_admission_score
+            FROM recommendation_candidates c
+            JOIN universities u ON u.id = c.university_id
+            WHERE c.university_province = %s 
+              AND c.major_name = %s
+              AND c.avg_score BETWEEN %s AND %s
+              AND c.year = 2023
             GROUP BY u.id, u.name, u.province, u.city, u.level, u.employment_rate, u.website
             ORDER BY u.level, avg_admission_score DESC
             LIMIT %s
@@ -166,13 +137,13 @@ def recommend_scenario_a(major: str, province: str, score: int, limit: int) -> R
         # 全国分数段匹配
         cursor.execute("""
             SELECT u.id, u.name, u.province, u.city, u.level, u.employment_rate, u.website,
-                   AVG(avg_score) as avg_admission_score
-            FROM universities u
-            JOIN university_admission_scores s ON u.id = s.university_id
-            WHERE s.major_name = %s
-              AND s.avg_score BETWEEN %s AND %s
-              AND s.year = 2023
-              AND u.province != %s
+                   SUM(c.score_sum) / SUM(c.score_count) as avg_admission_score
+            FROM recommendation_candidates c
+            JOIN universities u ON u.id = c.university_id
+            WHERE c.major_name = %s
+              AND c.avg_score BETWEEN %s AND %s
+              AND c.year = 2023
+              AND c.university_province != %s
             GROUP BY u.id, u.name, u.province, u.city, u.level, u.employment_rate, u.website
             ORDER BY u.level, avg_admission_score DESC
             LIMIT %s
@@ -180,6 +151,9 @@ def recommend_scenario_a(major: str, province: str, score: int, limit: int) -> R
         
         national_results = cursor.fetchall()
         
+        # 一次加载所有结果大学的分数线
+        tier_scores = load_tier_scores(conn, [row[0] for row in province_results + national_results], major)
+        
         # 格式化结果
         groups = {}
         
@@ -188,7 +162,7 @@ def recommend_scenario_a(major: str, province: str, score: int, limit: int) -> R
                 "name": "🏆 同省分数匹配大学",
                 "count": len(province_results),
                 "description": f"{province}省内录取分数{score_range_min}-{score_range_max}分段的高校",
-                "universities": [format_university_with_tiers(row, major, conn) for row in province_results]
+                "universities": [format_university_with_tiers(row, major, tier_scores) for row in province_results]
             }
         
         if national_results:
@@ -196,7 +170,7 @@ def recommend_scenario_a(major: str, province: str, score: int, limit: int) -> R
                 "name": "🌟 全国分数匹配大学", 
                 "count": len(national_results),
                 "description": f"全国范围内录取分数{score_range_min}-{score_range_max}分段的高校",
-                "universities": [format_university_with_tiers(row, major, conn) for row in national_results]
+                "universities": [format_university_with_tiers(row, major, tier_scores) for row in national_results]
             }
         
         return RecommendationResponse(
@@ -245,6 +219,9 @@ def recommend_scenario_b(major: str, province: str, limit: int) -> Recommendatio
         
         national_results = cursor.fetchall()
         
+        # 一次加载所有结果大学的分数线
+        tier_scores = load_tier_scores(conn, [row[0] for row in province_results + national_results], major)
+        
         # 格式化结果
         groups = {}
         
@@ -253,7 +230,7 @@ def recommend_scenario_b(major: str, province: str, limit: int) -> Recommendatio
                 "name": "📍 同省优质大学",
                 "count": len(province_results),
                 "description": f"{province}省内{major}专业的优质高校",
-                "universities": [format_university_with_tiers(row, major, conn) for row in province_results]
+                "universities": [format_university_with_tiers(row, major, tier_scores) for row in province_results]
             }
         
         if national_results:
@@ -261,7 +238,7 @@ def recommend_scenario_b(major: str, province: str, limit: int) -> Recommendatio
                 "name": "🌟 全国推荐大学",
                 "count": len(national_results), 
                 "description": f"全国范围内{major}专业的优质高校",
-                "universities": [format_university_with_tiers(row, major, conn) for row in national_results]
+                "universities": [format_university_with_tiers(row, major, tier_scores) for row in national_results]
             }
         
         return RecommendationResponse(
@@ -296,6 +273,9 @@ def recommend_scenario_c(major: str, limit: int) -> RecommendationResponse:
         
         national_results = cursor.fetchall()
         
+        # 一次加载所有结果大学的分数线
+        tier_scores = load_tier_scores(conn, [row[0] for row in national_results], major)
+        
         # 格式化结果
         groups = {}
         
@@ -304,7 +284,7 @@ def recommend_scenario_c(major: str, limit: int) -> RecommendationResponse:
                 "name": "🌟 全国推荐大学",
                 "count": len(national_results),
                 "description": f"全国范围内{major}专业的优质高校",
-                "universities": [format_university_with_tiers(row, major, conn) for row in national_results]
+                "universities": [format_university_with_tiers(row, major, tier_scores) for row in national_results]
             }
         
         return RecommendationResponse(
@@ -321,28 +301,26 @@ def recommend_scenario_c(major: str, limit: int) -> RecommendationResponse:
         cursor.close()
         conn.close()
 
-def format_university_with_tiers(row, major: str, conn) -> Dict[str, Any]:
-    """格式化大学信息（包含多层次分数线）"""
-    university_id = row[0]
-    university_majors = []
+def load_tier_scores(conn, university_ids: List[int], major: str) -> Dict[int, Dict[str, Any]]:
+    """一次查询多所大学的多层次分数线，按大学分组（避免逐个大学查询）"""
+    if not university_ids:
+        return {}
     
-    # 获取该大学所有层次的分数线数据
     cursor = conn.cursor()
+    tier_scores: Dict[int, Dict[str, Any]] = {}
     try:
         cursor.execute("""
-            SELECT program_tier, year, min_score, max_score, avg_score, admission_type
+            SELECT university_id, program_tier, year, min_score, max_score, avg_score, admission_type
             FROM university_admission_scores
-            WHERE university_id = %s 
+            WHERE university_id = ANY(%s)
               AND major_name = %s
               AND year >= 2021
-            ORDER BY program_tier, year DESC
-        """, (university_id, major))
-        
-        tier_scores = cursor.fetchall()
+            ORDER BY university_id, program_tier, year DESC
+        """, (list(university_ids), major))
         
         # 组织分数线数据
-        score_data = {}
-        for tier, year, min_score, max_score, avg_score, admission_type in tier_scores:
+        for university_id, tier, year, min_score, max_score, avg_score, admission_type in cursor.fetchall():
+            score_data = tier_scores.setdefault(university_id, {})
             if tier not in score_data:
                 score_data[tier] = {
                     "tier_name": get_tier_display_name(tier),
@@ -355,12 +333,18 @@ def format_university_with_tiers(row, major: str, conn) -> Dict[str, Any]:
                 "avg_score": float(avg_score) if avg_score else None,
                 "admission_type": admission_type
             })
-        
     except Exception as e:
         logger.error(f"获取分数线数据失败: {e}")
-        score_data = {}
+        tier_scores = {}
     finally:
         cursor.close()
+    return tier_scores
+
+def format_university_with_tiers(row, major: str, tier_scores: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+    """格式化大学信息（包含多层次分数线，tier_scores 由 load_tier_scores 批量加载）"""
+    university_id = row[0]
+    university_majors = []
+    score_data = tier_scores.get(university_id, {})
     
     match_score = calculate_major_match_score(major, university_majors)
     
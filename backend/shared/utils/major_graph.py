@@ -0,0 +1,184 @@
+"""
+专业关联图
+由 backend/config/major_relatedness.json 一次性构建的带权专业关联图，
+爬虫服务（大学推荐打分）与推荐服务（专业匹配度）共用同一份配置和同一份实现。
+
+- 专业名称驻留为整数ID，每个专业的相关/跨学科专业预先存为 frozenset
+- score() 对候选大学的王牌专业集合逐个查表，复杂度 O(|strengths|)
+"""
+
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILENAME = "major_relatedness.json"
+
+DEFAULT_WEIGHTS = {"self": 1.0, "related": 0.8, "cross_disciplinary": 0.6, "default": 0.3}
+
+
+def find_config_path() -> Optional[Path]:
+    """MAJOR_GRAPH_PATH 环境变量，否则向上查找 config/major_relatedness.json"""
+    env_path = os.getenv("MAJOR_GRAPH_PATH")
+    if env_path:
+        return Path(env_path)
+    for parent in Path(__file__).resolve().parents:
+        candidate = parent / "config" / CONFIG_FILENAME
+        if candidate.exists():
+            return candidate
+    return None
+
+
+class MajorGraph:
+    """带权专业关联图
+
+    关联层次（权重见配置 weights）：
+    - self：同一专业
+    - related：related_majors 中列出的相关专业（即大学王牌专业的对口专业）
+    - cross_disciplinary：同一学科组或关联学科组中的其他专业
+    - default：其他
+
+    Args:
+        related_majors: {专业: [相关专业]}
+        categories: {专业大类: [专业]}，无对口王牌专业时按大类匹配
+        discipline_groups: {学科组: [专业]}
+        group_links: {学科组: [关联学科组]}
+        weights: 各关联层次的权重
+    """
+
+    def __init__(
+        self,
+        related_majors: Dict[str, Iterable[str]],
+        categories: Optional[Dict[str, Iterable[str]]] = None,
+        discipline_groups: Optional[Dict[str, Iterable[str]]] = None,
+        group_links: Optional[Dict[str, Iterable[str]]] = None,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self._ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+        self._related: Dict[int, FrozenSet[int]] = {
+            self._intern(major): frozenset(self._intern(m) for m in related)
+            for major, related in related_majors.items()
+        }
+
+        groups = {name: frozenset(self._intern(m) for m in members) for name, members in (discipline_groups or {}).items()}
+        links = group_links or {}
+        cross: Dict[int, set] = {}
+        for name, members in groups.items():
+            peers = set(members)
+            for linked in links.get(name, ()):
+                peers |= groups.get(linked, frozenset())
+            for major_id in members:
+                cross.setdefault(major_id, set()).update(peers)
+        self._cross: Dict[int, FrozenSet[int]] = {
+            major_id: frozenset(peers - self._related.get(major_id, frozenset()) - {major_id})
+            for major_id, peers in cross.items()
+        }
+
+        # 专业 → 同大类专业：与其相关专业有交集的所有大类的专业
+        category_sets = [frozenset(self._intern(m) for m in members) for members in (categories or {}).values()]
+        self._category_peers: Dict[int, FrozenSet[int]] = {
+            major_id: frozenset().union(*(c for c in category_sets if c & related))
+            for major_id, related in self._related.items()
+        }
+
+    def _intern(self, name: str) -> int:
+        major_id = self._ids.get(name)
+        if major_id is None:
+            major_id = self._ids[sys.intern(name)] = len(self.names)
+            self.names.append(name)
+        return major_id
+
+    def _to_names(self, ids: FrozenSet[int]) -> FrozenSet[str]:
+        return frozenset(self.names[i] for i in ids)
+
+    @classmethod
+    def from_config(cls, path: Optional[Path] = None) -> "MajorGraph":
+        """从JSON配置构建"""
+        path = path or find_config_path()
+        if path is None:
+            raise FileNotFoundError(f"未找到专业关联图配置 {CONFIG_FILENAME}")
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        graph = cls(
+            data.get("related_majors", {}),
+            data.get("categories"),
+            data.get("discipline_groups"),
+            data.get("group_links"),
+            data.get("weights"),
+        )
+        logger.info(f"已加载专业关联图: {len(graph.names)}个专业 ({path})")
+        return graph
+
+    def id(self, name: str) -> Optional[int]:
+        """专业名称对应的ID，未知专业返回None"""
+        return self._ids.get(name)
+
+    def has(self, major: str) -> bool:
+        """是否配置了该专业的相关专业"""
+        major_id = self._ids.get(major)
+        return major_id is not None and major_id in self._related
+
+    def related(self, major: str) -> FrozenSet[str]:
+        """相关专业（含配置中列出的本专业）"""
+        major_id = self._ids.get(major)
+        return self._to_names(self._related.get(major_id, frozenset()))
+
+    def cross_disciplinary(self, major: str) -> FrozenSet[str]:
+        """跨学科专业（不含相关专业）"""
+        major_id = self._ids.get(major)
+        return self._to_names(self._cross.get(major_id, frozenset()))
+
+    def category_peers(self, major: str) -> FrozenSet[str]:
+        """与相关专业同大类的专业"""
+        major_id = self._ids.get(major)
+        return self._to_names(self._category_peers.get(major_id, frozenset()))
+
+    def weight(self, major: str, other: str) -> float:
+        """两个专业之间的关联权重"""
+        return self.score(major, (other,))
+
+    def score(self, major: str, strengths: Iterable[str]) -> float:
+        """候选大学的王牌专业集合与目标专业的匹配度（取最高关联权重），O(|strengths|)"""
+        weights = self.weights
+        major_id = self._ids.get(major)
+        related = self._related.get(major_id, frozenset())
+        cross = self._cross.get(major_id, frozenset())
+        best = weights["default"]
+        for name in strengths:
+            other_id = self._ids.get(name)
+            if other_id is None:
+                continue
+            if other_id == major_id:
+                return weights["self"]
+            if other_id in related:
+                best = max(best, weights["related"])
+            elif other_id in cross:
+                best = max(best, weights["cross_disciplinary"])
+        return best
+
+    def related_hits(self, major: str, strengths: Iterable[str]) -> int:
+        """王牌专业中命中相关专业的个数，O(|strengths|)"""
+        related = self._related.get(self._ids.get(major), frozenset())
+        hits = 0
+        for name in strengths:
+            if self._ids.get(name) in related:
+                hits += 1
+        return hits
+
+
+_major_graph: Optional[MajorGraph] = None
+
+
+def get_major_graph() -> MajorGraph:
+    """获取全局专业关联图（首次调用时加载）"""
+    global _major_graph
+    if _major_graph is None:
+        _major_graph = MajorGraph.from_config()
+    return _major_graph
@@ -0,0 +1,146 @@
+"""
+游标（Keyset）分页工具
+按 (排序字段..., id) 生成不透明游标和 WHERE 条件，深分页无需 OFFSET 扫描
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+# 总数统计模式
+TOTAL_EXACT = "exact"        # COUNT(*) 精确统计
+TOTAL_ESTIMATE = "estimate"  # 估算（规划器统计信息或增量维护的计数）
+TOTAL_NONE = "none"          # 不统计
+TOTAL_MODES = (TOTAL_EXACT, TOTAL_ESTIMATE, TOTAL_NONE)
+
+
+class InvalidCursorError(ValueError):
+    """游标无效或与当前查询的排序方式不匹配"""
+
+
+class SortKey:
+    """排序键
+
+    Args:
+        expr: SQL列表达式
+        descending: 是否降序
+        nulls_last: NULL 是否排在最后（SQLite: 降序时为True；PostgreSQL: 默认升序时为True）
+    """
+
+    def __init__(self, expr: str, descending: bool, nulls_last: bool):
+        self.expr = expr
+        self.descending = descending
+        self.nulls_last = nulls_last
+
+    def order_sql(self) -> str:
+        return f"{self.expr} {'DESC' if self.descending else 'ASC'}"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise InvalidCursorError("无法识别的游标值")
+    return value
+
+
+def encode_cursor(signature: str, values: Sequence[Any]) -> str:
+    """生成不透明游标
+
+    Args:
+        signature: 排序方式标识（如 "heat_index:desc"），解码时校验
+        values: 最后一行的排序键取值（最后一个为id）
+    """
+    payload = json.dumps({"s": signature, "v": [_encode_value(v) for v in values]}, ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, signature: str) -> List[Any]:
+    """解析游标，返回排序键取值"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        values = [_decode_value(v) for v in payload["v"]]
+    except InvalidCursorError:
+        raise
+    except Exception:
+        raise InvalidCursorError("游标格式无效")
+    if payload.get("s") != signature:
+        raise InvalidCursorError("游标与当前排序方式不匹配")
+    return values
+
+
+def keyset_condition(keys: Sequence[SortKey], values: Sequence[Any], placeholder: str = "?") -> Tuple[str, List[Any]]:
+    """生成"排在游标之后"的 WHERE 条件（按字典序比较，正确处理 NULL）
+
+    Returns:
+        (SQL条件, 参数列表)
+    """
+    if len(keys) != len(values):
+        raise InvalidCursorError("游标与当前排序方式不匹配")
+
+    branches = []
+    params: List[Any] = []
+    for i, key in enumerate(keys):
+        parts = []
+        part_params: List[Any] = []
+        # 前 i 个键相等
+        for prev, value in zip(keys[:i], values[:i]):
+            if value is None:
+                parts.append(f"{prev.expr} IS NULL")
+            else:
+                parts.append(f"{prev.expr} = {placeholder}")
+                part_params.append(value)
+        # 第 i 个键在游标之后
+        value = values[i]
+        if value is None:
+            if key.nulls_last:
+                continue  # NULL 之后没有同列取值更靠后的行
+            parts.append(f"{key.expr} IS NOT NULL")
+        else:
+            op = "<" if key.descending else ">"
+            if key.nulls_last:
+                parts.append(f"({key.expr} {op} {placeholder} OR {key.expr} IS NULL)")
+            else:
+                parts.append(f"{key.expr} {op} {placeholder}")
+            part_params.append(value)
+        branches.append("(" + " AND ".join(parts) + ")")
+        params.extend(part_params)
+
+    if not branches:
+        return "1=0", []
+    return "(" + " OR ".join(branches) + ")", params
+
+
+def estimate_count(cursor, sql: str, params: Sequence[Any]) -> int:
+    """通过 PostgreSQL 规划器统计信息估算行数（EXPLAIN，不实际扫描）"""
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", tuple(params))
+    row = cursor.fetchone()
+    plan = row["QUERY PLAN"] if isinstance(row, dict) else row[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def validate_total_mode(total_mode: Optional[str]) -> str:
+    """校验总数统计模式"""
+    total_mode = total_mode or TOTAL_EXACT
+    if total_mode not in TOTAL_MODES:
+        raise ValueError(f"无效的总数统计模式: {total_mode}，支持: {', '.join(TOTAL_MODES)}")
+    return total_mode
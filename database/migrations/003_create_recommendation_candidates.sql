@@ -0,0 +1,75 @@
+-- 大学推荐候选表 - university_admission_scores 按 (省份, 专业, 年份, 专业层次, 大学, 平均分) 预聚合
+-- 推荐接口的分数段查询直接在本表上做索引范围扫描，不再每次请求 JOIN + GROUP BY 原始分数表
+-- 平均分是聚合键的一部分：同一行内的原始记录平均分相同，分数段过滤与原来逐条过滤原始记录的结果一致
+-- （同一键下有统招、专项计划等多条记录时，不会因整体平均落入分数段而多匹配），
+-- SUM(score_sum) / SUM(score_count) 等于原查询对命中记录的 AVG(avg_score)
+-- 刷新方式：录取分数写入后按受影响的 (大学, 专业, 省份, 年份) 增量刷新
+--          （crawler-service services/recommendation_candidates.py 的 refresh_candidates），
+--          大学所在省份变更时由触发器同步
+
+CREATE TABLE IF NOT EXISTS recommendation_candidates (
+    province VARCHAR(50) NOT NULL, -- 录取省份
+    major_name VARCHAR(200) NOT NULL, -- 专业名称
+    year INTEGER NOT NULL, -- 年份
+    program_tier VARCHAR(50) NOT NULL DEFAULT '', -- 专业层次（无层次为空字符串）
+    university_id INTEGER NOT NULL REFERENCES universities(id) ON DELETE CASCADE,
+    university_province VARCHAR(50), -- 大学所在省份（冗余字段，便于同省/全国查询）
+
+    -- 聚合分数统计
+    score_sum NUMERIC NOT NULL, -- 平均分之和（与 score_count 一起计算跨行平均）
+    score_count INTEGER NOT NULL, -- 平均分相同的分数记录条数
+    avg_score NUMERIC NOT NULL, -- 原始记录的平均分（聚合键）
+    min_score INTEGER, -- 最低分
+    max_score INTEGER, -- 最高分
+
+    refreshed_at TIMESTAMP DEFAULT NOW(),
+
+    PRIMARY KEY (province, major_name, year, program_tier, university_id, avg_score)
+);
+
+-- 全国分数段查询：专业 + 年份 + 分数范围
+CREATE INDEX IF NOT EXISTS idx_recommendation_candidates_major_score
+ON recommendation_candidates(major_name, year, avg_score);
+
+-- 同省分数段查询：大学所在省份 + 专业 + 年份 + 分数范围
+CREATE INDEX IF NOT EXISTS idx_recommendation_candidates_local_score
+ON recommendation_candidates(university_province, major_name, year, avg_score);
+
+-- 增量刷新按大学定位受影响的行
+CREATE INDEX IF NOT EXISTS idx_recommendation_candidates_university
+ON recommendation_candidates(university_id, major_name);
+
+-- 原始分数表上用于增量刷新的索引
+CREATE INDEX IF NOT EXISTS idx_university_admission_scores_refresh
+ON university_admission_scores(university_id, major_name, province, year);
+
+-- 初始填充
+INSERT INTO recommendation_candidates (
+    province, major_name, year, program_tier, university_id, university_province,
+    score_sum, score_count, avg_score, min_score, max_score
+)
+SELECT s.province, s.major_name, s.year, COALESCE(s.program_tier, ''), s.university_id, u.province,
+       SUM(s.avg_score), COUNT(*), s.avg_score, MIN(s.min_score), MAX(s.max_score)
+FROM university_admission_scores s
+JOIN universities u ON u.id = s.university_id
+WHERE s.avg_score IS NOT NULL AND s.province IS NOT NULL AND s.year IS NOT NULL
+GROUP BY s.province, s.major_name, s.year, COALESCE(s.program_tier, ''), s.university_id, u.province, s.avg_score
+ON CONFLICT (province, major_name, year, program_tier, university_id, avg_score) DO NOTHING;
+
+-- 大学所在省份变更时同步冗余字段
+CREATE OR REPLACE FUNCTION sync_recommendation_candidates_province()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE recommendation_candidates
+    SET university_province = NEW.province, refreshed_at = NOW()
+    WHERE university_id = NEW.id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_sync_recommendation_candidates_province ON universities;
+CREATE TRIGGER trigger_sync_recommendation_candidates_province
+    AFTER UPDATE OF province ON universities
+    FOR EACH ROW
+    WHEN (OLD.province IS DISTINCT FROM NEW.province)
+    EXECUTE FUNCTION sync_recommendation_candidates_province();